@@ -0,0 +1,325 @@
+#!/usr/bin/env python
+import sys
+import os
+import json
+import time
+import random
+import argparse
+import tempfile
+import subprocess
+from argparse import ArgumentParser
+
+'''Measure how an ArgparseGui copes with parsers of increasing size: the time to build
+it, the time until it is first drawn, peak memory, how many command lines per second
+make_commandline_list produces, and the time to destroy it.  Command lines are counted
+both with an option changed before each call, so that the line has to be made again, 
+and with nothing changed, when the last one is handed back from the form's cache.
+
+Parsers are generated with a mix of actions like that of real scripts: flags, choices,
+FileType arguments, nargs='*' lists and plain typed values, split into groups.  Each
+size and layout is measured in a fresh interpreter, so that peak RSS belongs to that
+gui alone.  A display is needed; if DISPLAY isn't set a headless Xvfb server is
+started for the duration.
+
+Results can be saved as a baseline, e.g. once per commit worth comparing against,
+and later runs compared with it:
+
+    bench_gui.py --save baselines/before.json
+    bench_gui.py --compare baselines/before.json
+
+which fails if any time has grown by more than the tolerance.
+'''
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+
+DEFAULT_SIZES = [10, 100, 1000, 10000]
+#measurements compared against a baseline, and whether bigger is better
+METRICS = [
+    ('construct_ms', False),
+    ('first_paint_ms', False),
+    ('peak_rss_kb', False),
+    ('argv_changed_per_second', True),
+    ('argv_cached_per_second', True),
+    ('destroy_ms', False),
+    ]
+
+#(share of actions, kind) for generated parsers
+ACTION_MIX = [
+    (0.35, 'store_true'),
+    (0.15, 'choices'),
+    (0.10, 'filetype'),
+    (0.10, 'nargs'),
+    (0.15, 'int'),
+    (0.05, 'float'),
+    (0.10, 'string'),
+    ]
+
+ACTIONS_PER_GROUP = 20
+
+
+def make_parser(num_actions, seed=0):
+    '''An ArgumentParser with num_actions optional arguments of a realistic mix of kinds,
+    in groups of ACTIONS_PER_GROUP.  The same num_actions and seed give the same parser.
+    '''
+    rand = random.Random(seed)
+    parser = ArgumentParser(description='Synthetic parser with %d actions' % num_actions)
+    group = None
+    for num in range(num_actions):
+        if num % ACTIONS_PER_GROUP == 0:
+            group = parser.add_argument_group('Group %d' % (num // ACTIONS_PER_GROUP))
+        pick = rand.random()
+        for share, kind in ACTION_MIX:
+            pick -= share
+            if pick < 0:
+                break
+        name = '--%s-%d' % (kind, num)
+        help_text = 'a %s option, number %d of %d' % (kind, num, num_actions)
+        if kind == 'store_true':
+            group.add_argument(name, action='store_true', help=help_text)
+        elif kind == 'choices':
+            choices = ['choice%d' % choice for choice in range(rand.randint(2, 6))]
+            group.add_argument(name, choices=choices, default=choices[0], help=help_text)
+        elif kind == 'filetype':
+            group.add_argument(name, type=argparse.FileType('r'), help=help_text)
+        elif kind == 'nargs':
+            group.add_argument(name, nargs='*', default=[], help=help_text)
+        elif kind == 'int':
+            group.add_argument(name, type=int, default=rand.randint(0, 100), help=help_text)
+        elif kind == 'float':
+            group.add_argument(name, type=float, default=rand.random(), help=help_text)
+        else:
+            group.add_argument(name, default='value%d' % num, help=help_text)
+    return parser
+
+
+def peak_rss_kb():
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    #bytes on OS X, kilobytes elsewhere
+    if sys.platform == 'darwin':
+        peak //= 1024
+    return peak
+
+
+def measure(num_actions, virtual, argv_seconds, seed):
+    '''Build, draw, use and destroy a gui for a generated parser in this interpreter,
+    returning a dict of the measurements.
+    '''
+    parser = make_parser(num_actions, seed)
+    rss_before = peak_rss_kb()
+    from tkarg import ArgparseGui
+    from tkarg.optionmodel import BOOL
+
+    start = time.time()
+    gui = ArgparseGui(parser, virtual=virtual, validate=False, timing=True)
+    constructed = time.time()
+
+    #until everything pending is done, including geometry management and drawing
+    gui.tk.update()
+    painted = time.time()
+
+    #flip some of the flags so that there is something to put on the command line
+    flags = [model for model in gui.form.models if model.kind == BOOL]
+    for model in flags[::3]:
+        model.set_value(True)
+
+    def argv_rate(change):
+        '''Calls of make_commandline_list per second, flipping a flag before each if change'''
+        calls = 0
+        start = time.time()
+        while calls == 0 or time.time() - start < argv_seconds:
+            if change:
+                model = flags[calls % len(flags)]
+                model.set_value(not model.checked())
+            commandline_list = gui.make_commandline_list()
+            calls += 1
+        return calls / (time.time() - start), commandline_list
+
+    argv_changed_per_second, commandline_list = argv_rate(True)
+    argv_cached_per_second, commandline_list = argv_rate(False)
+
+    destroy_start = time.time()
+    gui.close_status()
+    gui.tk.destroy()
+    destroyed = time.time()
+
+    return {
+        'actions':num_actions,
+        'virtual':virtual,
+        'construct_ms':(constructed - start) * 1000,
+        'first_paint_ms':(painted - constructed) * 1000,
+        'peak_rss_kb':peak_rss_kb(),
+        'rss_before_gui_kb':rss_before,
+        'gui_bytes_per_action':(peak_rss_kb() - rss_before) * 1024.0 / num_actions,
+        'argv_changed_per_second':argv_changed_per_second,
+        'argv_cached_per_second':argv_cached_per_second,
+        'argv_tokens':len(commandline_list),
+        'destroy_ms':(destroyed - destroy_start) * 1000,
+        'phases':gui.timer.to_dict(),
+        }
+
+
+class Xvfb(object):
+    '''A headless X server on display, while in a with block'''
+    def __init__(self, display):
+        self.display = display
+        self.process = None
+
+    def __enter__(self):
+        try:
+            self.process = subprocess.Popen(['Xvfb', self.display, '-screen', '0', '1600x1200x24', '-nolisten', 'tcp'],
+                    stdout=open(os.devnull, 'wb'), stderr=open(os.devnull, 'wb'))
+        except OSError:
+            sys.exit('No DISPLAY is set and Xvfb could not be started; install Xvfb or run under a display')
+        socket_path = '/tmp/.X11-unix/X%s' % self.display.lstrip(':')
+        deadline = time.time() + 10
+        while not os.path.exists(socket_path):
+            if self.process.poll() is not None or time.time() > deadline:
+                sys.exit('Xvfb failed to start on display %s' % self.display)
+            time.sleep(0.05)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.process.terminate()
+        self.process.wait()
+        return False
+
+
+def run_worker(num_actions, virtual, options, env):
+    '''Measure in a fresh interpreter, returning the measurements or None if it failed'''
+    command = [sys.executable, os.path.abspath(__file__), '--worker', str(num_actions),
+            '--argv-seconds', str(options.argv_seconds), '--seed', str(options.seed)]
+    if virtual:
+        command.append('--virtual')
+    worker = subprocess.Popen(command, env=env, stdout=subprocess.PIPE)
+    out = worker.communicate()[0]
+    if worker.returncode:
+        sys.stderr.write('%d actions (%s) failed with exit status %d\n' % (num_actions, layout_name(virtual), worker.returncode))
+        return None
+    return json.loads(out)
+
+
+def layout_name(virtual):
+    return 'virtual' if virtual else 'column'
+
+
+def result_key(result):
+    return '%d %s' % (result['actions'], layout_name(result['virtual']))
+
+
+def git_commit():
+    try:
+        with open(os.devnull, 'wb') as null:
+            return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR, stderr=null).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results):
+    sys.stdout.write('%-16s %12s %12s %12s %12s %12s %12s\n' % ('actions', 'build ms', 'paint ms', 'peak RSS MB', 
+        'argv/s', 'cached/s', 'destroy ms'))
+    for result in results:
+        sys.stdout.write('%-16s %12.1f %12.1f %12.1f %12.1f %12.1f %12.1f\n' % (result_key(result),
+            result['construct_ms'], result['first_paint_ms'], result['peak_rss_kb'] / 1024.0,
+            result['argv_changed_per_second'], result['argv_cached_per_second'], result['destroy_ms']))
+
+
+def compare(results, baseline, tolerance):
+    '''Print how results differ from baseline, returning the regressions beyond tolerance'''
+    previous = dict((result_key(result), result) for result in baseline['results'])
+    regressions = []
+    sys.stdout.write('\ncompared with %s (commit %s)\n' % (baseline.get('created'), baseline.get('commit')))
+    for result in results:
+        key = result_key(result)
+        if key not in previous:
+            continue
+        changes = []
+        for metric, bigger_is_better in METRICS:
+            #baselines saved before a metric was added don't have it
+            old, new = previous[key].get(metric), result[metric]
+            if not old:
+                continue
+            ratio = new / float(old)
+            changes.append('%s %+.0f%%' % (metric, (ratio - 1) * 100))
+            worse = ratio < 1 - tolerance if bigger_is_better else ratio > 1 + tolerance
+            if worse:
+                regressions.append('%s %s: %.1f -> %.1f' % (key, metric, old, new))
+        sys.stdout.write('%-16s %s\n' % (key, ', '.join(changes)))
+    return regressions
+
+
+def main():
+    parser = ArgumentParser(description='Benchmark ArgparseGui on generated parsers of increasing size')
+    parser.add_argument('-s', '--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+            help='numbers of actions in the generated parsers')
+    parser.add_argument('-l', '--layouts', nargs='+', choices=['column', 'virtual'], default=['column', 'virtual'],
+            help='which layouts to measure')
+    parser.add_argument('--argv-seconds', type=float, default=1.0,
+            help='seconds to spend calling make_commandline_list for each gui, both with and '
+                'without changes')
+    parser.add_argument('--seed', type=int, default=0,
+            help='seed for generating the parsers')
+    parser.add_argument('--display', default=':99',
+            help='display for Xvfb to use, if DISPLAY isn\'t set')
+    parser.add_argument('--save', metavar='PATH',
+            help='save the results as a baseline to compare later runs with')
+    parser.add_argument('--compare', metavar='PATH',
+            help='compare the results with a baseline saved with --save')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+            help='fraction by which a measurement may be worse than the baseline before failing')
+    parser.add_argument('--json', action='store_true',
+            help='print the results as JSON rather than as a table')
+    parser.add_argument('--worker', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--virtual', action='store_true', help=argparse.SUPPRESS)
+    options = parser.parse_args()
+
+    if options.worker is not None:
+        sys.path.insert(0, REPO_DIR)
+        json.dump(measure(options.worker, options.virtual, options.argv_seconds, options.seed), sys.stdout)
+        return
+
+    env = dict(os.environ)
+    env.setdefault('TKARG_CACHE_DIR', tempfile.mkdtemp(prefix='tkarg_bench_cache'))
+    #the worker reports the timings itself, so keep them off stderr
+    env.pop('TKARG_TIMING', None)
+
+    def run_all():
+        results = []
+        for num_actions in options.sizes:
+            for layout in options.layouts:
+                result = run_worker(num_actions, layout == 'virtual', options, env)
+                if result is not None:
+                    results.append(result)
+        return results
+
+    if env.get('DISPLAY'):
+        results = run_all()
+    else:
+        env['DISPLAY'] = options.display
+        with Xvfb(options.display):
+            results = run_all()
+    if not results:
+        sys.exit('no measurements could be made')
+
+    if options.json:
+        json.dump(results, sys.stdout, indent=1)
+        sys.stdout.write('\n')
+    else:
+        print_results(results)
+
+    if options.save:
+        with open(options.save, 'w') as out:
+            json.dump({'commit':git_commit(), 'created':time.strftime('%Y-%m-%d %H:%M:%S'),
+                'python':sys.version.split()[0], 'results':results}, out, indent=1)
+
+    if options.compare:
+        with open(options.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = compare(results, baseline, options.tolerance)
+        if regressions:
+            sys.exit('regressions beyond %.0f%%:\n%s' % (options.tolerance * 100, '\n'.join(regressions)))
+
+
+if __name__ == '__main__':
+    main()
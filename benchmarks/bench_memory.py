@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+import sys
+import os
+import gc
+import json
+import argparse
+import subprocess
+from argparse import ArgumentParser
+
+'''Measure the memory taken per option by the Tk-free part of tkarg, the option models
+of an ArgparseOptionForm, for the generated parsers of bench_gui.py.  No display is
+needed.
+
+Each size is measured in a fresh interpreter, as the growth in resident memory from
+building the form, divided by the number of options.  The size of the model objects
+themselves is also reported for each kind of option, as counted by sys.getsizeof, which
+doesn't include the argparse actions the models refer to since the parser has those
+anyway.  bench_gui.py reports the memory per option of the whole gui.
+'''
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+
+
+def current_rss_kb():
+    '''Resident memory now, rather than the peak, where /proc makes that possible'''
+    try:
+        with open('/proc/self/statm') as statm:
+            pages = int(statm.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') // 1024
+    except (IOError, OSError, ValueError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def model_bytes(model):
+    '''Bytes used by a model and the values it holds that aren't shared with the parser'''
+    size = sys.getsizeof(model)
+    if model.label_cache is not None:
+        size += sys.getsizeof(model.label_cache) + sum(sys.getsizeof(text) for text in model.label_cache.values())
+    if model.value is not model.option.default:
+        size += sys.getsizeof(model.value)
+    return size
+
+
+def measure(num_actions, seed):
+    from bench_gui import make_parser
+    from tkarg.optionmodel import ArgparseOptionForm
+
+    parser = make_parser(num_actions, seed)
+    gc.collect()
+    before = current_rss_kb()
+    form = ArgparseOptionForm(parser)
+    gc.collect()
+    after = current_rss_kb()
+
+    by_kind = {}
+    for model in form.models:
+        total, count = by_kind.get(model.kind, (0, 0))
+        by_kind[model.kind] = (total + model_bytes(model), count + 1)
+
+    return {
+        'actions':num_actions,
+        'models':len(form.models),
+        'form_bytes_per_option':(after - before) * 1024.0 / len(form.models),
+        'model_bytes_by_kind':dict((kind, total / float(count)) for kind, (total, count) in by_kind.items()),
+        }
+
+
+def main():
+    parser = ArgumentParser(description='Memory per option of ArgparseOptionForm')
+    parser.add_argument('-s', '--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+            help='numbers of actions in the generated parsers')
+    parser.add_argument('--seed', type=int, default=0,
+            help='seed for generating the parsers')
+    parser.add_argument('--json', action='store_true',
+            help='print the results as JSON rather than as a table')
+    parser.add_argument('--worker', type=int, help=argparse.SUPPRESS)
+    options = parser.parse_args()
+
+    if options.worker is not None:
+        sys.path.insert(0, REPO_DIR)
+        json.dump(measure(options.worker, options.seed), sys.stdout)
+        return
+
+    results = []
+    for num_actions in options.sizes:
+        out = subprocess.check_output([sys.executable, os.path.abspath(__file__),
+            '--worker', str(num_actions), '--seed', str(options.seed)])
+        results.append(json.loads(out))
+
+    if options.json:
+        json.dump(results, sys.stdout, indent=1)
+        sys.stdout.write('\n')
+        return
+
+    kinds = sorted(set(kind for result in results for kind in result['model_bytes_by_kind']))
+    sys.stdout.write('%-10s %16s' % ('actions', 'form bytes/opt') + ''.join(' %12s' % ('%s model' % kind) for kind in kinds) + '\n')
+    for result in results:
+        sys.stdout.write('%-10d %16.0f' % (result['actions'], result['form_bytes_per_option']))
+        for kind in kinds:
+            size = result['model_bytes_by_kind'].get(kind)
+            sys.stdout.write(' %12s' % ('%.0f' % size if size is not None else '-'))
+        sys.stdout.write('\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+import sys
+import os
+import time
+import tempfile
+import subprocess
+from argparse import ArgumentParser
+
+'''Measure how long scripts/tkgui.py takes to start, up to the point where it would open
+the gui, and fail if that goes over a budget.  Each measurement is made in a fresh
+interpreter, repeated, and the median is reported with the time for the interpreter
+to start and do nothing subtracted.  No display is needed, since the wrapped script
+exits before calling parse_args.
+
+Also reports the time to import the parts of tkarg that don't need Tkinter, and
+checks that they really don't import it, nor tkgui.py before the gui is shown.
+'''
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+TKGUI = os.path.join(REPO_DIR, 'scripts', 'tkgui.py')
+
+#each of these is run with python -c, and prints its own import time and whether Tkinter was imported
+IMPORT_SNIPPET = '''
+import sys, time
+start = time.time()
+%s
+sys.stdout.write('%%f %%d\\n' %% (time.time() - start, 'Tkinter' in sys.modules))
+'''
+
+#run by tkgui.py in place of a real script, exiting before parse_args would show the gui
+TARGET = '''import sys
+sys.exit(3 if 'Tkinter' in sys.modules else 0)
+'''
+TKINTER_IMPORTED = 3
+
+IMPORTS = [
+    ('tkarg', 'import tkarg'),
+    ('tkarg.argparseutils', 'from tkarg.argparseutils import argparse_bounded_float, ArgparseActionAppendToDefault'),
+    ('tkarg.optionmodel', 'from tkarg.optionmodel import ArgparseOptionForm'),
+    ('tkarg.tkinterutils', 'from tkarg.tkinterutils import ArgparseGui'),
+    ]
+
+
+def median(values):
+    values = sorted(values)
+    mid = len(values) // 2
+    if len(values) % 2:
+        return values[mid]
+    return (values[mid - 1] + values[mid]) / 2.0
+
+
+def environment():
+    env = dict(os.environ)
+    env['PYTHONPATH'] = REPO_DIR + os.pathsep + env.get('PYTHONPATH', '')
+    #keep the schema cache out of the way of real use
+    env.setdefault('TKARG_CACHE_DIR', tempfile.mkdtemp(prefix='tkarg_bench_cache'))
+    return env
+
+
+def time_command(command, repeats, env):
+    times = []
+    for rep in range(repeats):
+        start = time.time()
+        subprocess.check_call(command, env=env)
+        times.append(time.time() - start)
+    return median(times)
+
+
+def time_import(statement, repeats, env):
+    times = []
+    for rep in range(repeats):
+        out = subprocess.check_output([sys.executable, '-c', IMPORT_SNIPPET % statement], env=env)
+        elapsed, imported_tk = out.split()
+        times.append(float(elapsed))
+    return median(times), bool(int(imported_tk))
+
+
+def main():
+    parser = ArgumentParser(description='Cold start benchmark for tkgui.py')
+    parser.add_argument('-r', '--repeats', type=int, default=9,
+            help='number of fresh interpreters to time for each measurement')
+    parser.add_argument('-b', '--budget', type=float, default=0.15,
+            help='maximum seconds tkgui.py may take to start, beyond bare interpreter startup')
+    options = parser.parse_args()
+
+    env = environment()
+
+    target = tempfile.NamedTemporaryFile(suffix='.py', delete=False)
+    target.write(TARGET)
+    target.close()
+
+    try:
+        baseline = time_command([sys.executable, '-c', 'pass'], options.repeats, env)
+        try:
+            tkgui_time = time_command([sys.executable, TKGUI, target.name], options.repeats, env) - baseline
+        except subprocess.CalledProcessError as err:
+            if err.returncode == TKINTER_IMPORTED:
+                sys.exit('tkgui.py imported Tkinter before the gui was needed')
+            raise
+    finally:
+        os.remove(target.name)
+
+    sys.stdout.write('%-24s %10s %10s\n' % ('import', 'ms', 'Tkinter'))
+    for name, statement in IMPORTS:
+        elapsed, imported_tk = time_import(statement, options.repeats, env)
+        sys.stdout.write('%-24s %10.1f %10s\n' % (name, elapsed * 1000, 'yes' if imported_tk else 'no'))
+
+    sys.stdout.write('\n%-24s %10.1f\n' % ('interpreter', baseline * 1000))
+    sys.stdout.write('%-24s %10.1f (budget %.1f)\n' % ('tkgui.py startup', tkgui_time * 1000, options.budget * 1000))
+
+    if tkgui_time > options.budget:
+        sys.exit('tkgui.py startup of %.1f ms is over the budget of %.1f ms' % (tkgui_time * 1000, options.budget * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -2,8 +2,7 @@
 import sys
 from argparse import ArgumentParser
 
-from Tkinter import *
-from tkarg import ArgparseGui
+#Tkinter and the gui are imported when the form is shown here rather than by a daemon
 #from ttk import *
 
 '''Pass any script that uses the argparse ArgumentParser to control command line input.
@@ -13,23 +12,123 @@ out of the ArgumentParser instance and uses them to construct a simple Tk GUI.
 Arguments entered into the GUI are subsequently passed to the original ArgumentParser.parse_args
 function and returned.  So, the other script knows nothing about the fact that a GUI was
 even used.
+
+With --subprocess as the first argument, i.e. tkgui.py --subprocess script.py, the script
+is instead run as a separate process each time RUN is pressed, with the arguments entered
+into the GUI.  The GUI stays open, so several runs can go at once, each with its output
+shown in its own window.
+
+With --sweep, options may also hold a list, range or glob of values, e.g. {0..1..0.1}
+(see tkarg.sweep), and RUN starts the script for every combination of them, as 
+separate processes with at most --max-runs going at once (4 by default).
+
+With --readahead, chosen input files are checked in the background and the OS is asked
+to start reading them into memory, so that they are ready by the time the script runs.
+
+With --preview, the command line is shown below the buttons as it is edited, ready to 
+be copied into a job script.
+
+With --filter, an entry above the options shows only those matching what is typed 
+into it, for scripts with many options.
+
+With --daemon, the form is opened by a tkarg daemon that is already running (see 
+tkarg.daemon), so that it appears without waiting for Tk to start.  If there is no
+daemon one is started for next time, and the form is shown as usual.
 '''
 
 #back up the original parse_args function
 old_parse_args = ArgumentParser.parse_args
 
 def parse_args(self):
+    from Tkinter import Tk
+    from tkarg import ArgparseGui
+    from tkarg.schemacache import SchemaCache
     root = Tk()
-    gui = ArgparseGui(self, root, height=768, width=1024)
+    gui = ArgparseGui(self, root, height=768, width=1024, schema_cache=SchemaCache(source=script), readahead_files=readahead, preview=preview, filter_bar=filter_bar)
     root.wait_window(gui.frame)
     if gui.cancelled:
         sys.exit('GUI cancelled ...')
     args = gui.make_commandline_list()
     return old_parse_args(self, args)
 
+def parse_args_via_daemon(self):
+    from tkarg.daemon import request_argv, start_daemon, DaemonUnavailable
+    try:
+        args = request_argv(self, options={'height':768, 'width':1024, 'readahead_files':readahead, 'preview':preview, 'filter_bar':filter_bar})
+    except DaemonUnavailable:
+        start_daemon()
+        return parse_args(self)
+    except ValueError:
+        #a parser the daemon can't be told about
+        return parse_args(self)
+    if args is None:
+        sys.exit('GUI cancelled ...')
+    return old_parse_args(self, args)
+
+def parse_args_in_subprocess(self):
+    from Tkinter import Tk
+    from tkarg import ArgparseGui
+    from tkarg.schemacache import SchemaCache
+    from tkarg.runner import SubprocessRunner
+    root = Tk()
+    gui = ArgparseGui(self, root, height=768, width=1024, schema_cache=SchemaCache(source=script), readahead_files=readahead, preview=preview, filter_bar=filter_bar, destroy_when_done=False)
+    runner = SubprocessRunner(gui, [sys.executable, script])
+    root.wait_window(gui.frame)
+    runner.terminate_all()
+    #the script itself is only run by the child processes
+    sys.exit(0)
+
+def parse_args_for_sweep(self):
+    from Tkinter import Tk
+    from tkarg import ArgparseGui
+    from tkarg.schemacache import SchemaCache
+    from tkarg.runner import SweepRunner
+    root = Tk()
+    gui = ArgparseGui(self, root, height=768, width=1024, schema_cache=SchemaCache(source=script), readahead_files=readahead, preview=preview, filter_bar=filter_bar, destroy_when_done=False,
+            sweep=True, max_tasks=max_runs)
+    runner = SweepRunner(gui, [sys.executable, script])
+    root.wait_window(gui.frame)
+    runner.terminate_all()
+    sys.exit(0)
+
+subprocess_mode = False
+sweep_mode = False
+max_runs = 4
+readahead = False
+preview = False
+filter_bar = False
+daemon_mode = False
+while sys.argv[1:2] and sys.argv[1] in ['--subprocess', '--sweep', '--max-runs', '--readahead', '--preview', '--filter', '--daemon']:
+    flag = sys.argv.pop(1)
+    if flag == '--subprocess':
+        subprocess_mode = True
+    elif flag == '--sweep':
+        sweep_mode = True
+    elif flag == '--readahead':
+        readahead = True
+    elif flag == '--preview':
+        preview = True
+    elif flag == '--filter':
+        filter_bar = True
+    elif flag == '--daemon':
+        daemon_mode = True
+    else:
+        max_runs = int(sys.argv.pop(1))
+script = sys.argv[1]
+if preview:
+    #the script's parser would give its prog as tkgui.py
+    preview = ['python', script]
+
 #do the monkey patch
-ArgumentParser.parse_args = parse_args
+if sweep_mode:
+    ArgumentParser.parse_args = parse_args_for_sweep
+elif subprocess_mode:
+    ArgumentParser.parse_args = parse_args_in_subprocess
+elif daemon_mode:
+    ArgumentParser.parse_args = parse_args_via_daemon
+else:
+    ArgumentParser.parse_args = parse_args
 
 #execute the original script
-execfile(sys.argv[1])
+execfile(script)
 
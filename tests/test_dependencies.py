@@ -0,0 +1,64 @@
+'''DependencyGraph: enabling options as their prerequisites are satisfied, and
+rejecting cycles.
+'''
+import unittest
+
+from tkarg.dependencies import DependencyGraph, DependencyCycleError
+
+
+class DependencyGraphTest(unittest.TestCase):
+    def setUp(self):
+        self.changes = []
+        self.graph = DependencyGraph(on_change=self.changes.append)
+
+    def test_dependent_enabled_once_prerequisite_satisfied(self):
+        self.graph.add_dependency('infile', 'outfile')
+        self.assertFalse(self.graph.is_enabled('outfile'))
+        self.assertEqual(self.graph.unmet_count('outfile'), 1)
+        self.graph.set_satisfied('infile')
+        self.assertTrue(self.graph.is_enabled('outfile'))
+        self.assertEqual(self.graph.unmet_count('outfile'), 0)
+
+    def test_chain_is_followed_transitively(self):
+        self.graph.add_dependency('a', 'b')
+        self.graph.add_dependency('b', 'c')
+        self.graph.set_satisfied('b')
+        #b is satisfied but not enabled, since a isn't
+        self.assertFalse(self.graph.is_enabled('c'))
+        del self.changes[:]
+        self.graph.set_satisfied('a')
+        self.assertTrue(self.graph.is_enabled('b'))
+        self.assertTrue(self.graph.is_enabled('c'))
+        #all of the changes from one call are reported together, in order
+        self.assertEqual(self.changes, [[('b', True), ('c', True)]])
+
+        self.graph.set_satisfied('a', False)
+        self.assertFalse(self.graph.is_enabled('b'))
+        self.assertFalse(self.graph.is_enabled('c'))
+
+    def test_cycle_rejected(self):
+        self.graph.add_dependency('a', 'b')
+        self.graph.add_dependency('b', 'c')
+        self.assertRaises(DependencyCycleError, self.graph.add_dependency, 'c', 'a')
+        self.assertRaises(DependencyCycleError, self.graph.add_dependency, 'a', 'a')
+        #the graph is unchanged by the rejected edges
+        self.assertEqual(self.graph.get_dependents('c'), [])
+        self.assertEqual(self.graph.get_dependents('a'), ['b'])
+
+    def test_cycle_error_is_a_value_error(self):
+        self.graph.add_dependency('a', 'b')
+        try:
+            self.graph.add_dependency('b', 'a')
+        except ValueError as err:
+            self.assertTrue('a -> b -> a' in str(err))
+        else:
+            self.fail('no error for a cycle')
+
+    def test_repeated_dependency_ignored(self):
+        self.graph.add_dependency('a', 'b')
+        self.graph.add_dependency('a', 'b')
+        self.assertEqual(self.graph.get_dependents('a'), ['b'])
+
+
+if __name__ == '__main__':
+    unittest.main()
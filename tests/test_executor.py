@@ -0,0 +1,51 @@
+'''TaskExecutor without a dispatcher, so that callbacks run on the worker threads.'''
+import sys
+import traceback
+import unittest
+
+from tkarg.executor import TaskExecutor
+
+
+def fail(message):
+    raise ValueError(message)
+
+
+class TaskExecutorTest(unittest.TestCase):
+    def test_finished_futures_dropped(self):
+        executor = TaskExecutor(max_workers=2)
+        futures = [executor.submit(pow, num, 2) for num in range(50)]
+        self.assertEqual([future.result(5) for future in futures], [num ** 2 for num in range(50)])
+        executor.shutdown()
+        self.assertEqual(len(executor.futures), 0)
+        self.assertEqual(executor.results(), [])
+
+    def test_results_kept_until_collected(self):
+        executor = TaskExecutor(max_workers=1, keep_results=True)
+        futures = [executor.submit(pow, num, 2) for num in range(5)]
+        futures.append(executor.submit(fail, 'no'))
+        for future in futures:
+            future.exception(5)
+        executor.shutdown()
+        self.assertEqual(executor.results(), [0, 1, 4, 9, 16])
+        self.assertEqual(executor.results(), [])
+
+    def test_traceback_of_worker_kept(self):
+        executor = TaskExecutor(max_workers=1)
+        future = executor.submit(fail, 'broken')
+        try:
+            future.result(5)
+        except ValueError:
+            frames = traceback.extract_tb(sys.exc_info()[2])
+            self.assertEqual(frames[-1][2], 'fail')
+        else:
+            self.fail('no exception')
+        executor.shutdown()
+
+    def test_submit_after_shutdown(self):
+        executor = TaskExecutor(max_workers=1)
+        executor.shutdown(wait=True)
+        self.assertRaises(RuntimeError, executor.submit, pow, 2, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
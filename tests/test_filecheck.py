@@ -0,0 +1,34 @@
+'''check_files, without a FileChecker.'''
+import os
+import shutil
+import tempfile
+import unittest
+
+from tkarg.filecheck import check_files
+
+
+class CheckFilesTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        with open(os.path.join(self.directory, 'in.txt'), 'w') as out:
+            out.write('12345')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_input_files(self):
+        summary = check_files([os.path.join(self.directory, 'in.txt'), os.path.join(self.directory, 'gone.txt')])
+        self.assertEqual(summary.total_size, 5)
+        self.assertEqual([status.problem for status in summary.statuses], [None, 'missing'])
+
+    def test_relative_to_base_directory(self):
+        '''Relative paths are found in base_directory, and reported as they were given'''
+        summary = check_files(['in.txt'], base_directory=self.directory)
+        self.assertEqual(summary.problems, [])
+        self.assertEqual(summary.statuses[0].path, 'in.txt')
+        summary = check_files(['sub/out.txt'], output=True, base_directory=self.directory)
+        self.assertEqual(summary.problems[0].problem, 'directory %s does not exist' % os.path.join(self.directory, 'sub'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+'''FileList: keeping paths in order without duplicates, and counting changes.'''
+import unittest
+
+from tkarg.filelist import FileList, describe_files
+
+
+class FileListTest(unittest.TestCase):
+    def test_duplicates_ignored(self):
+        files = FileList(['a', 'b', 'a'])
+        self.assertEqual(list(files), ['a', 'b'])
+        self.assertFalse(files.append('b'))
+        self.assertTrue(files.append('c'))
+        self.assertEqual(files.extend(['c', 'd', 'e', 'd']), 2)
+        self.assertEqual(list(files), ['a', 'b', 'c', 'd', 'e'])
+        #dialogs return an empty string when cancelled
+        self.assertFalse(files.append(''))
+
+    def test_remove_and_discard(self):
+        files = FileList(['a', 'b', 'c', 'd'])
+        files.remove('b')
+        self.assertEqual(list(files), ['a', 'c', 'd'])
+        self.assertRaises(KeyError, files.remove, 'b')
+        self.assertEqual(files.discard(['a', 'x', 'd']), 2)
+        self.assertEqual(list(files), ['c'])
+        self.assertTrue('c' in files)
+        self.assertFalse('a' in files)
+
+    def test_indexing_follows_changes(self):
+        files = FileList(['a', 'b', 'c'])
+        self.assertEqual(files[1], 'b')
+        self.assertEqual(files[-1], 'c')
+        files.remove('a')
+        self.assertEqual(files[0], 'b')
+        self.assertEqual(len(files), 2)
+        self.assertEqual(files, ['b', 'c'])
+
+    def test_version_counts_changes(self):
+        files = FileList()
+        versions = [files.version]
+        files.append('a')
+        versions.append(files.version)
+        #nothing changes, so neither does the version
+        files.append('a')
+        files.discard(['x'])
+        versions.append(files.version)
+        files.discard(['a'])
+        versions.append(files.version)
+        files.clear()
+        versions.append(files.version)
+        self.assertEqual(versions[1] > versions[0], True)
+        self.assertEqual(versions[2], versions[1])
+        self.assertTrue(versions[4] > versions[3] > versions[2])
+
+    def test_describe_files(self):
+        self.assertEqual(describe_files(['a', 'b']), 'a b')
+        self.assertEqual(describe_files(['a', 'b', 'c', 'd']), 'a ... d (4 files)')
+
+
+if __name__ == '__main__':
+    unittest.main()
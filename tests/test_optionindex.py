@@ -0,0 +1,47 @@
+'''OptionIndex: finding options by the start of words of their flags, help and group.'''
+import argparse
+import unittest
+
+from tkarg.optionmodel import ArgparseOptionForm
+from tkarg.optionindex import OptionIndex, words
+
+
+class OptionIndexTest(unittest.TestCase):
+    def setUp(self):
+        parser = argparse.ArgumentParser()
+        parser.add_argument('--out-file', help='Where to write results')
+        parser.add_argument('--threads', type=int, help='number of worker threads')
+        parser.add_argument('--secret', help='HIDE me')
+        group = parser.add_argument_group('Tree search')
+        group.add_argument('--max-trees', type=int, help='stop after this many')
+        self.form = ArgparseOptionForm(parser)
+        self.index = OptionIndex(self.form)
+
+    def keys(self, query):
+        matches = self.index.search(query)
+        if matches is None:
+            return None
+        return sorted(model.output_arg for model in matches)
+
+    def test_words(self):
+        self.assertEqual(words('--out-file'), set(['out', 'file', 'out-file']))
+
+    def test_prefixes(self):
+        self.assertEqual(self.keys('out'), ['--out-file'])
+        self.assertEqual(self.keys('thr'), ['--threads'])
+        self.assertEqual(self.keys('WRI'), ['--out-file'])
+
+    def test_all_words_must_match(self):
+        self.assertEqual(self.keys('tree stop'), ['--max-trees'])
+        self.assertEqual(self.keys('tree write'), [])
+
+    def test_group_title(self):
+        self.assertEqual(self.keys('search'), ['--max-trees'])
+
+    def test_empty_query_and_hidden(self):
+        self.assertEqual(self.keys('  '), None)
+        self.assertEqual(self.keys('secret'), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
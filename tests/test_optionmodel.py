@@ -0,0 +1,188 @@
+'''Round trips of ArgparseOptionForm.make_commandline_list through parse_args, i.e. that
+the command line the gui would produce is parsed back to the values entered.
+
+Run from the top of the repository with
+
+    python -m unittest discover tests
+'''
+import argparse
+import unittest
+
+from tkarg.argparseutils import ArgparseActionAppendToDefault, argparse_bounded_float
+from tkarg.optionmodel import ArgparseOptionForm, make_commandline_list, BOOL, STRING, CHOICE, FILE
+
+
+def make_parser():
+    parser = argparse.ArgumentParser(description='round trip')
+    parser.add_argument('infile', help='input file')
+    parser.add_argument('--flag', action='store_true')
+    parser.add_argument('--no-thing', dest='thing', action='store_false')
+    parser.add_argument('--mode', choices=['fast', 'slow'], default='fast')
+    parser.add_argument('--count', type=int, default=3)
+    parser.add_argument('--ratio', type=argparse_bounded_float(0.0, 1.0), default=0.5)
+    parser.add_argument('--names', nargs='*', default=[])
+    parser.add_argument('--pair', nargs=2)
+    parser.add_argument('--kwarg', action=ArgparseActionAppendToDefault, default=['a=1'])
+    group = parser.add_argument_group('Output')
+    group.add_argument('--outfile', help='where to write')
+    return parser
+
+
+class RoundTripTest(unittest.TestCase):
+    def round_trip(self, parser, values):
+        return parser.parse_args(make_commandline_list(parser, values))
+
+    def test_defaults(self):
+        parser = make_parser()
+        args = self.round_trip(parser, {'positional0':['in.txt']})
+        self.assertEqual(args, parser.parse_args(['in.txt']))
+
+    def test_kinds_of_option(self):
+        parser = make_parser()
+        form = ArgparseOptionForm(parser)
+        self.assertEqual(form.get_option('--flag').kind, BOOL)
+        self.assertEqual(form.get_option('--mode').kind, CHOICE)
+        self.assertEqual(form.get_option('--count').kind, STRING)
+        self.assertEqual(form.get_option('infile').kind, FILE)
+        self.assertEqual(form.get_option('--outfile').kind, FILE)
+
+    def test_values(self):
+        parser = make_parser()
+        args = self.round_trip(parser, {
+            'positional0':['in.txt'],
+            '--flag':True,
+            '--no-thing':True,
+            '--mode':'slow',
+            '--count':'7',
+            '--ratio':'0.25',
+            '--names':'x "y z"',
+            '--pair':'1 2',
+            '--outfile':['out.txt'],
+            })
+        self.assertEqual(args.infile, 'in.txt')
+        self.assertTrue(args.flag)
+        self.assertFalse(args.thing)
+        self.assertEqual(args.mode, 'slow')
+        self.assertEqual(args.count, 7)
+        self.assertEqual(args.ratio, 0.25)
+        self.assertEqual(args.names, ['x', 'y z'])
+        self.assertEqual(args.pair, ['1', '2'])
+        self.assertEqual(args.outfile, 'out.txt')
+
+    def test_variable_nargs_before_positional(self):
+        '''An optional taking any number of values mustn't swallow the positionals'''
+        parser = make_parser()
+        args = self.round_trip(parser, {'positional0':['in.txt'], '--names':'a b'})
+        self.assertEqual(args.names, ['a', 'b'])
+        self.assertEqual(args.infile, 'in.txt')
+
+    def test_append_to_default(self):
+        '''Only the values beyond the defaults are passed, since argparse appends them'''
+        parser = make_parser()
+        form = ArgparseOptionForm(parser)
+        self.assertEqual(form.get_option('--kwarg').value, 'a=1')
+        form.set_value('positional0', ['in.txt'])
+        form.set_value('--kwarg', 'a=1 b=2')
+        args = parser.parse_args(form.make_commandline_list())
+        self.assertEqual(args.kwarg, ['a=1', 'b=2'])
+
+    def test_cached_commandline_follows_changes(self):
+        parser = make_parser()
+        form = ArgparseOptionForm(parser)
+        form.set_value('positional0', ['in.txt'])
+        first = form.make_commandline_list()
+        self.assertEqual(first, form.make_commandline_list())
+        form.set_value('--count', '9')
+        self.assertEqual(parser.parse_args(form.make_commandline_list()).count, 9)
+        #a FileList changed in place, without telling the form
+        form.get_option('infile').value.clear()
+        form.get_option('infile').value.append('other.txt')
+        self.assertEqual(parser.parse_args(form.make_commandline_list()).infile, 'other.txt')
+
+    def test_hidden_options_are_omitted(self):
+        parser = argparse.ArgumentParser()
+        parser.add_argument('--shown', default='x')
+        parser.add_argument('--secret', default='y', help='HIDE this')
+        form = ArgparseOptionForm(parser)
+        self.assertFalse(form.get_option('--shown').omit)
+        self.assertTrue(form.get_option('--secret').omit)
+
+    def test_changed_values(self):
+        parser = make_parser()
+        form = ArgparseOptionForm(parser)
+        form.set_value('--mode', 'slow')
+        form.set_value('positional0', ['in.txt'])
+        changed = form.changed_values()
+        self.assertEqual(changed, {'--mode':'slow', 'positional0':['in.txt']})
+        other = ArgparseOptionForm(parser)
+        for key, value in changed.items():
+            other.set_value(key, value)
+        self.assertEqual(other.make_commandline_list(), form.make_commandline_list())
+
+
+def make_subcommand_parser():
+    parser = argparse.ArgumentParser(description='subcommands')
+    parser.add_argument('-m', nargs='*', default=[])
+    parser.add_argument('-k', type=int, default=0)
+    subparsers = parser.add_subparsers(dest='command')
+    run = subparsers.add_parser('run')
+    run.add_argument('--n', type=int, default=1)
+    run.add_argument('--log', nargs='+')
+    run.add_argument('targetfile')
+    subparsers.add_parser('stop')
+    return parser
+
+
+class SubcommandRoundTripTest(unittest.TestCase):
+    def make_form(self, values, subcommand_values=None):
+        parser = make_subcommand_parser()
+        form = ArgparseOptionForm(parser)
+        for key, value in values.items():
+            form.set_value(key, value)
+        subform = form.get_option('command').get_form(form.get_option('command').value)
+        for key, value in (subcommand_values or {}).items():
+            subform.set_value(key, value)
+        return parser, form
+
+    def test_single_variable_value_before_subcommand(self):
+        parser, form = self.make_form({'-m':'a', 'command':'run'}, {'--n':'3', 'positional0':['T']})
+        args = parser.parse_args(form.make_commandline_list())
+        self.assertEqual((args.m, args.command, args.n, args.targetfile), (['a'], 'run', 3, 'T'))
+
+    def test_several_values_ended_by_fixed_option(self):
+        parser, form = self.make_form({'-m':'a b', '-k':'2', 'command':'run'}, {'--n':'3', 'positional0':['T']})
+        args = parser.parse_args(form.make_commandline_list())
+        self.assertEqual((args.m, args.k, args.command, args.n, args.targetfile), (['a', 'b'], 2, 'run', 3, 'T'))
+
+    def test_subcommand_without_options(self):
+        parser, form = self.make_form({'-m':'a', 'command':'stop'})
+        args = parser.parse_args(form.make_commandline_list())
+        self.assertEqual((args.m, args.command), (['a'], 'stop'))
+
+    def test_variable_nargs_within_subcommand(self):
+        parser, form = self.make_form({'command':'run'}, {'--log':'x y', 'positional0':['T']})
+        args = parser.parse_args(form.make_commandline_list())
+        self.assertEqual((args.log, args.targetfile), (['x', 'y'], 'T'))
+
+    def test_several_values_refused(self):
+        '''With nothing to end them, the values would run on into the subcommand'''
+        parser, form = self.make_form({'-m':'a b', 'command':'run'}, {'--n':'3', 'positional0':['T']})
+        self.assertRaises(ValueError, form.make_commandline_list)
+
+    def test_files_changed_in_subcommand(self):
+        parser, form = self.make_form({'command':'run'}, {'positional0':['T']})
+        self.assertEqual(parser.parse_args(form.make_commandline_list()).targetfile, 'T')
+        #a FileList of the subcommand changed in place, without telling either form
+        target = form.get_option('command').get_form('run').get_option('targetfile')
+        target.value.clear()
+        target.value.append('U')
+        self.assertEqual(parser.parse_args(form.make_commandline_list()).targetfile, 'U')
+
+    def test_cwd_passed_to_subcommand(self):
+        form = ArgparseOptionForm(make_subcommand_parser(), cwd='/data')
+        target = form.get_option('command').get_form('run').get_option('targetfile')
+        self.assertEqual(target.base_directory(), '/data')
+
+
+if __name__ == '__main__':
+    unittest.main()
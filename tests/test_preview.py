@@ -0,0 +1,31 @@
+'''The parts of the command line preview that don't need a Text widget.'''
+import unittest
+
+from tkarg.preview import changed_span
+
+
+class ChangedSpanTest(unittest.TestCase):
+    def check(self, old, new):
+        start, old_stop, new_stop = changed_span(old, new)
+        self.assertEqual(old[:start] + new[start:new_stop] + old[old_stop:], new)
+        return start, old_stop, new_stop
+
+    def test_same(self):
+        self.assertEqual(self.check(['a', 'b'], ['a', 'b']), (2, 2, 2))
+
+    def test_replace_middle(self):
+        self.assertEqual(self.check(['a', 'b', 'c'], ['a', 'x', 'c']), (1, 2, 2))
+
+    def test_insert_and_remove(self):
+        self.assertEqual(self.check(['a', 'c'], ['a', 'b', 'c']), (1, 1, 2))
+        self.assertEqual(self.check(['a', 'b', 'c'], ['a', 'c']), (1, 2, 1))
+        self.assertEqual(self.check([], ['a']), (0, 0, 1))
+        self.assertEqual(self.check(['a'], []), (0, 1, 0))
+
+    def test_repeated_tokens(self):
+        self.check(['x', 'x', 'x'], ['x', 'x'])
+        self.check(['-v', '-v'], ['-v', 'a', '-v'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+'''SchemaCache: reusing the schema of an unchanged parser, and never that of a changed one.'''
+import os
+import json
+import shutil
+import argparse
+import tempfile
+import unittest
+
+from tkarg.optionmodel import ArgparseOptionForm
+from tkarg.schemacache import SchemaCache, parser_fingerprint, source_key, build_schema
+
+
+def make_parser(help_text='the rate', choices=['a', 'b'], rate_type=float):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rate', type=rate_type, default=1.0, help=help_text)
+    parser.add_argument('--model', choices=choices, default='a')
+    group = parser.add_argument_group('Files')
+    group.add_argument('--infile', help='input')
+    return parser
+
+
+class SchemaCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = SchemaCache(self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_fingerprint_stable(self):
+        self.assertEqual(parser_fingerprint(make_parser()), parser_fingerprint(make_parser()))
+        self.assertNotEqual(parser_fingerprint(make_parser()), parser_fingerprint(make_parser('other help')))
+        self.assertNotEqual(parser_fingerprint(make_parser()), parser_fingerprint(make_parser(), label_width=40))
+
+    def test_hit_after_store(self):
+        parser = make_parser()
+        schema = self.cache.get_schema(parser)
+        fingerprint = parser_fingerprint(parser)
+        self.assertTrue(os.path.exists(self.cache.path(fingerprint)))
+        self.assertEqual(self.cache.load(fingerprint), json.loads(json.dumps(schema)))
+        self.assertEqual(self.cache.get_schema(make_parser()), json.loads(json.dumps(schema)))
+
+    def test_changed_parser_invalidates(self):
+        schema = self.cache.get_schema(make_parser())
+        changed = make_parser('a new help string')
+        other = self.cache.get_schema(changed)
+        self.assertNotEqual(schema['fingerprint'], other['fingerprint'])
+        form = ArgparseOptionForm(changed, schema=other)
+        self.assertEqual(form.get_option('--rate').label_text(60), 'a new help string')
+
+    def test_corrupt_entry_removed(self):
+        parser = make_parser()
+        fingerprint = parser_fingerprint(parser)
+        with open(self.cache.path(fingerprint), 'w') as out:
+            out.write('{not json')
+        self.assertEqual(self.cache.load(fingerprint), None)
+        self.assertFalse(os.path.exists(self.cache.path(fingerprint)))
+        #and is rebuilt
+        self.assertEqual(self.cache.get_schema(parser)['fingerprint'], fingerprint)
+
+    def test_mismatched_entry_rebuilt(self):
+        parser = make_parser()
+        fingerprint = parser_fingerprint(parser)
+        schema = build_schema(parser, fingerprint=fingerprint)
+        #an entry that refers to actions the parser doesn't have
+        schema['options'][0]['action'] = 99
+        self.cache.store(fingerprint, schema)
+        rebuilt = self.cache.get_schema(parser)
+        self.assertNotEqual(rebuilt['options'][0]['action'], 99)
+
+    def test_memory_entries(self):
+        cache = SchemaCache(self.directory, memory_entries=1)
+        parser = make_parser()
+        schema = cache.get_schema(parser)
+        self.assertTrue(cache.get_schema(parser) is schema)
+        cache.get_schema(make_parser('other'))
+        self.assertEqual(len(cache.memory), 1)
+        self.assertFalse(cache.get_schema(parser) is schema)
+
+    def test_eviction(self):
+        cache = SchemaCache(self.directory, max_entries=2)
+        for num in range(4):
+            cache.get_schema(make_parser('help %d' % num))
+        self.assertEqual(len(cache.entries()), 2)
+
+    def test_fingerprint_remembered(self):
+        parser = make_parser()
+        fingerprint = parser_fingerprint(parser)
+        self.assertEqual(parser._tkarg_fingerprints[(18, 60)], ((len(parser._actions), len(parser._action_groups)), fingerprint))
+        #adding an action means working it out again
+        parser.add_argument('--another')
+        self.assertNotEqual(parser_fingerprint(parser), fingerprint)
+
+    def test_source_alias(self):
+        source = os.path.join(self.directory, 'script.py')
+        with open(source, 'w') as script:
+            script.write('#a script\n')
+        cache = SchemaCache(self.directory, source=source)
+        schema = cache.get_schema(make_parser())
+        alias = cache.load(source_key(source, make_parser()))
+        self.assertEqual(alias['alias'], schema['fingerprint'])
+
+        #found through the alias, without the fingerprint
+        parser = make_parser()
+        self.assertEqual(cache.get_schema(parser)['fingerprint'], schema['fingerprint'])
+        self.assertFalse(hasattr(parser, '_tkarg_fingerprints'))
+
+        #a changed help string with the script unchanged, as when the parser is made in 
+        #another module, isn't missed
+        changed = make_parser('changed elsewhere')
+        other = cache.get_schema(changed)
+        self.assertNotEqual(other['fingerprint'], schema['fingerprint'])
+        self.assertEqual(cache.load(source_key(source, changed))['alias'], other['fingerprint'])
+
+        #nor are changes to choices or type, which change the kind of option or its checks
+        for changed in [make_parser(choices=None), make_parser(choices=['a', 'c']), make_parser(rate_type=str)]:
+            other = cache.get_schema(changed)
+            self.assertEqual(other['fingerprint'], parser_fingerprint(changed))
+            form = ArgparseOptionForm(changed, schema=other)
+            self.assertEqual(changed.parse_args(form.make_commandline_list()).model, 'a')
+
+    def test_form_from_schema_matches(self):
+        parser = make_parser()
+        schema = self.cache.get_schema(parser)
+        built = ArgparseOptionForm(parser)
+        cached = ArgparseOptionForm(parser, schema=json.loads(json.dumps(schema)))
+        self.assertEqual(sorted(built.option_list), sorted(cached.option_list))
+        for key, model in built.option_list.items():
+            self.assertEqual(model.kind, cached.option_list[key].kind)
+        self.assertEqual(built.make_commandline_list(), cached.make_commandline_list())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+'''Expanding sweep text into values, and the command lines of a sweep.'''
+import os
+import shutil
+import argparse
+import tempfile
+import unittest
+
+from tkarg.sweep import expand_spec, sweep_commandlines, MAX_RANGE_VALUES
+
+
+class ExpandSpecTest(unittest.TestCase):
+    def test_single_values(self):
+        self.assertEqual(expand_spec('plain'), None)
+        self.assertEqual(expand_spec('{no separator}'), None)
+        self.assertEqual(expand_spec(None), None)
+
+    def test_lists(self):
+        self.assertEqual(expand_spec('{a,b, c}'), ['a', 'b', 'c'])
+
+    def test_ranges(self):
+        self.assertEqual(expand_spec('{1..4}'), ['1', '2', '3', '4'])
+        self.assertEqual(expand_spec('{0..10..5}'), ['0', '5', '10'])
+        self.assertEqual(expand_spec('{0..1..0.25}'), ['0', '0.25', '0.5', '0.75', '1'])
+        #values are computed from the start, so there is no drift from adding steps
+        self.assertEqual(expand_spec('{0..1..0.1}')[-1], '1')
+        self.assertEqual(expand_spec('{3..1..-1}'), ['3', '2', '1'])
+
+    def test_bad_ranges(self):
+        self.assertRaises(ValueError, expand_spec, '{0..1..0}')
+        self.assertRaises(ValueError, expand_spec, '{1..0..1}')
+        self.assertRaises(ValueError, expand_spec, '{0..%d}' % MAX_RANGE_VALUES)
+
+    def test_globs(self):
+        directory = tempfile.mkdtemp()
+        try:
+            for name in ['b.fasta', 'a.fasta', 'c.txt']:
+                open(os.path.join(directory, name), 'w').close()
+            pattern = os.path.join(directory, '*.fasta')
+            self.assertEqual(expand_spec('{%s}' % pattern),
+                    [os.path.join(directory, 'a.fasta'), os.path.join(directory, 'b.fasta')])
+            self.assertRaises(ValueError, expand_spec, '{%s}' % os.path.join(directory, '*.none'))
+        finally:
+            shutil.rmtree(directory)
+
+    def test_globs_in_list(self):
+        '''Each pattern in a list is expanded, with the values and patterns kept in order'''
+        directory = tempfile.mkdtemp()
+        try:
+            for name in ['b.fasta', 'a.fasta', 'c.txt']:
+                open(os.path.join(directory, name), 'w').close()
+            fasta, txt = os.path.join(directory, '*.fasta'), os.path.join(directory, '*.txt')
+            self.assertEqual(expand_spec('{%s, other, %s}' % (txt, fasta)),
+                    [os.path.join(directory, 'c.txt'), 'other', os.path.join(directory, 'a.fasta'), os.path.join(directory, 'b.fasta')])
+            self.assertRaises(ValueError, expand_spec, '{%s,%s}' % (fasta, os.path.join(directory, '*.none')))
+        finally:
+            shutil.rmtree(directory)
+
+
+class SweepTest(unittest.TestCase):
+    def make_parser(self):
+        parser = argparse.ArgumentParser()
+        parser.add_argument('--rate', type=float, default=1.0)
+        parser.add_argument('--model', choices=['a', 'b', 'c'], default='a')
+        parser.add_argument('--verbose', action='store_true')
+        return parser
+
+    def test_product(self):
+        parser = self.make_parser()
+        commandlines = sweep_commandlines(parser, {'--rate':'{0..1..0.5}', '--model':'{a,c}'})
+        self.assertEqual(len(commandlines), 6)
+        parsed = [parser.parse_args(commandline) for commandline in commandlines]
+        #the last option varies fastest
+        self.assertEqual([(args.rate, args.model) for args in parsed],
+                [(0.0, 'a'), (0.0, 'c'), (0.5, 'a'), (0.5, 'c'), (1.0, 'a'), (1.0, 'c')])
+
+    def test_flags_swept_by_list(self):
+        parser = self.make_parser()
+        commandlines = sweep_commandlines(parser, {'--verbose':[False, True], '--rate':'2'})
+        self.assertEqual([parser.parse_args(commandline).verbose for commandline in commandlines], [False, True])
+        self.assertEqual(set(parser.parse_args(commandline).rate for commandline in commandlines), set([2.0]))
+
+    def test_no_sweep(self):
+        parser = self.make_parser()
+        self.assertEqual(sweep_commandlines(parser, {'--rate':'3'}), [['--rate', '3', '--model', 'a']])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+'''PhaseTimer and make_timer.'''
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+from tkarg.timing import PhaseTimer, NULL_TIMER, make_timer
+
+
+class PhaseTimerTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_nested_phases(self):
+        timer = PhaseTimer()
+        with timer.phase('outer'):
+            with timer.phase('inner'):
+                pass
+        record = json.loads(timer.to_json())
+        self.assertEqual(record['phases'][0]['name'], 'outer')
+        self.assertEqual(record['phases'][0]['phases'][0]['name'], 'inner')
+
+    def test_report_once(self):
+        '''Reporting again, e.g. as a second window closes, doesn't write the file again'''
+        path = os.path.join(self.directory, 'timing.json')
+        timer = PhaseTimer(path)
+        with timer.phase('build'):
+            pass
+        timer.report()
+        os.remove(path)
+        timer.report()
+        self.assertFalse(os.path.exists(path))
+
+    def test_make_timer(self):
+        self.assertIs(make_timer(False), NULL_TIMER)
+        self.assertEqual(make_timer('1').output, '-')
+        self.assertIsNone(make_timer(True).output)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+'''check_value: the messages argparse would give for the text of an option.'''
+import argparse
+import unittest
+
+from tkarg.argparseutils import argparse_bounded_float
+from tkarg.validation import check_value
+
+
+class CheckValueTest(unittest.TestCase):
+    def setUp(self):
+        parser = argparse.ArgumentParser()
+        self.count = parser.add_argument('--count', type=int)
+        self.ratio = parser.add_argument('--ratio', type=argparse_bounded_float(0.0, 1.0))
+        self.pair = parser.add_argument('--pair', nargs=2, type=int)
+        self.mode = parser.add_argument('--mode', type=int, choices=[1, 2])
+        self.name = parser.add_argument('--name', required=True)
+
+    def test_types(self):
+        self.assertEqual(check_value(self.count, '3'), None)
+        self.assertTrue(check_value(self.count, 'x'))
+        self.assertEqual(check_value(self.ratio, '0.5'), None)
+        self.assertTrue(check_value(self.ratio, '1.5'))
+
+    def test_counts_and_choices(self):
+        self.assertEqual(check_value(self.pair, '1 2'), None)
+        self.assertTrue(check_value(self.pair, '1'))
+        self.assertTrue(check_value(self.mode, '3'))
+        self.assertEqual(check_value(self.mode, '2'), None)
+
+    def test_required_only_when_final(self):
+        self.assertEqual(check_value(self.name, ''), None)
+        self.assertTrue(check_value(self.name, '', final=True))
+
+    def test_sweeps(self):
+        self.assertEqual(check_value(self.count, '{1..3}', sweep=True), None)
+        self.assertTrue(check_value(self.count, '{1,x}', sweep=True))
+
+
+if __name__ == '__main__':
+    unittest.main()
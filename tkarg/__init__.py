@@ -6,11 +6,21 @@
 
 import sys
 import os
+import types
 
 ###############################################################################
 ## Populate the 'tkarg' namespace
-#from tkarg import tkinterutils
-from tkarg.tkinterutils import ArgparseGui
+#Only the parts of tkarg that don't need Tkinter are imported here up front.  The 
+#classes that would pull in Tkinter (or more than a script using argparse needs) are
+#imported from their modules the first time they are looked up, see _LazyPackage, so
+#tkarg.ArgparseGui is still the class itself, for subclassing and isinstance.
+from tkarg.argparseutils import ArgparseActionAppendToDefault, argparse_bounded_float
+
+_LAZY_ATTRIBUTES = {
+        'ArgparseGui':'tkarg.tkinterutils',
+        'ResultsWindow':'tkarg.tkinterutils',
+        'ArgparseOptionForm':'tkarg.optionmodel'
+        }
 
 ###############################################################################
 ## PACKAGE METADATA
@@ -52,7 +62,31 @@ PACKAGE_VERSION = __version__
 def description():
     return "%s %s" % (__project__, __version__)
 
+class _LazyPackage(types.ModuleType):
+    '''Stands in for this module in sys.modules, since python 2 modules can't have a
+    __getattr__ of their own.  The names in _LAZY_ATTRIBUTES are imported when first
+    looked up, and everything else is copied from this module.
+    '''
+    def __getattr__(self, name):
+        try:
+            module_name = _LAZY_ATTRIBUTES[name]
+        except KeyError:
+            raise AttributeError("'module' object has no attribute '%s'" % name)
+        value = getattr(__import__(module_name, fromlist=[name]), name)
+        setattr(self, name, value)
+        return value
+
+    def __dir__(self):
+        return sorted(set(self.__dict__) | set(_LAZY_ATTRIBUTES))
+
 if __name__ == "__main__":
     sys.stdout.write("%s\n" % description())
+else:
+    _package = _LazyPackage(__name__, __doc__)
+    _package.__dict__.update(globals())
+    #python 2 clears the globals of a module when it is freed, and the functions above
+    #still use this module's, so it is kept alive by the package that replaces it
+    _package._module = sys.modules[__name__]
+    sys.modules[__name__] = _package
 
 
@@ -0,0 +1,67 @@
+'''Helpers for use with argparse itself, i.e. custom actions and type= functions.
+Nothing in here depends on Tkinter, so client scripts can use these without a display.
+'''
+import argparse
+
+
+class ArgparseActionAppendToDefault(argparse.Action):
+    '''Normally defaults can be set on argparse options, but will be overridden if the 
+    argument appears on the command line.  This will allow arguments passed on the
+    command line to simply be appended to the default list.  This would mainly be 
+    used for kwargs specified on the command line and a PlottingArgumentParser
+    instantiated with some kwargs set as defaults. Because the values that would
+    come from the commandline appear later, they should trump earlier ones in the
+    prepare_plot_kwargs function.
+    '''
+    def __call__(self, parser, namespace, values, option_string=None):
+        #print '%r %r %r' % (self.dest, self.default, values)
+        if not hasattr(self, 'default'):
+            raise ValueError('only makes sense to call AppendToDefaultArgparseAction \
+                    when default value to argument is defined')
+        if not isinstance(self.default, list):
+            raise ValueError('only makes sense to call AppendToDefaultArgparseAction \
+                    when defaults are in a list')
+        if isinstance(values, str):
+            values = values.split()
+
+        setattr(namespace, self.dest, self.default + values)
+
+
+def argparse_bounded_float(min_val=0.0, max_val=1.0):
+    '''Closure-based function for use in type and bound checking, specified as a type= argument in argparse.add_argument().
+    It defaults to checking for a proportion, but any bounds can be passed.
+    On failure raises an ArgumentTypeError, defined by argparse.
+    >>> f = argparse_bounded_float()
+    >>> f(1.0)
+    1.0
+    >>> f = argparse_bounded_float()
+    >>> f('1.1')
+    Traceback (most recent call last):
+    ...
+    ArgumentTypeError: value 1.100000 must be between 0.00 and 1.00
+    >>> f = argparse_bounded_float(max_val=2.0)
+    >>> f('1.9')
+    1.9
+    '''
+    def func(string):
+        value = float(string)
+        if value < min_val or value > max_val:
+            mess = 'value %f must be between %.2f and %.2f' % (value, min_val, max_val)
+            raise argparse.ArgumentTypeError(mess)
+        return value
+    
+    return func
+
+
+def proportion_type():
+    '''Limited version of argparse_bounded_float for compatibility with legacy code.'''
+    return argparse_bounded_float()
+
+
+def expensive_type(func):
+    '''Decorator marking a type= function as slow, e.g. because it looks at the filesystem
+    or a database.  The gui runs such types off the Tk thread while validating input as 
+    it is typed, rather than running them on every edit (see tkarg.validation).
+    '''
+    func.expensive = True
+    return func
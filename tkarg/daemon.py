@@ -0,0 +1,504 @@
+'''A long running process that opens ArgparseGui forms on behalf of tkgui.py, so that
+the form appears without waiting for Python, Tk and the parser's schema to start up.
+
+The daemon keeps a hidden Tk root, and the schemas of recently used parsers in memory,
+and listens on a Unix socket.  A client describes its parser with describe_parser,
+which records the groups and actions as JSON, and sends it over the socket with
+request_argv.  The daemon rebuilds a stand-in parser from the description, opens a
+form for it in a new window, and replies with the result of make_commandline_list once
+the form is closed, or that it was cancelled.  The client then passes the arguments to
+the real parser, which does the actual parsing, with its own types and actions.
+
+Types that are functions can't be sent, so the stand-in parser accepts any text for
+them, and they are only applied by the real parser once the form is closed.  Parsers
+with actions or types that can't be described (those that ArgparseGui couldn't show
+either) make describe_parser raise ValueError, and the client should show the form
+itself.  Several forms may be open at once.  Each is closed if its client goes away.
+
+Start the daemon with
+
+    python -m tkarg.daemon [--socket PATH] [--idle-timeout SECONDS]
+
+or from a client with start_daemon.  The socket is TKARG_DAEMON_SOCKET if set, and
+otherwise tkarg-<uid>.sock in XDG_RUNTIME_DIR or the temporary directory.  Tkinter is
+only imported by the daemon itself, not by clients.
+'''
+import os
+import sys
+import json
+import socket
+import argparse
+import hashlib
+import threading
+from collections import OrderedDict
+
+from tkarg.argparseutils import ArgparseActionAppendToDefault
+
+PROTOCOL_VERSION = 1
+ENVIRONMENT_VARIABLE = 'TKARG_DAEMON_SOCKET'
+
+#ArgparseGui arguments that a client may pass along with its parser
+GUI_OPTIONS = ['height', 'width', 'widgets_per_column', 'label_width', 'virtual', 'validate',
+        'check_files', 'readahead_files', 'filter_bar', 'preview']
+
+#(action class, name for add_argument), subclasses before the classes they derive from
+ACTION_KINDS = [
+    (ArgparseActionAppendToDefault, 'append_to_default'),
+    (argparse._StoreTrueAction, 'store_true'),
+    (argparse._StoreFalseAction, 'store_false'),
+    (argparse._StoreConstAction, 'store_const'),
+    (argparse._StoreAction, 'store'),
+    (argparse._AppendAction, 'append'),
+    (argparse._HelpAction, 'help'),
+    (argparse._VersionAction, 'version'),
+    (argparse._SubParsersAction, 'parsers'),
+    ]
+
+
+class DaemonUnavailable(Exception):
+    '''No daemon is listening, or it couldn't open the form'''
+    pass
+
+
+def default_socket_path():
+    if os.environ.get(ENVIRONMENT_VARIABLE):
+        return os.environ[ENVIRONMENT_VARIABLE]
+    import tempfile
+    directory = os.environ.get('XDG_RUNTIME_DIR') or tempfile.gettempdir()
+    return os.path.join(directory, 'tkarg-%d.sock' % os.getuid())
+
+
+def json_value(value):
+    '''value if it survives JSON unchanged, otherwise its str, as the gui would show it'''
+    if value is None or isinstance(value, (bool, int, long, float, basestring)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [json_value(item) for item in value]
+    return str(value)
+
+
+def encode_strings(value):
+    '''value as loaded from JSON, with unicode made into utf-8 str, as argparse and the gui
+    expect of Python 2 scripts
+    '''
+    if isinstance(value, unicode):
+        return value.encode('utf-8')
+    if isinstance(value, list):
+        return [encode_strings(item) for item in value]
+    if isinstance(value, dict):
+        return dict((encode_strings(key), encode_strings(item)) for key, item in value.items())
+    return value
+
+
+def describe_type(type_func):
+    if type_func is None or type_func in (str, int, float):
+        return getattr(type_func, '__name__', None)
+    if isinstance(type_func, argparse.FileType):
+        return {'filetype':type_func._mode}
+    if callable(type_func) and not isinstance(type_func, type):
+        return 'function'
+    raise ValueError('type %r can\'t be described' % (type_func,))
+
+
+def describe_action(action):
+    for action_class, kind in ACTION_KINDS:
+        if isinstance(action, action_class):
+            break
+    else:
+        raise ValueError('unknown action: %s' % action)
+
+    description = {
+        'kind':kind,
+        'option_strings':list(action.option_strings),
+        'dest':action.dest,
+        'help':action.help,
+        'required':action.required,
+        'metavar':json_value(action.metavar),
+        }
+    if kind == 'parsers':
+        description['parsers'] = [[name, describe_parser(parser)] for name, parser in action.choices.items()]
+        return description
+    if kind == 'version':
+        description['version'] = action.version
+        return description
+    if kind == 'help':
+        return description
+
+    description['default'] = json_value(action.default)
+    if kind in ('store', 'append', 'append_to_default'):
+        description['nargs'] = action.nargs
+        description['type'] = describe_type(action.type)
+        if action.choices:
+            #the gui shows and returns choices as text
+            description['choices'] = [str(choice) for choice in action.choices]
+            if action.default is not None:
+                description['default'] = str(action.default)
+    return description
+
+
+def describe_parser(parser):
+    '''A JSON-able description of parser, from which rebuild_parser makes a parser that
+    produces the same gui.  Raises ValueError for anything that can't be described.
+    '''
+    action_index = dict((action, num) for num, action in enumerate(parser._actions))
+    groups = []
+    for group in parser._action_groups:
+        groups.append({
+            'title':group.title,
+            'description':group.description,
+            'gui_ignore':hasattr(group, 'GUI_IGNORE'),
+            'gui_config':json_value(getattr(group, 'gui_config', None)),
+            'actions':[action_index[action] for action in group._group_actions if action in action_index]
+            })
+    return {
+        'prog':parser.prog,
+        'description':parser.description,
+        'actions':[describe_action(action) for action in parser._actions],
+        'groups':groups
+        }
+
+
+def passthrough(text):
+    '''Stands in for type functions, which can't be sent to the daemon'''
+    return text
+
+
+def rebuild_type(described):
+    if isinstance(described, dict):
+        return argparse.FileType(described['filetype'])
+    return {'str':str, 'int':int, 'float':float, 'function':passthrough}.get(described)
+
+
+def add_action(container, description):
+    kind = description['kind']
+    option_strings = description['option_strings']
+    if kind == 'parsers':
+        action = argparse._SubParsersAction(option_strings=[], prog=description.get('prog', ''),
+                parser_class=argparse.ArgumentParser, dest=description['dest'],
+                help=description['help'], metavar=description['metavar'])
+        for name, parser_description in description['parsers']:
+            action._name_parser_map[name] = rebuild_parser(parser_description)
+        return container._add_action(action)
+
+    kwargs = {'help':description['help']}
+    if kind == 'append_to_default':
+        kwargs['action'] = ArgparseActionAppendToDefault
+    else:
+        kwargs['action'] = kind
+    if option_strings:
+        kwargs['dest'] = description['dest']
+        if kind not in ('help', 'version'):
+            kwargs['required'] = description['required']
+        names = option_strings
+    else:
+        names = [description['dest']]
+    if description['metavar'] is not None and kind not in ('store_true', 'store_false', 'help', 'version'):
+        metavar = description['metavar']
+        kwargs['metavar'] = tuple(metavar) if isinstance(metavar, list) else metavar
+
+    if kind == 'version':
+        kwargs['version'] = description['version']
+    elif kind == 'store_const':
+        #only whether the flag is given matters to the gui
+        kwargs['const'] = True
+    if kind in ('store_true', 'store_false', 'store_const', 'store', 'append', 'append_to_default'):
+        kwargs['default'] = description['default']
+    if 'nargs' in description:
+        if description['nargs'] is not None:
+            kwargs['nargs'] = description['nargs']
+        kwargs['type'] = rebuild_type(description['type'])
+        if description.get('choices'):
+            kwargs['choices'] = description['choices']
+    return container.add_argument(*names, **kwargs)
+
+
+def rebuild_parser(description):
+    '''An ArgumentParser with the groups and actions recorded by describe_parser, with
+    its strings passed through encode_strings once loaded.
+    '''
+    parser = argparse.ArgumentParser(prog=description['prog'], description=description['description'], add_help=False)
+    groups = description['groups']
+    #every parser starts with the positional and optional groups
+    for group, group_description in zip(parser._action_groups, groups[:2]):
+        group.title = group_description['title']
+    for group_description in groups[2:]:
+        parser.add_argument_group(group_description['title'], group_description['description'])
+
+    group_of = {}
+    for group, group_description in zip(parser._action_groups, groups):
+        if group_description['gui_ignore']:
+            group.GUI_IGNORE = True
+        if group_description['gui_config'] is not None:
+            group.gui_config = group_description['gui_config']
+        for num in group_description['actions']:
+            group_of.setdefault(num, group)
+
+    for num, action_description in enumerate(description['actions']):
+        add_action(group_of.get(num, parser), action_description)
+    return parser
+
+
+def request_argv(parser, socket_path=None, options=None):
+    '''Have the daemon open a form for parser, returning the list of arguments made from
+    it once it is closed, or None if it was cancelled.
+
+    options - dict of ArgparseGui arguments, from those in GUI_OPTIONS
+
+    Raises ValueError if the parser can't be described, and DaemonUnavailable if there
+    is no daemon or it couldn't open the form.
+    '''
+    request = {
+        'version':PROTOCOL_VERSION,
+        'parser':describe_parser(parser),
+        'options':options or {},
+        'cwd':os.getcwd()
+        }
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        try:
+            connection.connect(socket_path or default_socket_path())
+        except socket.error as err:
+            raise DaemonUnavailable(str(err))
+        connection.sendall(json.dumps(request) + '\n')
+        reply = read_line(connection)
+    finally:
+        connection.close()
+
+    if not reply:
+        raise DaemonUnavailable('the daemon closed the connection')
+    reply = json.loads(reply)
+    if 'error' in reply:
+        raise DaemonUnavailable(reply['error'])
+    if reply.get('cancelled'):
+        return None
+    return encode_strings(reply['argv'])
+
+
+def read_line(connection):
+    '''Read up to a newline, or until the other end closes the connection'''
+    chunks = []
+    while True:
+        chunk = connection.recv(65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        if chunk.endswith('\n'):
+            break
+    return ''.join(chunks)
+
+
+def start_daemon(socket_path=None, idle_timeout=None):
+    '''Start a daemon in the background, detached from this process'''
+    import subprocess
+    command = [sys.executable, '-m', 'tkarg.daemon', '--socket', socket_path or default_socket_path()]
+    if idle_timeout:
+        command.extend(['--idle-timeout', str(idle_timeout)])
+    env = dict(os.environ)
+    package_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env['PYTHONPATH'] = package_dir + os.pathsep + env.get('PYTHONPATH', '')
+    with open(os.devnull, 'r+b') as null:
+        subprocess.Popen(command, stdin=null, stdout=null, stderr=null, close_fds=True,
+                preexec_fn=os.setsid, env=env)
+
+
+class FormDaemon(object):
+    '''Serve requests for forms from clients on a Unix socket.
+
+    socket_path - where to listen, by default default_socket_path()
+    idle_timeout - seconds with no form open after which to exit, or None to run until
+        killed
+    max_parsers - number of rebuilt parsers kept, keyed by their description
+    '''
+    def __init__(self, socket_path=None, idle_timeout=None, max_parsers=32):
+        self.socket_path = socket_path or default_socket_path()
+        self.idle_timeout = idle_timeout
+        self.max_parsers = max_parsers
+        self.parsers = OrderedDict()
+        self.open_forms = 0
+        self.idle_check = None
+        self.running = True
+        self.root = None
+        self.dispatcher = None
+        self.schema_cache = None
+
+    def listen(self):
+        '''Bind the socket, replacing a stale one left by a daemon that died.  Exits if
+        another daemon is already listening.
+        '''
+        if os.path.exists(self.socket_path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.socket_path)
+            except socket.error:
+                os.remove(self.socket_path)
+            else:
+                probe.close()
+                sys.exit('a tkarg daemon is already listening on %s' % self.socket_path)
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        #only this user may connect
+        old_umask = os.umask(0o077)
+        try:
+            self.server.bind(self.socket_path)
+        finally:
+            os.umask(old_umask)
+        self.server.listen(16)
+
+    def serve(self):
+        from Tkinter import Tk
+        from tkarg.executor import TkDispatcher
+        from tkarg.schemacache import SchemaCache
+
+        self.listen()
+        self.root = Tk()
+        self.root.withdraw()
+        self.dispatcher = TkDispatcher(self.root)
+        #keeps the dispatcher checking for requests for as long as the daemon runs
+        self.dispatcher.task_started()
+        self.schema_cache = SchemaCache(memory_entries=self.max_parsers)
+
+        accepter = threading.Thread(target=self.accept_connections)
+        accepter.daemon = True
+        accepter.start()
+        self.schedule_idle_check()
+        try:
+            #a cancelled form calls quit(), which shouldn't stop the daemon
+            while self.running:
+                self.root.mainloop()
+        finally:
+            self.server.close()
+            try:
+                os.remove(self.socket_path)
+            except OSError:
+                pass
+
+    def accept_connections(self):
+        while True:
+            try:
+                connection, address = self.server.accept()
+            except socket.error:
+                return
+            handler = threading.Thread(target=self.handle_connection, args=(connection,))
+            handler.daemon = True
+            handler.start()
+
+    def handle_connection(self, connection):
+        '''Read the request, have the Tk thread open the form, then wait for either the
+        reply or the client going away.
+        '''
+        try:
+            request = encode_strings(json.loads(read_line(connection)))
+        except ValueError:
+            self.reply(connection, {'error':'malformed request'})
+            return
+        if request.get('version') != PROTOCOL_VERSION:
+            self.reply(connection, {'error':'protocol version %s is not %d' % (request.get('version'), PROTOCOL_VERSION)})
+            return
+
+        #the daemon's own directory is shared by all of the forms, so each keeps its client's
+        session = {'connection':connection, 'window':None, 'replied':False, 'cwd':request.get('cwd')}
+        self.dispatcher.post(self.open_form, session, request)
+        #nothing more is sent by the client, so this only returns once it closes its end
+        try:
+            connection.recv(1)
+        except socket.error:
+            pass
+        self.dispatcher.post(self.client_gone, session)
+
+    def reply(self, connection, message):
+        try:
+            connection.sendall(json.dumps(message) + '\n')
+        except socket.error:
+            pass
+        try:
+            connection.shutdown(socket.SHUT_RDWR)
+        except socket.error:
+            pass
+
+    def get_parser(self, description):
+        key = hashlib.sha1(json.dumps(description, sort_keys=True)).hexdigest()
+        parser = self.parsers.pop(key, None)
+        if parser is None:
+            parser = rebuild_parser(description)
+        self.parsers[key] = parser
+        while len(self.parsers) > self.max_parsers:
+            self.parsers.popitem(last=False)
+        return parser
+
+    def open_form(self, session, request):
+        from Tkinter import Toplevel, TclError
+        from tkarg.tkinterutils import ArgparseGui
+
+        options = dict((key, value) for key, value in request.get('options', {}).items() if key in GUI_OPTIONS)
+
+        window = Toplevel(self.root)
+        try:
+            parser = self.get_parser(request['parser'])
+            #relative paths in the form are relative to the client's directory
+            gui = ArgparseGui(parser, tk=window, schema_cache=self.schema_cache, cwd=session['cwd'], **options)
+        except (SystemExit, ValueError, KeyError, TypeError, TclError) as err:
+            #ArgparseGui exits for parsers it can't show, which mustn't take the daemon with it
+            window.destroy()
+            self.reply(session['connection'], {'error':'could not open the form: %s' % err})
+            session['replied'] = True
+            return
+
+        session['window'] = window
+        self.open_forms += 1
+        gui.frame.bind('<Destroy>', lambda event: self.root.after_idle(self.form_closed, session, gui), add='+')
+        window.protocol('WM_DELETE_WINDOW', gui.cancel)
+        window.deiconify()
+        window.lift()
+        window.focus_force()
+
+    def form_closed(self, session, gui):
+        '''After the form is finished with, by DONE or CANCEL/QUIT'''
+        if not session['replied']:
+            if gui.cancelled:
+                message = {'cancelled':True}
+            else:
+                message = {'argv':gui.make_commandline_list()}
+            self.reply(session['connection'], message)
+            session['replied'] = True
+        self.close_window(session)
+
+    def client_gone(self, session):
+        session['connection'].close()
+        if not session['replied']:
+            session['replied'] = True
+            self.close_window(session)
+
+    def close_window(self, session):
+        window = session['window']
+        if window is None:
+            return
+        session['window'] = None
+        self.open_forms -= 1
+        if window.winfo_exists():
+            window.destroy()
+        self.schedule_idle_check()
+
+    def schedule_idle_check(self):
+        if self.idle_timeout and not self.open_forms:
+            if self.idle_check is not None:
+                self.root.after_cancel(self.idle_check)
+            self.idle_check = self.root.after(int(self.idle_timeout * 1000), self.check_idle)
+
+    def check_idle(self):
+        self.idle_check = None
+        if not self.open_forms:
+            self.running = False
+            self.root.quit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Open tkarg forms for tkgui.py --daemon, without the startup time')
+    parser.add_argument('--socket', default=None,
+            help='path of the Unix socket to listen on (default %s)' % default_socket_path())
+    parser.add_argument('--idle-timeout', type=float, default=None,
+            help='exit after this many seconds without an open form')
+    options = parser.parse_args()
+    FormDaemon(options.socket, idle_timeout=options.idle_timeout).serve()
+
+
+if __name__ == '__main__':
+    main()
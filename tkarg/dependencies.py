@@ -0,0 +1,147 @@
+'''Dependencies between options, i.e. options that are greyed out until others are set.
+
+A DependencyGraph holds the options as nodes, with an edge from each prerequisite to the
+options that depend on it.  An option is enabled when all of its prerequisites have been
+satisfied (e.g. a file chosen) and are themselves enabled, so chains of dependencies are
+followed transitively, and an option becoming unsatisfied disables everything
+downstream of it again.  Cycles are rejected when the dependency that would create one
+is added.
+
+When an option's state changes, only the options downstream of it are recomputed, in
+topological order, and all resulting changes are handed to on_change together, so that
+a gui can apply them in a single update.  Nothing in this module depends on Tkinter,
+and any hashable objects can be nodes.
+'''
+
+
+class DependencyCycleError(ValueError):
+    pass
+
+
+class DependencyGraph(object):
+    '''
+    on_change - called with a list of (node, enabled) for the nodes whose state changed
+        because of a single call to add_dependency or set_satisfied.  By default each
+        node's set_enabled method is called.
+    '''
+    def __init__(self, on_change=None):
+        self.prerequisites = {}
+        self.dependents = {}
+        self.satisfied = set()
+        self.enabled = {}
+        self.on_change = on_change or self.apply_changes
+        #node -> position in a topological order, recomputed when edges are added
+        self.order = None
+
+    def add_node(self, node):
+        if node not in self.prerequisites:
+            self.prerequisites[node] = []
+            self.dependents[node] = []
+            self.enabled[node] = True
+            self.order = None
+
+    def path(self, start, end):
+        '''A list of nodes leading from start to end along dependency edges, or None'''
+        stack = [(start, [start])]
+        seen = set([start])
+        while stack:
+            node, path = stack.pop()
+            if node is end:
+                return path
+            for dep in self.dependents.get(node, []):
+                if dep not in seen:
+                    seen.add(dep)
+                    stack.append((dep, path + [dep]))
+        return None
+
+    def add_dependency(self, prerequisite, dependent):
+        '''Make dependent require prerequisite.  Raises DependencyCycleError if
+        prerequisite already depends on dependent, directly or not.
+        '''
+        self.add_node(prerequisite)
+        self.add_node(dependent)
+        if dependent in self.dependents[prerequisite]:
+            return
+        cycle = self.path(dependent, prerequisite)
+        if cycle is not None or prerequisite is dependent:
+            cycle = (cycle or [dependent]) + [dependent]
+            raise DependencyCycleError('dependency cycle: %s' % ' -> '.join(describe(node) for node in cycle))
+
+        self.dependents[prerequisite].append(dependent)
+        self.prerequisites[dependent].append(prerequisite)
+        self.order = None
+        self.propagate(dependent)
+
+    def topological_order(self):
+        if self.order is None:
+            #Kahn's algorithm
+            remaining = dict((node, len(prereqs)) for node, prereqs in self.prerequisites.items())
+            ready = [node for node, count in remaining.items() if count == 0]
+            self.order = {}
+            while ready:
+                node = ready.pop()
+                self.order[node] = len(self.order)
+                for dep in self.dependents[node]:
+                    remaining[dep] -= 1
+                    if remaining[dep] == 0:
+                        ready.append(dep)
+        return self.order
+
+    def downstream(self, node):
+        '''node and everything that depends on it, in topological order'''
+        found = set([node])
+        stack = [node]
+        while stack:
+            for dep in self.dependents[stack.pop()]:
+                if dep not in found:
+                    found.add(dep)
+                    stack.append(dep)
+        order = self.topological_order()
+        return sorted(found, key=order.get)
+
+    def compute_enabled(self, node):
+        return all(prereq in self.satisfied and self.enabled[prereq] for prereq in self.prerequisites[node])
+
+    def propagate(self, node):
+        changes = []
+        for affected in self.downstream(node):
+            enabled = self.compute_enabled(affected)
+            if enabled != self.enabled[affected]:
+                self.enabled[affected] = enabled
+                changes.append((affected, enabled))
+        if changes:
+            self.on_change(changes)
+        return changes
+
+    def set_satisfied(self, node, satisfied=True):
+        '''Record whether node now satisfies the options depending on it, and update
+        the state of everything downstream.
+        '''
+        self.add_node(node)
+        if satisfied:
+            self.satisfied.add(node)
+        else:
+            self.satisfied.discard(node)
+        return self.propagate(node)
+
+    def is_enabled(self, node):
+        return self.enabled.get(node, True)
+
+    def unmet_count(self, node):
+        '''Number of prerequisites of node that are not yet satisfied and enabled'''
+        return sum(1 for prereq in self.prerequisites.get(node, [])
+                if not (prereq in self.satisfied and self.enabled[prereq]))
+
+    def get_dependents(self, node):
+        return list(self.dependents.get(node, []))
+
+    def apply_changes(self, changes):
+        for node, enabled in changes:
+            node.set_enabled(enabled)
+
+
+def describe(node):
+    option = getattr(node, 'option', None)
+    if option is not None:
+        return option.option_strings[-1] if option.option_strings else option.dest
+    return str(node)
@@ -0,0 +1,329 @@
+'''Run tasks for a gui on a bounded pool of worker threads or processes.
+
+Tkinter may only be used from the thread running the mainloop, so results, exceptions
+and progress reports from the workers are handed back through a TkDispatcher.  The
+workers post callbacks to it from any thread, and it runs all that have accumulated in
+one batch on the Tk thread.  It only schedules itself with after() while there are
+tasks outstanding, checking again within a frame when there was something to do and
+backing off when there wasn't, so an idle gui does no polling at all.
+
+A TaskExecutor returns a TaskFuture for each submitted callable.  Every future keeps its
+own result or exception, and callbacks added with add_done_callback or
+add_progress_callback are always called on the Tk thread.  The executor itself only
+holds on to the futures of tasks that haven't finished, so a gui submitting a task for
+every edit doesn't accumulate them.
+
+This module doesn't import Tkinter, the dispatcher just needs a widget to call after()
+on, and without one callbacks are called directly on the worker threads.
+'''
+import sys
+import threading
+import Queue
+
+PENDING = 'pending'
+RUNNING = 'running'
+CANCELLED = 'cancelled'
+FINISHED = 'finished'
+
+
+class TaskFuture(object):
+    '''The eventual result of a callable submitted to a TaskExecutor'''
+    def __init__(self, func, args, kwargs, dispatcher=None):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.dispatcher = dispatcher
+        self.state = PENDING
+        self.result_value = None
+        self.exception_value = None
+        self.traceback = None
+        self.progress = None
+        self.done_callbacks = []
+        self.progress_callbacks = []
+        self.condition = threading.Condition()
+
+    def cancel(self):
+        '''Cancel the task if it hasn't started yet.  Returns whether it was cancelled.'''
+        with self.condition:
+            if self.state != PENDING:
+                return self.state == CANCELLED
+            self.state = CANCELLED
+            self.condition.notify_all()
+        self.post(self.call_done_callbacks)
+        return True
+
+    def cancelled(self):
+        return self.state == CANCELLED
+
+    def running(self):
+        return self.state == RUNNING
+
+    def done(self):
+        return self.state in (CANCELLED, FINISHED)
+
+    def result(self, timeout=None):
+        '''Wait for the task to finish and return its result, or raise its exception.
+        Don't call this with no timeout on the Tk thread, use add_done_callback instead.
+        '''
+        with self.condition:
+            if not self.done():
+                self.condition.wait(timeout)
+            if self.state == CANCELLED:
+                raise RuntimeError('task was cancelled')
+            if not self.done():
+                raise RuntimeError('task did not finish within %s seconds' % timeout)
+        if self.exception_value is not None:
+            if self.traceback is not None:
+                #with the traceback from the worker, rather than from here
+                raise type(self.exception_value), self.exception_value, self.traceback
+            raise self.exception_value
+        return self.result_value
+
+    def exception(self, timeout=None):
+        try:
+            self.result(timeout)
+        except RuntimeError:
+            raise
+        except Exception as err:
+            return err
+        return None
+
+    def add_done_callback(self, callback):
+        '''callback(future) is called on the Tk thread when the task finishes or is cancelled'''
+        if self.done():
+            self.post(callback, self)
+        else:
+            self.done_callbacks.append(callback)
+
+    def add_progress_callback(self, callback):
+        '''callback(future, progress) is called on the Tk thread for each report_progress'''
+        self.progress_callbacks.append(callback)
+
+    def report_progress(self, progress):
+        '''Called by the task, from its worker, with any object describing its progress'''
+        self.progress = progress
+        #the callbacks are looked up on the Tk thread, so that any added there just after
+        #submitting the task don't miss early reports
+        self.post(self.call_progress_callbacks, progress)
+
+    def call_progress_callbacks(self, progress):
+        for callback in self.progress_callbacks:
+            callback(self, progress)
+
+    def post(self, callback, *args):
+        if self.dispatcher is not None:
+            self.dispatcher.post(callback, *args)
+        else:
+            callback(*args)
+
+    def call_done_callbacks(self):
+        for callback in self.done_callbacks:
+            callback(self)
+        if self.dispatcher is not None:
+            self.dispatcher.task_finished()
+
+    def start(self):
+        with self.condition:
+            if self.state != PENDING:
+                return False
+            self.state = RUNNING
+        return True
+
+    def finish(self, result=None, exception=None, traceback=None):
+        with self.condition:
+            self.result_value = result
+            self.exception_value = exception
+            self.traceback = traceback
+            self.state = FINISHED
+            self.condition.notify_all()
+        self.post(self.call_done_callbacks)
+
+
+class TkDispatcher(object):
+    '''Hands callbacks posted from worker threads to the Tk thread, in batches.
+
+    widget - any Tk widget, used to schedule with after()
+    min_interval, max_interval - milliseconds between checks while tasks are outstanding.
+        After a check that found callbacks to run the next is min_interval away, after
+        empty checks the interval doubles up to max_interval.
+    '''
+    def __init__(self, widget=None, min_interval=16, max_interval=200):
+        self.widget = widget
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self.queue = Queue.Queue()
+        #only touched on the Tk thread
+        self.outstanding = 0
+        self.scheduled = None
+        self.batches = 0
+        self.dispatched = 0
+
+    def post(self, callback, *args):
+        '''Thread safe.  Queue callback(*args) to be called on the Tk thread.'''
+        if self.widget is None:
+            callback(*args)
+        else:
+            self.queue.put((callback, args))
+
+    def task_started(self):
+        '''Called on the Tk thread for each task submitted, so that the dispatcher knows to
+        keep checking for callbacks until task_finished has been called as many times.
+        '''
+        self.outstanding += 1
+        if self.widget is not None and self.scheduled is None:
+            self.interval = self.min_interval
+            self.scheduled = self.widget.after(self.interval, self.dispatch)
+
+    def task_finished(self):
+        self.outstanding -= 1
+
+    def dispatch(self):
+        '''Run all of the callbacks posted since the last dispatch'''
+        self.scheduled = None
+        batch = []
+        while True:
+            try:
+                batch.append(self.queue.get_nowait())
+            except Queue.Empty:
+                break
+
+        for callback, args in batch:
+            try:
+                callback(*args)
+            except Exception:
+                #a failing callback mustn't stop the others or the dispatcher
+                sys.excepthook(*sys.exc_info())
+        if batch:
+            self.batches += 1
+            self.dispatched += len(batch)
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * 2, self.max_interval)
+
+        if self.outstanding > 0 or not self.queue.empty():
+            self.scheduled = self.widget.after(self.interval, self.dispatch)
+
+    def stop(self):
+        if self.scheduled is not None:
+            self.widget.after_cancel(self.scheduled)
+            self.scheduled = None
+
+
+def _call_in_process(func, args, kwargs):
+    return func(*args, **kwargs)
+
+
+class TaskExecutor(object):
+    '''Run callables on a bounded pool of workers, returning a TaskFuture for each.
+
+    dispatcher - a TkDispatcher through which callbacks reach the Tk thread
+    max_workers - the number of tasks that may run at once
+    kind - 'thread' to run tasks in worker threads, or 'process' to run them in a
+        multiprocessing pool, in which case the callable and its arguments must be
+        picklable and tasks can't report progress
+    keep_results - whether to keep finished futures until their results are collected
+        with results().  Otherwise the executor drops each future when its task is done.
+    '''
+    def __init__(self, dispatcher=None, max_workers=4, kind='thread', keep_results=False):
+        if kind not in ('thread', 'process'):
+            raise ValueError('kind must be thread or process, not %s' % kind)
+        self.dispatcher = dispatcher
+        self.max_workers = max_workers
+        self.kind = kind
+        self.tasks = Queue.Queue()
+        self.workers = []
+        #futures of the tasks that are pending or running
+        self.futures = set()
+        self.keep_results = keep_results
+        #finished futures whose results haven't been collected, with keep_results
+        self.finished = []
+        self.lock = threading.Lock()
+        self.process_pool = None
+        self.shutting_down = False
+
+    def submit(self, func, *args, **kwargs):
+        '''Queue func(*args, **kwargs) to run on a worker.  If the keyword argument
+        pass_progress=True is given, func is also passed progress=future.report_progress.
+        '''
+        pass_progress = kwargs.pop('pass_progress', False)
+        if pass_progress:
+            if self.kind == 'process':
+                raise ValueError('tasks run in processes can not report progress')
+
+        if self.shutting_down:
+            raise RuntimeError('can not submit tasks after shutdown')
+
+        future = TaskFuture(func, args, kwargs, dispatcher=self.dispatcher)
+        if pass_progress:
+            future.kwargs['progress'] = future.report_progress
+        with self.lock:
+            self.futures.add(future)
+        if self.dispatcher is not None:
+            self.dispatcher.task_started()
+
+        self.tasks.put(future)
+        if len(self.workers) < self.max_workers:
+            self.start_worker()
+        return future
+
+    def start_worker(self):
+        if self.kind == 'process' and self.process_pool is None:
+            import multiprocessing
+            self.process_pool = multiprocessing.Pool(self.max_workers)
+        worker = threading.Thread(target=self.work)
+        worker.daemon = True
+        self.workers.append(worker)
+        worker.start()
+
+    def work(self):
+        while True:
+            future = self.tasks.get()
+            if future is None:
+                return
+            if not future.start():
+                #cancelled before it started
+                self.forget(future)
+                continue
+            try:
+                if self.kind == 'process':
+                    result = self.process_pool.apply_async(_call_in_process, (future.func, future.args, future.kwargs)).get()
+                else:
+                    result = future.func(*future.args, **future.kwargs)
+            except Exception as err:
+                future.finish(exception=err, traceback=sys.exc_info()[2])
+            else:
+                future.finish(result=result)
+            self.forget(future)
+
+    def forget(self, future):
+        '''Drop a future whose task is done, unless its result is to be collected'''
+        with self.lock:
+            self.futures.discard(future)
+            if self.keep_results and future.state == FINISHED:
+                self.finished.append(future)
+
+    def results(self):
+        '''The results of the tasks that have finished without raising since this was last
+        called, in the order they finished.  Only kept with keep_results.
+        '''
+        with self.lock:
+            finished, self.finished = self.finished, []
+        return [future.result_value for future in finished if future.exception_value is None]
+
+    def shutdown(self, wait=True, cancel_pending=False):
+        self.shutting_down = True
+        if cancel_pending:
+            with self.lock:
+                pending = list(self.futures)
+            for future in pending:
+                future.cancel()
+        for worker in self.workers:
+            self.tasks.put(None)
+        if wait:
+            for worker in self.workers:
+                worker.join()
+        if self.process_pool is not None:
+            self.process_pool.close()
+            if wait:
+                self.process_pool.join()
@@ -0,0 +1,225 @@
+'''Checking the files chosen for file options in the background, as soon as they are
+chosen rather than when the script finally opens them.
+
+check_files looks at each path: whether it exists and can be read (or for output files,
+whether its directory can be written to) and its size.  With readahead it also tells
+the kernel that the file will be read soon (posix_fadvise with POSIX_FADV_WILLNEED),
+so that on a slow or network filesystem the data is already in the page cache by the
+time the script reads it.  This is only a hint, and is skipped where posix_fadvise
+isn't available.
+
+A FileChecker runs check_files on worker threads whenever the files of an option
+change, dropping results for selections that have since changed again, and records a
+FileCheckSummary on the model for its view to show.  Nothing in this module imports
+Tkinter, the FileChecker just needs a widget to call after() on.
+'''
+import os
+import sys
+
+POSIX_FADV_WILLNEED = 3
+
+_fadvise = None
+
+def get_fadvise():
+    '''A function fadvise(fd, offset, length, advice), or None if there isn't one'''
+    global _fadvise
+    if _fadvise is None:
+        if hasattr(os, 'posix_fadvise'):
+            _fadvise = os.posix_fadvise
+        elif sys.platform.startswith('linux'):
+            try:
+                import ctypes
+                import ctypes.util
+                libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+                libc.posix_fadvise.argtypes = [ctypes.c_int, ctypes.c_int64, ctypes.c_int64, ctypes.c_int]
+                _fadvise = libc.posix_fadvise
+            except (OSError, AttributeError):
+                _fadvise = False
+        else:
+            _fadvise = False
+    return _fadvise or None
+
+
+def readahead(path):
+    '''Ask the kernel to start reading path into the page cache.  Returns whether the
+    hint could be given.
+    '''
+    fadvise = get_fadvise()
+    if fadvise is None:
+        return False
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return False
+    try:
+        #a length of 0 means to the end of the file
+        fadvise(fd, 0, 0, POSIX_FADV_WILLNEED)
+    finally:
+        os.close(fd)
+    return True
+
+
+def format_size(size):
+    for unit in ['bytes', 'KB', 'MB', 'GB']:
+        if size < 1024 or unit == 'GB':
+            break
+        size /= 1024.0
+    if unit == 'bytes':
+        return '%d bytes' % size
+    return '%.1f %s' % (size, unit)
+
+
+class FileStatus(object):
+    '''What was found for a single path'''
+    def __init__(self, path, exists=False, usable=False, size=0, problem=None):
+        self.path = path
+        self.exists = exists
+        self.usable = usable
+        self.size = size
+        self.problem = problem
+
+
+def check_path(path, output=False, base_directory=None):
+    '''Check that path can be read, or with output True, that it can be written.  A
+    relative path is taken relative to base_directory if given, not the current directory.
+    '''
+    full_path = os.path.join(base_directory, path) if base_directory else path
+    if output:
+        directory = os.path.dirname(os.path.abspath(full_path))
+        if not os.path.isdir(directory):
+            return FileStatus(path, problem='directory %s does not exist' % directory)
+        if not os.access(directory, os.W_OK):
+            return FileStatus(path, problem='directory %s is not writable' % directory)
+        return FileStatus(path, exists=os.path.exists(full_path), usable=True)
+
+    try:
+        size = os.stat(full_path).st_size
+    except OSError:
+        return FileStatus(path, problem='missing')
+    if not os.access(full_path, os.R_OK):
+        return FileStatus(path, exists=True, size=size, problem='not readable')
+    return FileStatus(path, exists=True, usable=True, size=size)
+
+
+class FileCheckSummary(object):
+    '''The results of check_files for the paths of one option'''
+    def __init__(self, statuses, output=False, readahead_count=0):
+        self.statuses = statuses
+        self.output = output
+        self.readahead_count = readahead_count
+        self.total_size = sum(status.size for status in statuses)
+        self.problems = [status for status in statuses if status.problem]
+
+    def describe(self):
+        count = len(self.statuses)
+        text = '%d %s' % (count, 'file' if count == 1 else 'files')
+        if not self.output:
+            text += ', %s' % format_size(self.total_size)
+        if self.problems:
+            kinds = {}
+            for status in self.problems:
+                kinds[status.problem] = kinds.get(status.problem, 0) + 1
+            text += ', ' + ', '.join('%d %s' % (num, problem) for problem, num in sorted(kinds.items()))
+        return text
+
+    def error(self):
+        '''Message describing the first problem, or None'''
+        if not self.problems:
+            return None
+        status = self.problems[0]
+        more = len(self.problems) - 1
+        return '%s: %s%s' % (status.path, status.problem, ' (and %d more)' % more if more else '')
+
+
+def check_files(paths, output=False, readahead_files=False, progress=None, progress_interval=500,
+        base_directory=None):
+    '''Check each of paths, returning a FileCheckSummary.  With readahead_files, each
+    readable file is also read ahead.  progress, if given, is called with the number of
+    paths checked so far every progress_interval paths.  Relative paths are taken 
+    relative to base_directory if given.
+    '''
+    statuses = []
+    readahead_count = 0
+    for num, path in enumerate(paths):
+        status = check_path(path, output=output, base_directory=base_directory)
+        statuses.append(status)
+        if readahead_files and status.usable and not output:
+            if readahead(os.path.join(base_directory, path) if base_directory else path):
+                readahead_count += 1
+        if progress is not None and (num + 1) % progress_interval == 0:
+            progress(num + 1)
+    return FileCheckSummary(statuses, output=output, readahead_count=readahead_count)
+
+
+def is_output(model):
+    return model.dialog_kind() == 'save'
+
+
+class FileChecker(object):
+    '''Check the files of options whenever they change.
+
+    widget - any Tk widget, through which results reach the Tk thread
+    readahead_files - also read ahead the chosen input files
+    max_workers - the number of options whose files may be checked at once
+    '''
+    def __init__(self, widget, readahead_files=False, max_workers=2):
+        self.widget = widget
+        self.readahead_files = readahead_files
+        self.max_workers = max_workers
+        self.generations = {}
+        self.futures = {}
+        self.executor = None
+
+    def get_executor(self):
+        if self.executor is None:
+            from tkarg.executor import TaskExecutor, TkDispatcher
+            self.executor = TaskExecutor(TkDispatcher(self.widget), max_workers=self.max_workers)
+        return self.executor
+
+    def value_changed(self, model):
+        '''Form listener, called whenever the value of a model is set'''
+        from tkarg.optionmodel import FILE
+        if model.kind != FILE:
+            return
+        generation = self.generations[model] = self.generations.get(model, 0) + 1
+        future = self.futures.pop(model, None)
+        if future is not None:
+            future.cancel()
+        if not model.value:
+            model.set_file_check(None)
+            return
+
+        model.set_file_check(None, checking=0)
+        #the paths are copied, since the FileList may change while they are being checked
+        future = self.get_executor().submit(check_files, list(model.value), output=is_output(model),
+                readahead_files=self.readahead_files, base_directory=model.base_directory(), pass_progress=True)
+        future.add_progress_callback(lambda future, done: self.check_progress(model, generation, done))
+        future.add_done_callback(lambda done: self.check_done(model, generation, done))
+        self.futures[model] = future
+
+    def check_progress(self, model, generation, done):
+        if generation == self.generations.get(model):
+            model.set_file_check(None, checking=done)
+
+    def check_done(self, model, generation, future):
+        if self.futures.get(model) is future:
+            del self.futures[model]
+        if future.cancelled() or generation != self.generations.get(model):
+            return
+        if future.exception_value is not None:
+            model.set_file_check(None)
+        else:
+            model.set_file_check(future.result_value)
+
+    def errors(self, models):
+        '''(model, message) for each of models whose files have known problems'''
+        errors = []
+        for model in models:
+            summary = getattr(model, 'file_check', None)
+            if summary is not None and summary.error():
+                errors.append((model, summary.error()))
+        return errors
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_pending=True)
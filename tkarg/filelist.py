@@ -0,0 +1,95 @@
+'''The list of paths chosen for a file option, which may run to many thousands when
+files are picked with a multiple selection dialog.
+
+A FileList keeps the paths in the order they were added, ignoring any added again, and
+adding or removing a path takes constant time however many there are.  It behaves
+enough like the plain list it replaces (append, extend, indexing, iteration, len) for
+existing callbacks that use the list held by an ArgparseFileOption to keep working.
+Nothing in this module depends on Tkinter.
+'''
+from collections import OrderedDict
+
+
+class FileList(object):
+    def __init__(self, paths=()):
+        self.paths = OrderedDict()
+        #list of the paths for indexing, rebuilt on the first lookup after a change
+        self.snapshot = None
+        #incremented by every change, so that things made from the paths can tell when 
+        #they are out of date, however the list was changed
+        self.version = 0
+        self.extend(paths)
+
+    def append(self, path):
+        '''Add path if it isn't already present.  Returns whether it was added.'''
+        if not path or path in self.paths:
+            return False
+        self.paths[path] = None
+        self.snapshot = None
+        self.version += 1
+        return True
+
+    def extend(self, paths):
+        '''Add each of paths not already present, returning the number added'''
+        added = 0
+        for path in paths:
+            if self.append(path):
+                added += 1
+        return added
+
+    def remove(self, path):
+        del self.paths[path]
+        self.snapshot = None
+        self.version += 1
+
+    def discard(self, paths):
+        '''Remove whichever of paths are present, returning the number removed'''
+        removed = 0
+        for path in paths:
+            if path in self.paths:
+                del self.paths[path]
+                removed += 1
+        if removed:
+            self.snapshot = None
+            self.version += 1
+        return removed
+
+    def clear(self):
+        self.paths.clear()
+        self.snapshot = None
+        self.version += 1
+
+    def as_list(self):
+        if self.snapshot is None:
+            self.snapshot = list(self.paths)
+        return self.snapshot
+
+    def __getitem__(self, index):
+        return self.as_list()[index]
+
+    def __contains__(self, path):
+        return path in self.paths
+
+    def __iter__(self):
+        return iter(self.paths)
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return repr(self.as_list())
+
+
+def describe_files(paths, max_listed=3):
+    '''Short text for a label saying which files are chosen, naming at most max_listed
+    of them, since a label listing thousands of paths would be unreadable.
+    '''
+    if len(paths) <= max_listed:
+        return ' '.join(paths)
+    return '%s ... %s (%d files)' % (paths[0], paths[len(paths) - 1], len(paths))
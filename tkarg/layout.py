@@ -0,0 +1,112 @@
+'''Plan the arrangement of argument groups into the columns of an ArgparseGui.
+
+The plan is computed from the argparse actions alone, so it can be used before any
+widgets exist, either by ArgparseGui to build each ArgparseOptionGroup directly into
+its final column, or on its own to predict how big the gui window for a parser will be.
+Nothing in this module depends on Tkinter.
+
+The row counts must agree with what ArgparseOptionGroup actually creates: one row for
+the group title, one for each option, and an extra one for the update box of each file
+option.  The pixel heights are estimates based on the number of lines in each wrapped
+label.
+'''
+from textwrap import fill
+
+from tkarg.optionmodel import make_option_model, group_display_title, ordered_action_groups, FILE
+
+#approximate pixel sizes of the pieces of the gui, with the default fonts
+LINE_HEIGHT = 16
+TITLE_LINE_HEIGHT = 24
+WIDGET_HEIGHT = 30
+#the minsizes of the label and widget columns configured by ArgparseOption.position
+COLUMN_WIDTH = 450 + 150
+#space taken by the buttons and status frame below the columns
+FOOTER_HEIGHT = 220
+
+
+class GroupPlan(object):
+    '''Where a single argparse argument group will go, and how much room it needs'''
+    def __init__(self, group, title, num_rows, height):
+        self.group = group
+        self.title = title
+        self.num_rows = num_rows
+        self.height = height
+        self.column = None
+        #position of the group within its column
+        self.index_in_column = None
+
+
+class LayoutPlan(object):
+    '''The groups of a parser, assigned to columns'''
+    def __init__(self, widgets_per_column):
+        self.widgets_per_column = widgets_per_column
+        self.groups = []
+        #list of lists of GroupPlans
+        self.columns = []
+
+    def add_group(self, group_plan):
+        '''Place the group in the current column, or start a new column if it doesn't fit.
+        A group that is too big for any column still gets a column to itself.
+        '''
+        if not self.columns or (self.columns[-1] and
+                self.column_rows(len(self.columns) - 1) + group_plan.num_rows >= self.widgets_per_column):
+            self.columns.append([])
+        group_plan.column = len(self.columns) - 1
+        group_plan.index_in_column = len(self.columns[-1])
+        self.columns[-1].append(group_plan)
+        self.groups.append(group_plan)
+
+    def column_rows(self, column):
+        return sum(group.num_rows for group in self.columns[column])
+
+    def column_height(self, column):
+        return sum(group.height for group in self.columns[column])
+
+    def window_size(self, padx=10, pady=2):
+        '''Predicted (width, height) in pixels of the gui, were it not limited by the size
+        of the toplevel window and scrollbars.
+        '''
+        width = len(self.columns) * (COLUMN_WIDTH + 2 * padx)
+        height = FOOTER_HEIGHT
+        if self.columns:
+            height += max(self.column_height(col) + len(self.columns[col]) * 2 * pady
+                    for col in range(len(self.columns)))
+        return width, height
+
+
+def plan_group(group, label_width=65, pady=2):
+    '''Compute the rows and approximate height needed for an ArgparseOptionGroup built
+    from this argparse group.  Raises ValueError for actions that can't be handled.
+    '''
+    title = group_display_title(group)
+    num_rows = 1
+    #the title shares a row with the hide button
+    height = max((fill(title, label_width*0.7).count('\n') + 1) * TITLE_LINE_HEIGHT, WIDGET_HEIGHT)
+
+    seen_options = set()
+    for option in group._group_actions:
+        if option in seen_options:
+            continue
+        seen_options.add(option)
+
+        model = make_option_model(option)
+        if model is None:
+            continue
+        num_lines = model.label_text(label_width).count('\n') + 1
+        num_rows += 1
+        height += max(num_lines * LINE_HEIGHT, WIDGET_HEIGHT) + 2 * pady
+        if model.kind == FILE:
+            #the update box
+            num_rows += 1
+            height += LINE_HEIGHT
+
+    return GroupPlan(group, title, num_rows, height)
+
+
+def plan_layout(parser, widgets_per_column=18, label_width=65):
+    '''Compute a LayoutPlan for the groups of the parser that would be shown by ArgparseGui'''
+    plan = LayoutPlan(widgets_per_column)
+    for group in ordered_action_groups(parser):
+        if len(group._group_actions) and not hasattr(group, 'GUI_IGNORE'):
+            plan.add_group(plan_group(group, label_width=label_width))
+    return plan
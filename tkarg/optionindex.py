@@ -0,0 +1,100 @@
+'''Finding options of a large form by typing part of their flags, dest, group title or
+help text, as for the filter bar of an ArgparseGui.
+
+An OptionIndex is built once per form.  It maps each word found in any of those
+texts to the models of the options it was found for, and keeps the words sorted, so
+that finding all of the words starting with what was typed is a binary search rather
+than a scan over every option.  A query matches the options having words that start
+with each of the words of the query.  Options hidden from the gui with HIDE in their
+help aren't indexed.  Nothing in this module imports Tkinter.
+'''
+import re
+import bisect
+
+from tkarg.optionmodel import ordered_action_groups, group_display_title
+
+_WORD = re.compile(r'[a-z0-9]+')
+
+
+def words(text):
+    '''Lowercased words of text, with flags split at - and _ as well, so that --out-file
+    is found by typing out or file, as well as out-file.
+    '''
+    if isinstance(text, unicode):
+        text = text.encode('utf-8')
+    text = text.lower()
+    found = set(_WORD.findall(text))
+    for token in text.split():
+        token = token.strip('-')
+        if token:
+            found.add(token)
+    return found
+
+
+class OptionIndex(object):
+    '''Inverted index from words to the models of an ArgparseOptionForm
+
+    max_cached - the number of query results kept, since typing and deleting a
+        character goes back to a query that has just been answered
+    '''
+    def __init__(self, form, max_cached=64):
+        self.form = form
+        self.max_cached = max_cached
+        #word -> set of models
+        self.postings = {}
+        self.models = [model for model in form.models if not model.omit]
+
+        group_titles = {}
+        for group in ordered_action_groups(form.parser):
+            for action in group._group_actions:
+                group_titles.setdefault(action, group_display_title(group))
+
+        for model in self.models:
+            option = model.option
+            texts = list(option.option_strings)
+            texts.append(option.dest or '')
+            texts.append(option.help or '')
+            texts.append(group_titles.get(option, ''))
+            for word in words(' '.join(texts)):
+                self.postings.setdefault(word, set()).add(model)
+
+        self.sorted_words = sorted(self.postings)
+        self.cache = {}
+
+    def prefix_matches(self, prefix):
+        '''The models having a word starting with prefix'''
+        start = bisect.bisect_left(self.sorted_words, prefix)
+        #words are utf-8 encoded, so no byte of one is \xff
+        stop = bisect.bisect_left(self.sorted_words, prefix + '\xff')
+        if stop - start == 1:
+            return self.postings[self.sorted_words[start]]
+        matches = set()
+        for word in self.sorted_words[start:stop]:
+            matches.update(self.postings[word])
+        return matches
+
+    def search(self, query):
+        '''The set of models matching every word of query, or None for an empty query,
+        meaning that everything should be shown.
+        '''
+        query_words = sorted(words(query), key=len, reverse=True)
+        if not query_words:
+            return None
+        key = tuple(query_words)
+        try:
+            return self.cache[key]
+        except KeyError:
+            pass
+
+        #longer words are likely to match fewer options, so start with them
+        matches = None
+        for word in query_words:
+            found = self.prefix_matches(word)
+            matches = set(found) if matches is None else matches & found
+            if not matches:
+                break
+
+        if len(self.cache) >= self.max_cached:
+            self.cache.clear()
+        self.cache[key] = matches
+        return matches
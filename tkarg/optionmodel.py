@@ -0,0 +1,763 @@
+'''Widget independent representation of the options of an ArgumentParser.
+
+Each argparse action shown in the gui has a model here that holds its current value
+and knows how to turn that value back into command line strings.  Nothing in this
+module depends on Tkinter, so the models can exist for options that never have a
+widget created for them, e.g. rows of a virtualized ArgparseGui that have not been
+scrolled into view.
+'''
+import argparse
+import re
+import shlex
+from collections import OrderedDict
+from textwrap import fill
+
+from tkarg.argparseutils import ArgparseActionAppendToDefault, argparse_bounded_float, proportion_type
+from tkarg.dependencies import DependencyGraph
+from tkarg.filelist import FileList
+
+#the kinds of gui option that an argparse action may be represented by
+BOOL = 'bool'
+STRING = 'string'
+CHOICE = 'choice'
+FILE = 'file'
+SUBCOMMAND = 'subcommand'
+
+
+def takes_multiple_values(nargs):
+    '''Whether an action with this nargs consumes a list of values on the command line'''
+    return nargs in ['*', '+'] or (isinstance(nargs, int) and nargs > 1)
+
+
+def classify_action(option):
+    '''Determine which kind of gui option should represent an argparse action. Returns
+    one of BOOL, STRING, CHOICE, FILE or SUBCOMMAND, or None for actions that are not shown
+    in the gui at all (help and version).  Raises ValueError for actions that can't be handled.
+    '''
+    #a flag, which appears as a checkbox
+    if isinstance(option, (argparse._StoreTrueAction, argparse._StoreFalseAction, argparse._StoreConstAction)):
+        return BOOL
+
+    #some variable(s) to store
+    elif isinstance(option, (argparse._StoreAction, argparse._AppendAction)):
+        #with fixed choices, appears as a select box
+        if option.choices:
+            return CHOICE
+
+        #hack to add a file chooser widget if 'file' appears in the option name, which would be considered a string otherwise
+        elif option.type in [str, None] and 'file' in option.dest.lower():
+            return FILE
+
+        #if no type is specified to ArgumentParser.add_argument then the default is str
+        #this will appear as a text entry box
+        #type functions such as those made by argparse_bounded_float are checked by instance,
+        #since the functions themselves never equal the function type
+        elif option.type in [None, str, float, int] or isinstance(option.type, type(argparse_bounded_float)):
+            return STRING
+
+        #if the actual argparse.FileType is specified in the type, in which case it is usually automatically opened during parse_args
+        elif option.type in [argparse.FileType, file] or isinstance(option.type, argparse.FileType):
+            return FILE
+
+        else:
+            raise ValueError("unknown Store action: %s (%s)\n" % (type(option), option.dest))
+
+    #my derived action, same as append, but doesn't overwrite specified defaults (good for kwargs)
+    elif isinstance(option, ArgparseActionAppendToDefault):
+        return STRING
+
+    #the subcommands added with add_subparsers, each with a parser of its own
+    elif isinstance(option, argparse._SubParsersAction):
+        return SUBCOMMAND
+
+    #ignore help
+    elif isinstance(option, (argparse._HelpAction, argparse._VersionAction)):
+        return None
+
+    else:
+        raise ValueError("unknown action: %s\n" % option)
+
+
+def group_display_title(group):
+    '''The heading shown over the options of an argparse argument group'''
+    if group.title != "optional arguments":
+        return group.title.upper()
+    else:
+        #This is for the optional group, the default group for arguments
+        return "Misc. options".upper()
+
+
+class ArgparseOptionModel(object):
+    '''Base class for the state of a single argparse action.  Derived classes handle
+    specific kinds of option, and hold the value in whatever form is natural for them.
+
+    The output_arg will be part of the list that is passed to ArgumentParser.parse_args
+    after the gui is closed.  Use the last listed flag, which is likely to be the more
+    descriptive long one.  There will be no option_strings for a positional arg.
+
+    Parsers may have many thousands of options, so models use __slots__ rather than
+    a __dict__ each, and anything not every option needs is only made when used.
+    '''
+    kind = None
+    __slots__ = ('option', 'output_arg', 'omit', 'nargs', 'value', 'label_cache', 'view',
+            'enabled', 'graph', 'form', 'error')
+
+    def __init__(self, option):
+        self.option = option
+
+        if option.option_strings:
+            self.output_arg = option.option_strings[-1]
+        else:
+            self.output_arg = None
+
+        self.omit = bool(option.help) and 'HIDE' in option.help
+        self.nargs = option.nargs
+        self.value = self.default_value()
+
+        #wrapped labels by label_width, which may be filled in from a schema cache.
+        #Labels of options that are never shown aren't needed, so this starts as None.
+        self.label_cache = None
+        #the widget currently displaying this model, if any
+        self.view = None
+        self.enabled = True
+        #the DependencyGraph this option is part of, if any
+        self.graph = None
+        #the ArgparseOptionForm this option is part of, if any, which is told of changes
+        self.form = None
+        #why the current value would be rejected by argparse, see tkarg.validation
+        self.error = None
+
+    def default_value(self):
+        return self.option.default
+
+    def extract_label_from_help(self):
+        '''Extract a reasonable label.
+        '''
+        help_string = re.sub('[(]default [)]', '', self.option.help or '').strip()
+        if help_string:
+            return help_string
+        elif self.option.option_strings:
+            return re.sub('--', '', self.option.option_strings[-1])
+        else:
+            #e.g. the positionals of subcommands, which are often given no help
+            return self.option.dest
+
+    def label_string(self):
+        return self.extract_label_from_help()
+
+    def label_text(self, label_width):
+        if self.label_cache is not None and label_width in self.label_cache:
+            return self.label_cache[label_width]
+        text = fill(self.label_string(), label_width)
+        self.cache_label(label_width, text)
+        return text
+
+    def cache_label(self, label_width, text):
+        if self.label_cache is None:
+            self.label_cache = {}
+        self.label_cache[label_width] = text
+
+    def set_value(self, value):
+        self.value = value
+        self.changed()
+
+    def changed(self):
+        '''Tell the form that the value has been set or altered in place.  The form keeps
+        the command line strings of each option until told it has changed, so anything
+        setting value directly must call this.
+        '''
+        if self.form is not None:
+            self.form.value_changed(self)
+
+    def set_error(self, error):
+        if error != self.error:
+            self.error = error
+            if self.view is not None and hasattr(self.view, 'show_error'):
+                self.view.show_error()
+
+    def make_string(self):
+        raise NotImplementedError
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        if self.view is not None:
+            self.view.show_state()
+
+    def grey_out(self):
+        self.set_enabled(False)
+
+    def get_graph(self):
+        if self.graph is None:
+            self.graph = DependencyGraph()
+        return self.graph
+
+    @property
+    def depends_on(self):
+        '''Number of options this depends on that haven't been set yet'''
+        if self.graph is None:
+            return 0
+        return self.graph.unmet_count(self)
+
+    @property
+    def dependent_options(self):
+        if self.graph is None:
+            return []
+        return self.graph.get_dependents(self)
+
+    def register_dependency(self, dep):
+        '''Make dep depend on this option, greying it out until this option is set.
+        Raises DependencyCycleError if that would make a cycle of dependencies.
+        '''
+        if dep.graph is None:
+            dep.graph = self.get_graph()
+        elif self.graph is None:
+            self.graph = dep.graph
+        elif dep.graph is not self.graph:
+            raise ValueError('options belong to different dependency graphs')
+        self.graph.add_dependency(self, dep)
+
+    def activate_dependencies(self, satisfied=True):
+        '''Tell the options depending on this one that it has been set (or unset), which
+        enables (or disables) them and anything depending on them in turn.
+        '''
+        if self.graph is not None:
+            self.graph.set_satisfied(self, satisfied)
+
+
+class BoolOptionModel(ArgparseOptionModel):
+    '''A flag, with the value being that of the checkbutton representing it.  See
+    ArgparseBoolOption for the details of store_true vs store_false.
+    '''
+    kind = BOOL
+    __slots__ = ()
+
+    def onvalue(self):
+        if isinstance(self.option, argparse._StoreFalseAction):
+            return 0
+        return 1
+
+    def offvalue(self):
+        return 1 - self.onvalue()
+
+    def checked(self):
+        '''Whether the checkbutton is at its onvalue, meaning that the flag is given'''
+        try:
+            return int(self.value) == self.onvalue()
+        except (TypeError, ValueError):
+            #e.g. the None default of a store_const
+            return False
+
+    def make_string(self):
+        if self.checked():
+            return [ self.output_arg ]
+        else:
+            return []
+
+
+class StringOptionModel(ArgparseOptionModel):
+    '''Free text, with the value being the string as it would be typed into an Entry'''
+    kind = STRING
+    __slots__ = ()
+
+    def default_value(self):
+        default = self.option.default
+        if not default:
+            return ''
+        if isinstance(default, list):
+            return ' '.join([str(val) for val in default])
+        return str(default)
+
+    def label_string(self):
+        label = self.extract_label_from_help()
+        req_string = 'REQ: ' if self.option.required else ''
+        label = req_string + label
+
+        if isinstance(self.nargs, int):
+            label += ' (%d values expected)' % self.nargs
+        elif self.nargs in [ '*', '+' ]:
+            label += ' (multiple values allowed)'
+        return label
+
+    def append_to_default(self):
+        '''The ArgparseActionAppendToDefault appends whatever appears on the command line
+        to the default, so the default values shown in the entry must not be passed again.
+        '''
+        return isinstance(self.option, ArgparseActionAppendToDefault) and isinstance(self.option.default, list)
+
+    def make_string(self):
+        return_string = []
+        if self.append_to_default():
+            #only the values beyond the defaults need to be passed
+            splt = shlex.split(self.value)
+            num_default = len(self.option.default)
+            if splt[:num_default] == [str(val) for val in self.option.default]:
+                splt = splt[num_default:]
+            if not splt:
+                return return_string
+            if self.output_arg is not None:
+                return_string.append(self.output_arg)
+            if self.nargs and takes_multiple_values(self.nargs):
+                return_string.extend(splt)
+            else:
+                return_string.append(' '.join(splt))
+        elif self.value:
+            #output_arg is None for positional arg
+            if self.output_arg is not None:
+                return_string.append(self.output_arg)
+
+            if self.nargs and takes_multiple_values(self.nargs):
+                #shlex.split here properly leaves quoted strings unsplit
+                splt = shlex.split(self.value)
+                #this is an annoying special case, where a leading "-" in an argument has to
+                #have double quotes explicitly embedded in the string
+                for num, s in enumerate(splt):
+                    if s[0] == '-':
+                        splt[num] = '"' + s + '"'
+
+                return_string.extend(splt)
+            else:
+                return_string.append(self.value)
+        return return_string
+
+
+class ChoiceOptionModel(ArgparseOptionModel):
+    '''One of a fixed set of choices'''
+    kind = CHOICE
+    __slots__ = ()
+
+    def choices(self):
+        return list(self.option.choices)
+
+    def label_string(self):
+        req_string = 'REQ: ' if self.option.required else ''
+        return req_string + self.extract_label_from_help()
+
+    def make_string(self):
+        return_string = []
+        if self.value:
+            if self.output_arg is not None:
+                return_string.append(self.output_arg)
+            return_string.append(str(self.value))
+        return return_string
+
+
+class FileOptionModel(ArgparseOptionModel):
+    '''One or more file paths, chosen with a file dialog.  The value is a FileList.'''
+    kind = FILE
+    __slots__ = ('file_check', 'checking')
+
+    def __init__(self, option):
+        ArgparseOptionModel.__init__(self, option)
+        #a FileCheckSummary for the current files, see tkarg.filecheck
+        self.file_check = None
+        #number of files checked so far while a check is in progress, otherwise None
+        self.checking = None
+
+    def default_value(self):
+        return FileList()
+
+    def set_file_check(self, summary, checking=None):
+        self.file_check = summary
+        self.checking = checking
+        if self.view is not None and hasattr(self.view, 'show_file_check'):
+            self.view.show_file_check()
+
+    def file_check_text(self):
+        '''Short description of the result of checking the files, if any'''
+        if self.checking is not None:
+            return 'checking files (%d of %d done)' % (self.checking, len(self.value))
+        if self.file_check is not None:
+            return self.file_check.describe()
+        return ''
+
+    def set_value(self, value):
+        #the FileList is changed in place, since views and callbacks may hold on to it
+        self.value.clear()
+        self.value.extend(value)
+        self.changed()
+
+    def label_string(self):
+        return self.option.help or self.extract_label_from_help()
+
+    def multiple(self):
+        return bool(self.nargs) and takes_multiple_values(self.nargs)
+
+    def base_directory(self):
+        '''The directory that relative paths are relative to, None for the current one'''
+        return self.form.cwd if self.form is not None else None
+
+    def dialog_kind(self):
+        '''Which dialog should be used to choose the file(s): 'open', 'open_multiple' or 'save' '''
+        option = self.option
+        if option.type and hasattr(option.type, "_mode"):
+            #a mode would be here if the option is specified a file to argparse, rather than the path to a file
+            if 'w' in option.type._mode and 'r' not in option.type._mode:
+                return 'save'
+        #this is obviously a total hack, and depends on the "destination" variable name assigned in argparse
+        elif 'out' in option.dest.lower():
+            return 'save'
+        if self.multiple():
+            return 'open_multiple'
+        return 'open'
+
+    def add_files(self, paths):
+        '''Add paths not already chosen, returning the number added'''
+        #dialogs return an empty string or tuple when cancelled, which FileList ignores
+        added = self.value.extend(paths)
+        if added:
+            self.changed()
+        return added
+
+    def remove_files(self, paths):
+        '''Remove paths from those chosen, disabling any options depending on this one if
+        none are left.  Returns the number removed.
+        '''
+        removed = self.value.discard(paths)
+        if removed:
+            self.changed()
+            if self.view is not None:
+                self.view.show_value()
+            if not self.value:
+                self.activate_dependencies(False)
+        return removed
+
+    def clear_files(self):
+        return self.remove_files(list(self.value))
+
+    def make_string(self):
+        return_string = []
+        if self.value:
+            if self.output_arg:
+                return_string.append(self.output_arg)
+            return_string.extend(self.value)
+        return return_string
+
+
+class SubcommandOptionModel(ArgparseOptionModel):
+    '''The subcommand of a parser with subparsers, with the value being the name of the
+    chosen one.  The options of each subcommand are held in an ArgparseOptionForm of 
+    their own, which is only built when that subcommand is first chosen, and kept so that
+    switching back to it is instant.  Only the forms of the max_forms most recently chosen
+    subcommands are kept.  When one is evicted the values that were changed in it are 
+    kept instead, and set again if it is built again.
+    '''
+    kind = SUBCOMMAND
+    __slots__ = ('forms', 'saved_values', 'max_forms')
+
+    def __init__(self, option, max_forms=4):
+        ArgparseOptionModel.__init__(self, option)
+        #name -> form, least recently chosen first
+        self.forms = OrderedDict()
+        #name -> values changed in an evicted form, see ArgparseOptionForm.changed_values
+        self.saved_values = {}
+        self.max_forms = max_forms
+
+    def default_value(self):
+        #subcommands are required in python 2, so start with the first
+        choices = self.choices()
+        return choices[0] if choices else None
+
+    def choices(self):
+        return list(self.option.choices)
+
+    def label_string(self):
+        return self.option.help or 'SUBCOMMAND'
+
+    def get_form(self, name):
+        '''The form for the options of subcommand name, built if need be'''
+        try:
+            form = self.forms.pop(name)
+        except KeyError:
+            form = ArgparseOptionForm(self.option.choices[name], cwd=self.form.cwd if self.form is not None else None)
+            #so that e.g. validation sees changes to the options of the subcommand too
+            if self.form is not None:
+                form.add_listener(self.form.value_changed)
+            for key, value in self.saved_values.pop(name, {}).items():
+                form.set_value(key, value)
+        self.forms[name] = form
+
+        while len(self.forms) > self.max_forms:
+            self.evict(next(iter(self.forms)))
+        return form
+
+    def evict(self, name):
+        '''Drop the form of subcommand name, keeping only the values changed in it'''
+        form = self.forms.pop(name)
+        changed = form.changed_values()
+        if changed:
+            self.saved_values[name] = changed
+        if self.view is not None and hasattr(self.view, 'form_evicted'):
+            self.view.form_evicted(name)
+
+    def active_models(self):
+        '''The models of the options of the chosen subcommand'''
+        if not self.value:
+            return []
+        return self.get_form(self.value).active_models()
+
+    def file_versions(self):
+        '''The versions of the FileLists of the chosen subcommand's options, so that files
+        changed there are noticed by the parent form.  None if its form isn't built yet.
+        '''
+        form = self.forms.get(self.value)
+        if form is None:
+            return None
+        return form.current_file_versions()
+
+    def make_string(self):
+        if not self.value:
+            return []
+        return [self.value] + self.get_form(self.value).make_commandline_list()
+
+
+MODEL_CLASSES = {
+        BOOL:BoolOptionModel,
+        STRING:StringOptionModel,
+        CHOICE:ChoiceOptionModel,
+        FILE:FileOptionModel,
+        SUBCOMMAND:SubcommandOptionModel
+        }
+
+
+def make_option_model(option):
+    '''Create the model for an argparse action, or return None if the action has no
+    gui representation.  Raises ValueError for actions that can't be handled.
+    '''
+    kind = classify_action(option)
+    if kind is None:
+        return None
+    return MODEL_CLASSES[kind](option)
+
+
+def ordered_action_groups(parser):
+    '''First group is positional, second is optional, then any user defined groups.
+    Optional group includes any flags not explictly placed in a group.
+    This reorders them such that the optional group will appear last.
+    '''
+    group_list = [parser._action_groups[0]]
+    if len(parser._action_groups) > 2:
+        group_list.extend(parser._action_groups[2:])
+    group_list.append(parser._action_groups[1])
+    return group_list
+
+
+class ArgparseOptionForm(object):
+    '''The models for all of the options of a parser that would appear in an ArgparseGui,
+    without any gui.  Values can be set on the models directly or with set_value, and the 
+    command line that the gui would produce is made with make_commandline_list.  
+
+    option_list is keyed as in ArgparseGui, i.e. by the last option string of each 
+    action, or positional0, positional1, ... for positional arguments.
+
+    The command line strings of each option are kept until the option's value changes, 
+    and the whole command line until any does, so make_commandline_list may be called 
+    as often as wanted, e.g. to preview the command line as it's edited, and only does
+    the work for the options that have changed.  Changes are noticed through 
+    ArgparseOptionModel.changed, which set_value and the gui's variable traces call, and 
+    for files by the version of their FileList.
+    '''
+    def __init__(self, parser, schema=None, cwd=None):
+        '''
+        schema - optional schema from tkarg.schemacache, which already records the kind, 
+            key and wrapped labels of each action, so the actions need not be examined
+        cwd - the directory that relative paths of files are relative to, i.e. where the
+            script will be run, if not the current directory
+        '''
+        self.parser = parser
+        self.cwd = cwd
+        self.dependencies = DependencyGraph()
+        #callables taking a model, called whenever the value of one is set
+        self.listeners = []
+        self.option_list = {}
+        self.dest_list = {}
+        #action -> model, so that gui widgets can be made as views over the models
+        self.action_models = {}
+        #model -> (fragment_version, command line strings) for unchanged options
+        self.fragments = {}
+        #the whole command line as last made, while no option has changed since
+        self.commandline = None
+        self.file_versions = None
+
+        if schema is not None:
+            for entry in schema['options']:
+                model = MODEL_CLASSES[entry['kind']](parser._actions[entry['action']])
+                for width, label in entry['labels'].items():
+                    model.cache_label(int(width), label)
+                self.add_model(entry['key'], model)
+        else:
+            positional_num = 0
+            for group in ordered_action_groups(parser):
+                if hasattr(group, 'GUI_IGNORE'):
+                    continue
+                for option in group._group_actions:
+                    if option in self.action_models:
+                        continue
+                    model = make_option_model(option)
+                    if model is None:
+                        continue
+
+                    if option.option_strings:
+                        self.add_model(option.option_strings[-1], model)
+                    else:
+                        self.add_model('positional%d' % positional_num, model)
+                        positional_num += 1
+
+        #optionals in the order they were added to the parser, then positionals in order
+        ordered = [action for action in parser._actions if action in self.action_models]
+        self.optionals = [self.action_models[action] for action in ordered if action.option_strings]
+        self.positionals = [self.action_models[action] for action in ordered if not action.option_strings]
+        self.models = self.optionals + self.positionals
+        self.file_models = [model for model in self.models if model.kind == FILE]
+        self.subcommand_models = [model for model in self.models if model.kind == SUBCOMMAND]
+
+    def add_model(self, key, model):
+        model.graph = self.dependencies
+        model.form = self
+        self.action_models[model.option] = model
+        self.dest_list[model.option.dest] = model
+        self.option_list[key] = model
+
+    def get_option(self, key):
+        '''Look up a model by flag (or positionalN), or failing that by dest'''
+        try:
+            return self.option_list[key]
+        except KeyError:
+            return self.dest_list[key]
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def value_changed(self, model):
+        self.fragments.pop(model, None)
+        self.commandline = None
+        if model.form is not self:
+            #an option of a subcommand, whose command line strings are part of the subcommand's
+            for subcommand in self.subcommand_models:
+                self.fragments.pop(subcommand, None)
+        for listener in self.listeners:
+            listener(model)
+
+    def errors(self):
+        '''(model, message) for each option whose value is known to be invalid'''
+        return [(model, model.error) for model in self.active_models() if model.error]
+
+    def active_models(self):
+        '''The models of this form, and of the chosen subcommand if there is one'''
+        models = list(self.models)
+        for model in self.models:
+            if model.kind == SUBCOMMAND:
+                models.extend(model.active_models())
+        return models
+
+    def changed_values(self):
+        '''dict of key -> value of the options whose values have been changed from the 
+        default, which can be set on another form for the same parser with set_value
+        '''
+        changed = {}
+        for key, model in self.option_list.items():
+            value = model.value
+            if value != model.default_value():
+                changed[key] = list(value) if model.kind == FILE else value
+        return changed
+
+    def set_value(self, key, value):
+        model = self.get_option(key)
+        if model.kind == FILE and not isinstance(value, list):
+            value = [value]
+        elif model.kind == BOOL and isinstance(value, bool):
+            #True means that the flag is given, which for store_false is the offvalue
+            value = model.onvalue() if value else model.offvalue()
+        model.set_value(value)
+
+    def fragment_version(self, model):
+        '''What besides a call to changed says that model's command line strings are out of
+        date, i.e. the version of a FileList, or those of the chosen subcommand's options'''
+        if model.kind == FILE:
+            return model.value.version
+        if model.kind == SUBCOMMAND:
+            return model.file_versions()
+        return None
+
+    def fragment(self, model):
+        '''The command line strings of model, only made again if it has changed'''
+        version = self.fragment_version(model)
+        cached = self.fragments.get(model)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        fragment = model.make_string()
+        self.fragments[model] = (version, fragment)
+        return fragment
+
+    def current_file_versions(self):
+        '''The versions of the FileLists of this form and of the chosen subcommand'''
+        versions = [model.value.version for model in self.file_models]
+        for model in self.subcommand_models:
+            versions.append((model.value, model.file_versions()))
+        return versions
+
+    def make_commandline_list(self, overrides=None):
+        '''Convert the values of all of the models into the list of command line strings 
+        that would be passed to ArgumentParser.parse_args.  A new list is returned each 
+        time, which the caller may change.  Raises ValueError if the values can't be put
+        on a command line that would parse back to them, e.g. text with an unclosed quote.
+
+        overrides - optional dict of model -> another model to take the value from instead,
+            e.g. to make the command lines of a sweep without touching the form
+        '''
+        if overrides:
+            make_string = lambda model: overrides.get(model, model).make_string()
+        else:
+            if self.commandline is not None and self.file_versions == self.current_file_versions():
+                return list(self.commandline)
+            make_string = self.fragment
+
+        fragments = []
+        for model in self.optionals:
+            fragment = make_string(model)
+            if fragment:
+                fragments.append((model.nargs in ['?', '*', '+'], fragment))
+
+        positional_list = []
+        subcommand = False
+        for model in self.positionals:
+            positional_list.extend(make_string(model))
+            subcommand = subcommand or model.kind == SUBCOMMAND
+        if subcommand:
+            #after --, the subcommand would take its own options as positionals, and an 
+            #option taking a variable number of values would take the subcommand as one of
+            #them.  So join single values to their flags as --flag=value, after which 
+            #argparse takes no more, and put options still taking several values before the
+            #others, so that one of the others ends them.
+            for num, (variable, fragment) in enumerate(fragments):
+                if variable and len(fragment) == 2:
+                    fragments[num] = (False, [fragment[0] + '=' + fragment[1]])
+            fragments.sort(key=lambda item: not item[0])
+            if fragments and fragments[-1][0]:
+                raise ValueError('%s: several values can only be given before the subcommand if an option '
+                        'taking a fixed number of values is also set' % fragments[-1][1][0])
+
+        return_list = []
+        for variable, fragment in fragments:
+            return_list.extend(fragment)
+        if positional_list:
+            if fragments and fragments[-1][0] and not subcommand:
+                #otherwise the last optional would swallow the positionals
+                return_list.append('--')
+            return_list.extend(positional_list)
+
+        if not overrides:
+            self.commandline = return_list
+            self.file_versions = self.current_file_versions()
+            return list(return_list)
+        return return_list
+
+
+def make_commandline_list(parser, values=None):
+    '''Headless equivalent of filling in and closing an ArgparseGui.  values is a dict
+    keyed by flag, positionalN or dest, with values as they would be entered in the gui, 
+    i.e. text for strings, a choice, True/False for flags or a list of paths for files.
+    '''
+    form = ArgparseOptionForm(parser)
+    for key, value in (values or {}).items():
+        form.set_value(key, value)
+    return form.make_commandline_list()
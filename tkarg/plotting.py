@@ -0,0 +1,240 @@
+'''Line plots of very long series on the canvas panes of a ResultsWindow.
+
+A canvas can't cope with an item per point of a series with millions of points, and
+can't show more than one point per pixel column anyway.  So each series is reduced to
+the minimum and maximum of the points falling in each pixel column of the part being
+shown, which draws exactly the same envelope, and is drawn as a single line item with
+at most two vertices per column.  The reduction is done again whenever the pane is
+resized or zoomed, so zooming in shows the detail.
+
+NumPy is used for the reduction if it can be imported, otherwise a slower pure Python
+reduction is used.  Series are sorted by x once, when added.  Nothing in this module
+imports Tkinter, a SeriesPlot just needs a canvas.
+'''
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def decimate(x, y, x_min, x_max, columns):
+    '''Reduce the points of a series with sorted x to the minimum and maximum y within
+    each of columns equal divisions of x_min to x_max.  Returns a list of
+    (column, y_min, y_max), for the columns containing points.
+    '''
+    if columns <= 0 or x_max <= x_min:
+        return []
+    if numpy is not None and isinstance(x, numpy.ndarray):
+        return decimate_numpy(x, y, x_min, x_max, columns)
+
+    import bisect
+    scale = columns / float(x_max - x_min)
+    start = bisect.bisect_left(x, x_min)
+    stop = bisect.bisect_right(x, x_max)
+    result = []
+    current = None
+    for index in xrange(start, stop):
+        column = min(int((x[index] - x_min) * scale), columns - 1)
+        value = y[index]
+        if column != current:
+            if current is not None:
+                result.append((current, low, high))
+            current, low, high = column, value, value
+        elif value < low:
+            low = value
+        elif value > high:
+            high = value
+    if current is not None:
+        result.append((current, low, high))
+    return result
+
+
+def decimate_numpy(x, y, x_min, x_max, columns):
+    start = numpy.searchsorted(x, x_min, side='left')
+    stop = numpy.searchsorted(x, x_max, side='right')
+    if stop <= start:
+        return []
+    x, y = x[start:stop], y[start:stop]
+    #index of the first point in each column, for the columns that have any points
+    edges = x_min + (x_max - x_min) * numpy.arange(columns) / float(columns)
+    bounds = numpy.searchsorted(x, edges, side='left')
+    occupied = numpy.nonzero(numpy.diff(numpy.append(bounds, len(x))) > 0)[0]
+    starts = bounds[occupied]
+    lows = numpy.minimum.reduceat(y, starts)
+    highs = numpy.maximum.reduceat(y, starts)
+    return zip(occupied.tolist(), lows.tolist(), highs.tolist())
+
+
+def sort_series(x, y):
+    '''Return x and y ordered by x, as arrays if NumPy is available'''
+    if numpy is not None:
+        x = numpy.asarray(x, dtype=float)
+        y = numpy.asarray(y, dtype=float)
+        if len(x) > 1 and numpy.any(x[1:] < x[:-1]):
+            order = numpy.argsort(x, kind='mergesort')
+            x, y = x[order], y[order]
+        return x, y
+    x, y = list(x), list(y)
+    #series are usually in order already, which is much quicker to check than to sort
+    if any(x[index] > x[index + 1] for index in xrange(len(x) - 1)):
+        order = sorted(xrange(len(x)), key=x.__getitem__)
+        x, y = [x[index] for index in order], [y[index] for index in order]
+    return x, y
+
+
+class Series(object):
+    def __init__(self, x, y, color, width):
+        self.x, self.y = sort_series(x, y)
+        self.color = color
+        self.width = width
+        #the canvas line item, reused for each redraw
+        self.item = None
+
+    def x_range(self):
+        if not len(self.x):
+            return None
+        return self.x[0], self.x[len(self.x) - 1]
+
+
+class SeriesPlot(object):
+    '''Plot of one or more series on a canvas, redrawn at pixel resolution whenever
+    the canvas is resized or the view is zoomed.  The mouse wheel zooms in and out
+    around the pointer, and a double click shows everything again.
+
+    canvas - a Tk Canvas, e.g. from ResultsWindow.add_canvas_pane
+    y_limits - (y_min, y_max) to fix the y axis, otherwise it fits the data in view
+    margin - pixels left around the plot
+    '''
+    def __init__(self, canvas, y_limits=None, margin=10):
+        self.canvas = canvas
+        self.y_limits = y_limits
+        self.margin = margin
+        self.series = []
+        #the part of x being shown, or None for all of it
+        self.view = None
+        self.redraw_pending = False
+        self.frame_item = None
+        self.label_items = []
+
+        canvas.bind('<Configure>', self.schedule_redraw, add='+')
+        for event in ('<MouseWheel>', '<Button-4>', '<Button-5>'):
+            canvas.bind(event, self.on_wheel, add='+')
+        canvas.bind('<Double-Button-1>', lambda event: self.set_view(None), add='+')
+
+    def add_series(self, x, y=None, color='blue', width=1):
+        '''Add a series, with y plotted against x, or against its index if y isn't given'''
+        if y is None:
+            y = x
+            x = numpy.arange(len(y)) if numpy is not None else range(len(y))
+        series = Series(x, y, color, width)
+        self.series.append(series)
+        self.schedule_redraw()
+        return series
+
+    def full_range(self):
+        ranges = [series.x_range() for series in self.series]
+        ranges = [found for found in ranges if found is not None]
+        if not ranges:
+            return None
+        return min(low for low, high in ranges), max(high for low, high in ranges)
+
+    def set_view(self, view):
+        '''Show x from view[0] to view[1], or everything if view is None'''
+        self.view = view
+        self.schedule_redraw()
+
+    def zoom(self, factor, center=None):
+        '''Zoom in (factor < 1) or out (factor > 1) around center, an x value'''
+        shown = self.view or self.full_range()
+        if shown is None:
+            return
+        low, high = shown
+        if center is None:
+            center = (low + high) / 2.0
+        low = center - (center - low) * factor
+        high = center + (high - center) * factor
+        full = self.full_range()
+        if low <= full[0] and high >= full[1]:
+            self.set_view(None)
+        else:
+            self.set_view((low, high))
+
+    def plot_area(self):
+        '''(left, top, right, bottom) of the area inside the margin, in pixels'''
+        width, height = self.canvas.winfo_width(), self.canvas.winfo_height()
+        #before the canvas is first shown it has no size, so use the size requested
+        if width <= 1 or height <= 1:
+            width, height = int(self.canvas.cget('width')), int(self.canvas.cget('height'))
+        return self.margin, self.margin, width - self.margin, height - self.margin
+
+    def on_wheel(self, event):
+        left, top, right, bottom = self.plot_area()
+        shown = self.view or self.full_range()
+        if shown is None or right <= left:
+            return
+        center = shown[0] + (shown[1] - shown[0]) * (event.x - left) / float(right - left)
+        zoom_in = event.num == 4 or event.delta > 0
+        self.zoom(0.8 if zoom_in else 1.25, center)
+
+    def schedule_redraw(self, event=None):
+        #a drag resize or a spin of the wheel gives many events, only redraw once for them
+        if not self.redraw_pending:
+            self.redraw_pending = True
+            self.canvas.after_idle(self.redraw)
+
+    def redraw(self):
+        self.redraw_pending = False
+        shown = self.view or self.full_range()
+        left, top, right, bottom = self.plot_area()
+        columns = int(right - left)
+        if shown is None or columns <= 0 or bottom <= top:
+            return
+        x_min, x_max = shown
+        if x_max <= x_min:
+            x_max = x_min + 1
+
+        reduced = [decimate(series.x, series.y, x_min, x_max, columns) for series in self.series]
+        if self.y_limits is not None:
+            y_min, y_max = self.y_limits
+        else:
+            lows = [low for columns_found in reduced for column, low, high in columns_found]
+            highs = [high for columns_found in reduced for column, low, high in columns_found]
+            if not lows:
+                y_min, y_max = 0.0, 1.0
+            else:
+                y_min, y_max = min(lows), max(highs)
+        if y_max <= y_min:
+            y_max = y_min + 1
+        y_scale = (bottom - top) / float(y_max - y_min)
+
+        for series, columns_found in zip(self.series, reduced):
+            coords = []
+            for column, low, high in columns_found:
+                px = left + column
+                coords.extend((px, bottom - (low - y_min) * y_scale, px, bottom - (high - y_min) * y_scale))
+            if len(coords) == 2:
+                coords.extend(coords)
+            if series.item is None:
+                series.item = self.canvas.create_line(0, 0, 0, 0, fill=series.color, width=series.width)
+            if coords:
+                self.canvas.coords(series.item, *coords)
+                self.canvas.itemconfigure(series.item, state='normal')
+            else:
+                self.canvas.itemconfigure(series.item, state='hidden')
+
+        self.draw_frame(left, top, right, bottom, x_min, x_max, y_min, y_max)
+
+    def draw_frame(self, left, top, right, bottom, x_min, x_max, y_min, y_max):
+        if self.frame_item is None:
+            self.frame_item = self.canvas.create_rectangle(left, top, right, bottom, outline='gray')
+            self.label_items = [self.canvas.create_text(0, 0, fill='gray', font=('TkDefaultFont', 8)) for num in range(4)]
+        self.canvas.coords(self.frame_item, left, top, right, bottom)
+        positions = [(left, bottom, 'sw', x_min), (right, bottom, 'se', x_max),
+                (left, top, 'nw', y_max), (left, bottom - 12, 'sw', y_min)]
+        for item, (px, py, anchor, value) in zip(self.label_items, positions):
+            self.canvas.coords(item, px + 2, py)
+            self.canvas.itemconfigure(item, anchor=anchor, text='%.4g' % value)
+
+    def item_count(self):
+        '''Number of canvas items used, which doesn't depend on the length of the series'''
+        return len(self.series) + (1 + len(self.label_items) if self.frame_item is not None else 0)
@@ -0,0 +1,117 @@
+'''A live preview of the command line an ArgparseGui will produce, shell quoted so it
+can be copied into a job script.
+
+The CommandPreview is a listener of the form, so it hears of every change to an option.
+Changes are gathered up and the preview brought up to date at most once a frame.  Each
+update compares the new command line with the one shown, and only the tokens between
+the parts that are the same at the start and end are quoted again and replaced in the
+Text widget, so typing into one option of a very large form only touches the text of
+that option.  Nothing in this module imports Tkinter, a CommandPreview just needs a
+Text widget.
+'''
+from array import array
+from pipes import quote
+
+
+def changed_span(old, new):
+    '''(start, old_stop, new_stop) such that old[start:old_stop] would have to be
+    replaced by new[start:new_stop] to make new, with the parts before and after the
+    same in both.
+    '''
+    start = 0
+    limit = min(len(old), len(new))
+    while start < limit and old[start] == new[start]:
+        start += 1
+    old_stop, new_stop = len(old), len(new)
+    while old_stop > start and new_stop > start and old[old_stop - 1] == new[new_stop - 1]:
+        old_stop -= 1
+        new_stop -= 1
+    return start, old_stop, new_stop
+
+
+class CommandPreview(object):
+    '''Show the command line of form, as command followed by the shell quoted arguments,
+    in text_widget, keeping it up to date as options change.
+
+    command - list of the strings to show before the arguments, e.g. ['python', script]
+
+    interval - milliseconds to wait after a change before updating, during which any
+        further changes are gathered into the same update
+    '''
+    def __init__(self, text_widget, form, command, interval=16):
+        self.widget = text_widget
+        self.form = form
+        self.interval = interval
+        self.scheduled = None
+        self.updates = 0
+
+        #the arguments shown, and the text of each as it appears in the widget, which is
+        #the command for the first and a space and the quoted argument for the others
+        self.argv = []
+        self.pieces = [' '.join(quote(part) for part in command)]
+        #start of each piece in the text, as a number of characters
+        self.starts = array('l', [0])
+        self.replace(0, 0, self.pieces[0])
+
+        form.add_listener(self.value_changed)
+        self.update()
+
+    def value_changed(self, model):
+        if self.scheduled is None:
+            self.scheduled = self.widget.after(self.interval, self.update)
+
+    def update(self):
+        self.scheduled = None
+        try:
+            argv = self.form.make_commandline_list()
+        except ValueError:
+            #e.g. an unclosed quote in an option taking several values, which the validator
+            #points out, so leave the last good command line showing until it's fixed
+            return
+        start, old_stop, new_stop = changed_span(self.argv, argv)
+        if start == old_stop == new_stop:
+            return
+        self.updates += 1
+
+        #the pieces are offset by one for the command
+        first, old_last = start + 1, old_stop + 1
+        new_pieces = [' ' + quote(arg) for arg in argv[start:new_stop]]
+        text_start = self.starts[first] if first < len(self.starts) else self.text_length()
+        text_stop = self.starts[old_last] if old_last < len(self.starts) else self.text_length()
+        self.replace(text_start, text_stop, ''.join(new_pieces))
+
+        self.pieces[first:old_last] = new_pieces
+        self.argv = argv
+        #only the starts from the first changed piece on move
+        del self.starts[first:]
+        position = text_start
+        for piece in self.pieces[first:]:
+            self.starts.append(position)
+            position += len(piece)
+
+    def text_length(self):
+        return self.starts[-1] + len(self.pieces[-1])
+
+    def replace(self, start, stop, text):
+        self.widget.config(state='normal')
+        if stop > start:
+            self.widget.delete('1.0 + %d chars' % start, '1.0 + %d chars' % stop)
+        if text:
+            self.widget.insert('1.0 + %d chars' % start, text)
+        self.widget.config(state='disabled')
+
+    def command(self):
+        '''The command as shown'''
+        return ''.join(self.pieces)
+
+    def copy(self):
+        '''Put the command on the clipboard'''
+        self.flush()
+        self.widget.clipboard_clear()
+        self.widget.clipboard_append(self.command())
+
+    def flush(self):
+        '''Bring the preview up to date now, rather than waiting for the next update'''
+        if self.scheduled is not None:
+            self.widget.after_cancel(self.scheduled)
+            self.update()
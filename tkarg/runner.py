@@ -0,0 +1,357 @@
+'''Run the script wrapped by an ArgparseGui as child processes, rather than in the same
+process as the gui.
+
+Each press of RUN starts the script with the command line made by the gui, while the
+form stays open and editable for the next run.  Runs are started through the gui's
+thread executor (see ArgparseGui.get_thread_executor), so up to max_tasks of them go at
+once and the rest wait their turn, even if the gui's own tasks run in processes.  The
+stdout and stderr of each run are read on worker threads and streamed through the
+executor's dispatcher into a window of their own, so the gui never blocks on a child.
+A child writing to a pipe rather than a terminal will usually buffer its output in
+blocks, so children are run with PYTHONUNBUFFERED set, which makes Python scripts write
+each line as it is printed.  Other programs may still hold their output back until
+they flush it or exit.
+
+A SweepRunner instead starts one child for each combination of values of a sweep (see
+tkarg.sweep), listing them in a table with the status of each.
+'''
+import os
+import sys
+import itertools
+import threading
+import subprocess
+from Tkinter import *
+
+
+def unbuffered_environment():
+    '''The environment for a child, with Python told not to buffer its output'''
+    env = dict(os.environ)
+    env['PYTHONUNBUFFERED'] = '1'
+    return env
+
+
+class RunPane(Toplevel):
+    '''Window showing the output of a single run, with stderr in red'''
+    def __init__(self, tk_parent, title, width=100, height=30):
+        Toplevel.__init__(self, tk_parent)
+        self.title(title)
+
+        self.status = Label(self, text='Waiting to start', anchor='w')
+        self.status.grid(row=0, column=0, sticky='W')
+        self.kill_button = Button(self, text='KILL', state=DISABLED)
+        self.kill_button.grid(row=0, column=1, sticky='E')
+
+        self.text = Text(self, width=width, height=height)
+        self.text.tag_config('stderr', foreground='red')
+        self.scrollbar = Scrollbar(self, orient='vertical', command=self.text.yview)
+        self.text.configure(yscrollcommand=self.scrollbar.set)
+        self.text.grid(row=1, column=0, sticky='NSEW')
+        self.scrollbar.grid(row=1, column=1, sticky='NS')
+        self.rowconfigure(1, weight=1)
+        self.columnconfigure(0, weight=1)
+
+    def append(self, text, stream='stdout'):
+        #only follow the output if the view was already at the end
+        at_end = self.text.yview()[1] >= 1.0
+        self.text.insert(END, text, (stream,))
+        if at_end:
+            self.text.see(END)
+
+
+class ChildRun(object):
+    '''A single run of the wrapped script'''
+    def __init__(self, number, command, pane):
+        self.number = number
+        self.command = command
+        self.pane = pane
+        self.process = None
+        self.future = None
+        self.returncode = None
+        #kill() takes this while checking for the child, so it can't start unseen
+        self.lock = threading.Lock()
+        self.cancelled = False
+        #(stream, line) read from the child but not yet shown, see queue_output
+        self.output = []
+        self.output_lock = threading.Lock()
+
+    def execute(self, progress):
+        '''Runs on a worker.  Start the child and queue its output to be shown, returning
+        its exit code, or None if it was killed before it started.
+        '''
+        with self.lock:
+            if self.cancelled:
+                return None
+            #bufsize only affects this end of the pipes, the child needs telling too
+            self.process = subprocess.Popen(self.command, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                    bufsize=1, universal_newlines=True, env=unbuffered_environment())
+        progress(('started', self.process.pid))
+
+        def read_stderr():
+            for line in iter(self.process.stderr.readline, ''):
+                self.queue_output(progress, 'stderr', line)
+
+        stderr_reader = threading.Thread(target=read_stderr)
+        stderr_reader.daemon = True
+        stderr_reader.start()
+        for line in iter(self.process.stdout.readline, ''):
+            self.queue_output(progress, 'stdout', line)
+        stderr_reader.join()
+        return self.process.wait()
+
+    def queue_output(self, progress, stream, line):
+        '''From the reader threads.  Lines are collected until the Tk thread gets round to
+        showing them, and only the first of them posts a progress report, so a chatty
+        child costs a few inserts per dispatch rather than one per line.
+        '''
+        with self.output_lock:
+            wake = not self.output
+            self.output.append((stream, line))
+        if wake:
+            progress(('output', None))
+
+    def show_output(self):
+        with self.output_lock:
+            output, self.output = self.output, []
+        for stream, lines in itertools.groupby(output, key=lambda item: item[0]):
+            self.pane.append(''.join(line for line_stream, line in lines), stream)
+
+    def show_progress(self, future, progress):
+        stream, value = progress
+        if stream == 'started':
+            self.pane.status.config(text='Running (pid %d): %s' % (value, ' '.join(self.command)))
+            self.pane.kill_button.config(state=NORMAL, command=self.kill)
+        else:
+            self.show_output()
+
+    def show_done(self, future):
+        self.pane.kill_button.config(state=DISABLED)
+        if future.cancelled() or (future.exception_value is None and future.result_value is None):
+            self.pane.status.config(text='Cancelled')
+        elif future.exception_value is not None:
+            self.pane.status.config(text='Failed to run: %s' % future.exception_value, foreground='red')
+        else:
+            self.returncode = future.result_value
+            self.pane.status.config(text='Finished with exit code %d' % self.returncode,
+                    foreground='red' if self.returncode else 'black')
+
+    def running(self):
+        return self.process is not None and self.process.poll() is None
+
+    def kill(self):
+        '''Drop the run if it is still queued, and otherwise terminate the child, or stop
+        it from starting if a worker has only just taken it'''
+        if self.future is not None:
+            self.future.cancel()
+        with self.lock:
+            self.cancelled = True
+            if self.running():
+                self.process.terminate()
+
+
+class SubprocessRunner(object):
+    '''Make the RUN button of an ArgparseGui start command + the gui's command line as a
+    child process.  The gui must have been made with destroy_when_done=False.
+
+    command - list, e.g. [sys.executable, 'some_script.py']
+    '''
+    def __init__(self, gui, command):
+        self.gui = gui
+        self.command = list(command)
+        self.runs = []
+        gui.on_run = self.run
+
+    def run(self, commandline_list):
+        number = len(self.runs) + 1
+        command = self.command + commandline_list
+        pane = RunPane(self.gui.tk, 'Run %d: %s' % (number, os.path.basename(self.command[-1])))
+        child = ChildRun(number, command, pane)
+        self.runs.append(child)
+
+        child.future = self.gui.get_thread_executor().submit(child.execute, pass_progress=True)
+        child.future.add_progress_callback(child.show_progress)
+        child.future.add_done_callback(child.show_done)
+        pane.kill_button.config(state=NORMAL, command=child.kill)
+        self.gui.write_to_status('Run %d queued: %s\n' % (number, ' '.join(command)))
+        return child
+
+    def terminate_all(self):
+        for child in self.runs:
+            child.kill()
+
+
+class SweepTable(Toplevel):
+    '''Window listing the runs of a sweep, with the status of each.  Double clicking a
+    finished run shows its output.
+    '''
+    COLUMNS = ('values', 'status', 'log')
+
+    def __init__(self, tk_parent, title, height=20):
+        Toplevel.__init__(self, tk_parent)
+        self.title(title)
+        #ttk is only needed for sweeps, and is slow to import
+        import ttk
+
+        self.summary = Label(self, anchor='w')
+        self.summary.grid(row=0, column=0, sticky='W')
+        self.cancel_button = Button(self, text='CANCEL ALL')
+        self.cancel_button.grid(row=0, column=1, sticky='E')
+
+        self.tree = ttk.Treeview(self, columns=self.COLUMNS, height=height)
+        self.tree.heading('#0', text='Run')
+        self.tree.column('#0', width=60, stretch=False)
+        self.tree.heading('values', text='Values')
+        self.tree.column('values', width=400)
+        self.tree.heading('status', text='Status')
+        self.tree.column('status', width=160)
+        self.tree.heading('log', text='Output')
+        self.tree.column('log', width=300)
+        self.scrollbar = Scrollbar(self, orient='vertical', command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self.scrollbar.set)
+        self.tree.grid(row=1, column=0, sticky='NSEW')
+        self.scrollbar.grid(row=1, column=1, sticky='NS')
+        self.rowconfigure(1, weight=1)
+        self.columnconfigure(0, weight=1)
+
+    def add_run(self, run, log_path):
+        return self.tree.insert('', END, text=str(run.number), values=(run.describe(), 'Queued', log_path))
+
+    def set_status(self, item, status):
+        self.tree.set(item, 'status', status)
+
+
+class SweepJob(object):
+    '''A single run of a sweep, with its output going to a log file'''
+    def __init__(self, run, command, log_path):
+        self.run = run
+        self.command = command
+        self.log_path = log_path
+        self.process = None
+        self.future = None
+        self.item = None
+        self.returncode = None
+        #kill() takes this while checking for the child, so it can't start unseen
+        self.lock = threading.Lock()
+        self.cancelled = False
+
+    def execute(self, progress):
+        '''Runs on a worker, returning the exit code of the child, or None if it was 
+        killed before it started
+        '''
+        with open(self.log_path, 'w') as log:
+            with self.lock:
+                if self.cancelled:
+                    return None
+                self.process = subprocess.Popen(self.command, stdout=log, stderr=subprocess.STDOUT)
+            progress(self.process.pid)
+            return self.process.wait()
+
+    def running(self):
+        return self.process is not None and self.process.poll() is None
+
+    def kill(self):
+        '''Terminate the child, or stop it from starting if it hasn't yet'''
+        with self.lock:
+            self.cancelled = True
+            if self.running():
+                self.process.terminate()
+
+
+class SweepRunner(object):
+    '''Make the RUN button of an ArgparseGui run a sweep (see tkarg.sweep), starting 
+    command + the command line of each combination of values as a child process.  Runs
+    go through the gui's TaskExecutor, so at most its max_tasks are running at once.
+    The gui must have been made with destroy_when_done=False and sweep=True.
+
+    command - list, e.g. [sys.executable, 'some_script.py']
+    log_dir - directory for the output of each run, by default a new temporary one per sweep
+    '''
+    def __init__(self, gui, command, log_dir=None):
+        self.gui = gui
+        self.command = list(command)
+        self.log_dir = log_dir
+        self.sweeps = []
+        self.jobs = []
+        gui.on_run = self.run
+
+    def run(self, commandline_list):
+        from tkarg.sweep import SweepPlan
+        try:
+            plan = SweepPlan(self.gui.form)
+            #made up front, since the values of a run may not make a usable command line
+            runs = list(plan.runs())
+        except ValueError as err:
+            self.gui.write_to_status('Sweep not started: %s\n' % err)
+            return None
+
+        number = len(self.sweeps) + 1
+        log_dir = self.log_dir
+        if log_dir is None:
+            import tempfile
+            log_dir = tempfile.mkdtemp(prefix='tkarg_sweep%d_' % number)
+        elif not os.path.isdir(log_dir):
+            os.makedirs(log_dir)
+
+        table = SweepTable(self.gui.tk, 'Sweep %d: %d runs of %s' % (number, plan.size(), os.path.basename(self.command[-1])))
+        jobs = []
+        counts = {'done':0, 'failed':0}
+
+        def show_summary():
+            table.summary.config(text='%d of %d finished, %d failed.  Output in %s' % (counts['done'], len(jobs), counts['failed'], log_dir))
+
+        def make_callbacks(job):
+            def show_progress(future, pid):
+                table.set_status(job.item, 'Running (pid %d)' % pid)
+
+            def show_done(future):
+                counts['done'] += 1
+                if future.cancelled() or (future.exception_value is None and future.result_value is None):
+                    table.set_status(job.item, 'Cancelled')
+                elif future.exception_value is not None:
+                    counts['failed'] += 1
+                    table.set_status(job.item, 'Failed to run: %s' % future.exception_value)
+                else:
+                    job.returncode = future.result_value
+                    if job.returncode:
+                        counts['failed'] += 1
+                    table.set_status(job.item, 'Exit code %d' % job.returncode)
+                show_summary()
+            return show_progress, show_done
+
+        executor = self.gui.get_thread_executor()
+        for run in runs:
+            job = SweepJob(run, self.command + run.commandline_list, os.path.join(log_dir, 'run%d.log' % run.number))
+            job.item = table.add_run(run, job.log_path)
+            job.future = executor.submit(job.execute, pass_progress=True)
+            show_progress, show_done = make_callbacks(job)
+            job.future.add_progress_callback(show_progress)
+            job.future.add_done_callback(show_done)
+            jobs.append(job)
+        show_summary()
+
+        by_item = dict((job.item, job) for job in jobs)
+        table.tree.bind('<Double-1>', lambda event: self.show_output(by_item.get(table.tree.focus())))
+        table.cancel_button.config(command=lambda: self.cancel(jobs))
+        self.sweeps.append(table)
+        self.jobs.extend(jobs)
+        self.gui.write_to_status('Sweep %d queued: %d runs, output in %s\n' % (number, len(jobs), log_dir))
+        return jobs
+
+    def show_output(self, job):
+        if job is None or not job.future.done() or job.returncode is None:
+            return
+        from tkarg.textstream import TextStream
+        pane = RunPane(self.gui.tk, 'Sweep run %d: %s' % (job.run.number, job.run.describe()))
+        pane.status.config(text=' '.join(job.command))
+        #logs can be large, so read them in as the widget takes them
+        log = open(job.log_path)
+        stream = TextStream(pane.text, log, on_done=lambda stream: log.close())
+        pane.text.bind('<Destroy>', lambda event: stream.cancel())
+        return stream
+
+    def cancel(self, jobs):
+        for job in jobs:
+            job.future.cancel()
+            job.kill()
+
+    def terminate_all(self):
+        self.cancel(self.jobs)
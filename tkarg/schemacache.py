@@ -0,0 +1,385 @@
+'''On-disk cache of what ArgparseGui learns by examining the actions of a parser.
+
+Building a gui means walking all of the argument groups of a parser, deciding which
+kind of widget each action needs, extracting and wrapping labels from the help strings
+and planning which column each group goes in.  The result of that walk, the schema, is
+stored as JSON in a cache directory keyed by a fingerprint of the parser's actions, so
+that later launches with an unchanged parser can skip it.
+
+The fingerprint covers everything the schema is derived from, along with the versions
+of tkarg and of the schema format, so any change to the parser simply produces a
+different key.  Working it out is itself a walk of the actions, so it is remembered on
+the parser, and a SchemaCache given the path of the script that makes the parser keeps
+an alias from the script's size and modification time and the number of actions to the
+fingerprint, so that a later launch of an unchanged script needn't work it out at all.
+Entries are also checked against the parser when they are loaded, comparing everything
+about each action and group that the schema was built from, which catches the changes 
+that the alias of a script wouldn't, such as to a parser made in another module, and 
+unreadable or mismatched entries are deleted.  The directory is shared between parsers, so it is kept under a
+total size and number of entries by evicting the least recently used entries.  Nothing in this module depends on Tkinter.
+'''
+import os
+import json
+import errno
+import hashlib
+import argparse
+from collections import OrderedDict
+
+from tkarg.optionmodel import ArgparseOptionForm, ordered_action_groups
+from tkarg.layout import LayoutPlan, GroupPlan, plan_group
+
+SCHEMA_VERSION = 3
+#the label_width that ArgparseOptionGroup uses by default
+GROUP_LABEL_WIDTH = 65
+
+
+def default_cache_directory():
+    '''TKARG_CACHE_DIR if set, otherwise the tkarg directory under XDG_CACHE_HOME or ~/.cache'''
+    if os.environ.get('TKARG_CACHE_DIR'):
+        return os.environ['TKARG_CACHE_DIR']
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'tkarg')
+
+
+def describe_type(type_func):
+    '''A stable description of an action's type=, which can't include anything like an
+    address that would change from one run to the next.
+    '''
+    if type_func is None:
+        return None
+    if isinstance(type_func, argparse.FileType):
+        return 'FileType:%s' % type_func._mode
+    return '%s:%s' % (type(type_func).__name__, getattr(type_func, '__name__', ''))
+
+
+def describe_value(value):
+    '''A stable description of a default or const.  Only simple values are described in
+    full, since the reprs of others are often not stable (e.g. open files).
+    '''
+    if value is None or isinstance(value, (bool, int, long, float, basestring)):
+        return repr(value)
+    if isinstance(value, (list, tuple)):
+        return [describe_value(item) for item in value]
+    return type(value).__name__
+
+
+def describe_action(action):
+    '''Everything about an action that its part of a schema is derived from, as JSON-able
+    lists and strings'''
+    return [
+        type(action).__module__ + '.' + type(action).__name__,
+        action.option_strings,
+        action.dest,
+        repr(action.nargs),
+        action.required,
+        action.help,
+        describe_type(action.type),
+        [str(choice) for choice in action.choices] if action.choices else None,
+        describe_value(action.const),
+        describe_value(action.default)
+        ]
+
+
+def describe_group(group, action_index):
+    return [
+        group.title,
+        hasattr(group, 'GUI_IGNORE'),
+        [action_index.get(action) for action in group._group_actions]
+        ]
+
+
+def as_loaded(description):
+    '''A description as it would be loaded back from JSON, i.e. with unicode strings'''
+    return json.loads(json.dumps(description))
+
+
+def parser_fingerprint(parser, widgets_per_column=18, label_width=60):
+    '''Hash of everything about the parser and gui settings that the schema depends on.
+    The result is remembered on the parser, and only worked out again if actions or 
+    groups have been added to it since.
+    '''
+    from tkarg import __version__
+
+    size = (len(parser._actions), len(parser._action_groups))
+    remembered = getattr(parser, '_tkarg_fingerprints', None)
+    if remembered is None:
+        remembered = parser._tkarg_fingerprints = {}
+    previous = remembered.get((widgets_per_column, label_width))
+    if previous is not None and previous[0] == size:
+        return previous[1]
+
+    description = [SCHEMA_VERSION, __version__, widgets_per_column, label_width]
+    action_index = dict((action, num) for num, action in enumerate(parser._actions))
+    for action in parser._actions:
+        description.append(describe_action(action))
+    for group in parser._action_groups:
+        description.append(describe_group(group, action_index))
+    fingerprint = hashlib.sha1(json.dumps(description, sort_keys=True).encode('utf-8')).hexdigest()
+    remembered[(widgets_per_column, label_width)] = (size, fingerprint)
+    return fingerprint
+
+
+def source_key(source, parser, widgets_per_column=18, label_width=60):
+    '''Key for the parser made by the script at path source, from the script's size and
+    modification time and the number of actions and groups, which needs no walk of the
+    actions.  None if the script can't be found.
+    '''
+    from tkarg import __version__
+
+    try:
+        stat = os.stat(source)
+    except OSError:
+        return None
+    description = [SCHEMA_VERSION, __version__, widgets_per_column, label_width, os.path.abspath(source),
+            stat.st_mtime, stat.st_size, len(parser._actions), len(parser._action_groups)]
+    return 'source-' + hashlib.sha1(json.dumps(description).encode('utf-8')).hexdigest()
+
+
+def build_schema(parser, widgets_per_column=18, label_width=60, fingerprint=None):
+    '''Walk the parser as ArgparseGui would, and record the result as a JSON-able dict.
+    Raises ValueError for actions that can't be handled.
+    '''
+    form = ArgparseOptionForm(parser)
+    action_index = dict((action, num) for num, action in enumerate(parser._actions))
+    group_index = dict((group, num) for num, group in enumerate(parser._action_groups))
+    keys = dict((model, key) for key, model in form.option_list.items())
+    plan = LayoutPlan(widgets_per_column)
+
+    schema = {
+            'schema_version':SCHEMA_VERSION,
+            'fingerprint':fingerprint or parser_fingerprint(parser, widgets_per_column, label_width),
+            'widgets_per_column':widgets_per_column,
+            'groups':[],
+            'options':[]
+            }
+
+    for group in ordered_action_groups(parser):
+        if not len(group._group_actions) or hasattr(group, 'GUI_IGNORE'):
+            continue
+        group_plan = plan_group(group, label_width=GROUP_LABEL_WIDTH)
+        plan.add_group(group_plan)
+        schema['groups'].append({
+            'group':group_index[group],
+            'description':describe_group(group, action_index),
+            'title':group_plan.title,
+            'column':group_plan.column,
+            'index_in_column':group_plan.index_in_column,
+            'num_rows':group_plan.num_rows,
+            'height':group_plan.height
+            })
+
+        row = 1
+        for option in group._group_actions:
+            model = form.action_models.get(option)
+            if model is None:
+                continue
+            schema['options'].append({
+                'action':action_index[option],
+                'dest':option.dest,
+                'help':option.help,
+                'option_strings':option.option_strings,
+                'description':describe_action(option),
+                'key':keys[model],
+                'kind':model.kind,
+                'group':group_index[group],
+                'row':row,
+                'labels':dict((str(width), model.label_text(width)) for width in set([GROUP_LABEL_WIDTH, label_width])),
+                'choices':[str(choice) for choice in model.choices()] if model.kind == 'choice' else None,
+                'dialog':model.dialog_kind() if model.kind == 'file' else None
+                })
+            row += 2 if model.kind == 'file' else 1
+
+    return schema
+
+
+def schema_matches(parser, schema):
+    '''Check that a schema was built from actions and groups just like this parser's, 
+    since one found through the alias of a script may be for a parser that has changed
+    without the script changing'''
+    try:
+        if schema['schema_version'] != SCHEMA_VERSION:
+            return False
+        for entry in schema['options']:
+            action = parser._actions[entry['action']]
+            if as_loaded(describe_action(action)) != as_loaded(entry['description']):
+                return False
+        action_index = dict((action, num) for num, action in enumerate(parser._actions))
+        for entry in schema['groups']:
+            group = parser._action_groups[entry['group']]
+            if as_loaded(describe_group(group, action_index)) != as_loaded(entry['description']):
+                return False
+    except (KeyError, IndexError, TypeError):
+        return False
+    return True
+
+
+def layout_from_schema(parser, schema):
+    '''Recreate the LayoutPlan recorded in a schema'''
+    plan = LayoutPlan(schema['widgets_per_column'])
+    for entry in schema['groups']:
+        group_plan = GroupPlan(parser._action_groups[entry['group']], entry['title'], entry['num_rows'], entry['height'])
+        group_plan.column = entry['column']
+        group_plan.index_in_column = entry['index_in_column']
+        while len(plan.columns) <= group_plan.column:
+            plan.columns.append([])
+        plan.columns[group_plan.column].append(group_plan)
+        plan.groups.append(group_plan)
+    return plan
+
+
+class SchemaCache(object):
+    '''A directory of schemas, one JSON file per parser fingerprint.
+
+    directory - where to keep the cache, see default_cache_directory
+    max_bytes, max_entries - limits on the total size and number of cached schemas,
+        beyond which the least recently used are removed
+    memory_entries - the number of the most recently used schemas to also keep in memory, 
+        for a process that opens many guis, such as tkarg.daemon
+    source - path of the script whose parser the schemas are for, if known, so that the
+        schema of an unchanged script can be found without working out the fingerprint
+    '''
+    suffix = '.json'
+
+    def __init__(self, directory=None, max_bytes=16*1024*1024, max_entries=256, memory_entries=0, source=None):
+        self.directory = directory or default_cache_directory()
+        self.source = source
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        #fingerprint -> schema, least recently used first
+        self.memory = OrderedDict()
+
+    def path(self, fingerprint):
+        return os.path.join(self.directory, fingerprint + self.suffix)
+
+    def load(self, fingerprint):
+        '''Return the cached schema, or None if it isn't cached or can't be read'''
+        path = self.path(fingerprint)
+        try:
+            with open(path) as cache_file:
+                schema = json.load(cache_file)
+        except (IOError, OSError):
+            return None
+        except ValueError:
+            #a corrupt entry, e.g. from a full disk
+            self.remove(path)
+            return None
+
+        if not isinstance(schema, dict) or schema.get('fingerprint') != fingerprint:
+            self.remove(path)
+            return None
+
+        #the modification time records when an entry was last used, for eviction
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return schema
+
+    def store(self, fingerprint, schema):
+        '''Write the schema atomically, so that other processes never see a partial entry.
+        Failure to write is not an error, the cache is just not used.
+        '''
+        try:
+            os.makedirs(self.directory)
+        except OSError as err:
+            if err.errno != errno.EEXIST:
+                return
+        #tempfile is slow to import, and only needed when the cache is missed
+        import tempfile
+        try:
+            handle, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(handle, 'w') as temp_file:
+                json.dump(schema, temp_file)
+            os.rename(temp_path, self.path(fingerprint))
+        except (IOError, OSError):
+            return
+        self.evict()
+
+    def remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def entries(self):
+        '''List of (last used time, size, path) for the cached schemas'''
+        entries = []
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return entries
+        for name in names:
+            if not name.endswith(self.suffix):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                #removed by another process
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def evict(self):
+        '''Remove the least recently used schemas until the cache is within its limits'''
+        entries = sorted(self.entries())
+        total_bytes = sum(entry[1] for entry in entries)
+        while entries and (total_bytes > self.max_bytes or len(entries) > self.max_entries):
+            mtime, size, path = entries.pop(0)
+            self.remove(path)
+            total_bytes -= size
+
+    def clear(self):
+        for mtime, size, path in self.entries():
+            self.remove(path)
+
+    def get_schema(self, parser, widgets_per_column=18, label_width=60):
+        '''Return the schema for the parser, from the cache if possible, otherwise building
+        and caching it.  Raises ValueError for actions that can't be handled.
+        '''
+        alias_key = None
+        if self.source is not None:
+            alias_key = source_key(self.source, parser, widgets_per_column, label_width)
+        if alias_key is not None:
+            #a small entry holding just the fingerprint of the schema
+            alias = self.load(alias_key)
+            if alias is not None and 'alias' in alias:
+                schema = self.find(parser, str(alias['alias']))
+                if schema is not None:
+                    return schema
+                #out of date, e.g. the parser is made by a module that has changed
+                self.remove(self.path(alias_key))
+
+        fingerprint = parser_fingerprint(parser, widgets_per_column, label_width)
+        schema = self.find(parser, fingerprint)
+        if schema is None:
+            schema = build_schema(parser, widgets_per_column, label_width, fingerprint=fingerprint)
+            self.store(fingerprint, schema)
+            self.remember(fingerprint, schema)
+        if alias_key is not None:
+            self.store(alias_key, {'fingerprint':alias_key, 'alias':fingerprint})
+        return schema
+
+    def find(self, parser, fingerprint):
+        '''The schema with this fingerprint from memory or disk if it matches the parser, 
+        otherwise None
+        '''
+        schema = self.memory.pop(fingerprint, None)
+        if schema is not None and schema_matches(parser, schema):
+            return self.remember(fingerprint, schema)
+
+        schema = self.load(fingerprint)
+        if schema is not None:
+            if schema_matches(parser, schema):
+                return self.remember(fingerprint, schema)
+            self.remove(self.path(fingerprint))
+        return None
+
+    def remember(self, fingerprint, schema):
+        '''Keep schema in memory, if memory_entries allows, and return it'''
+        if self.memory_entries:
+            self.memory[fingerprint] = schema
+            while len(self.memory) > self.memory_entries:
+                self.memory.popitem(last=False)
+        return schema
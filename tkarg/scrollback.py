@@ -0,0 +1,128 @@
+'''Append-only on-disk log of text, with an index of where each line starts.
+
+This is used to keep the full history of the status frame of an ArgparseGui out of the
+Text widget, which then only needs to hold the part being looked at.  The log is read
+back through mmap, so fetching any range of lines or searching the whole history
+doesn't load it into memory, and the line index turns line numbers into file offsets
+(and back) without scanning.  Nothing in this module depends on Tkinter.
+'''
+import os
+import re
+import mmap
+import array
+import bisect
+import tempfile
+
+
+class SpillFile(object):
+    '''Append-only text log with a line index.  Lines are numbered from 0, and the last
+    line may be incomplete, i.e. not yet ended by a newline.
+
+    path - where to keep the log, by default a temporary file that is removed by close()
+    '''
+    def __init__(self, path=None):
+        if path is None:
+            handle, path = tempfile.mkstemp(prefix='tkarg_status', suffix='.log')
+            os.close(handle)
+            self.temporary = True
+        else:
+            self.temporary = False
+        self.path = path
+        self.out = open(path, 'wb')
+        self.size = 0
+        #file offsets of the start of each line
+        self.line_starts = array.array('L', [0])
+        self.map = None
+        self.mapped_size = 0
+
+    def append(self, text):
+        if isinstance(text, unicode):
+            text = text.encode('utf-8')
+        if not text:
+            return
+        pos = text.find('\n')
+        while pos != -1:
+            self.line_starts.append(self.size + pos + 1)
+            pos = text.find('\n', pos + 1)
+        self.out.write(text)
+        self.size += len(text)
+
+    def line_count(self):
+        '''Number of lines, including an incomplete last line'''
+        if self.size > self.line_starts[-1]:
+            return len(self.line_starts)
+        return len(self.line_starts) - 1
+
+    def mapped(self):
+        '''The log mapped into memory, remapping first if it has grown'''
+        if self.map is None or self.mapped_size != self.size:
+            self.out.flush()
+            if self.map is not None:
+                self.map.close()
+                self.map = None
+            if self.size:
+                with open(self.path, 'rb') as log:
+                    self.map = mmap.mmap(log.fileno(), self.size, access=mmap.ACCESS_READ)
+            self.mapped_size = self.size
+        return self.map
+
+    def offset(self, line):
+        if line >= len(self.line_starts):
+            return self.size
+        return self.line_starts[line]
+
+    def line_at(self, offset):
+        '''The number of the line containing the file offset'''
+        return bisect.bisect_right(self.line_starts, offset) - 1
+
+    def get_lines(self, start, stop):
+        '''The text of lines start up to but not including stop'''
+        start = max(start, 0)
+        stop = min(stop, self.line_count())
+        if start >= stop:
+            return u''
+        return self.mapped()[self.offset(start):self.offset(stop)].decode('utf-8', 'replace')
+
+    def search(self, pattern, regex=False, start_line=0, max_results=None, ignore_case=False):
+        '''Return the numbers of the lines from start_line on that contain pattern, which
+        is a plain string unless regex is True.
+        '''
+        if isinstance(pattern, unicode):
+            pattern = pattern.encode('utf-8')
+        log = self.mapped()
+        if log is None:
+            return []
+        compiled = None
+        if regex or ignore_case:
+            if not regex:
+                pattern = re.escape(pattern)
+            compiled = re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+
+        lines = []
+        pos = self.offset(start_line)
+        while pos < self.size:
+            if compiled is not None:
+                match = compiled.search(log, pos)
+                found = match.start() if match else -1
+            else:
+                found = log.find(pattern, pos)
+            if found == -1:
+                break
+            line = self.line_at(found)
+            lines.append(line)
+            if max_results and len(lines) >= max_results:
+                break
+            #only report each line once
+            pos = self.offset(line + 1)
+        return lines
+
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+        self.out.close()
+        if self.temporary:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
@@ -0,0 +1,180 @@
+'''Parameter sweeps, i.e. running a script once for every combination of several values
+of some of its options.
+
+In a sweep the text of an option may stand for several values rather than one:
+
+    {a,b,c}             each of the listed values
+    {0..1..0.25}        numbers from 0 to 1 inclusive in steps of 0.25 (the step
+                        defaults to 1, and integers give integers)
+    {data/*.fasta}      each path matching the pattern, in sorted order
+    {a/*.fa,b/*.fa}     in a list, each pattern is replaced by the paths it matches
+
+Anything not wholly enclosed in braces is a single value as usual.  A SweepPlan takes
+the options of an ArgparseOptionForm whose text expands to several values and makes
+the command line for each combination of them, i.e. their cartesian product, with all
+other options as set in the form.  Nothing in this module depends on Tkinter.
+'''
+import re
+import copy
+import glob
+import itertools
+
+from tkarg.optionmodel import ArgparseOptionForm, STRING, CHOICE, FILE
+
+SPEC_PATTERN = re.compile(r'^\{(.*)\}$')
+NUMBER = r'\s*([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)\s*'
+RANGE_PATTERN = re.compile(r'^%s\.\.%s(?:\.\.%s)?$' % (NUMBER, NUMBER, NUMBER))
+GLOB_CHARACTERS = re.compile(r'[*?[]')
+
+#a mistyped step shouldn't make a sweep of millions of runs
+MAX_RANGE_VALUES = 10000
+
+
+def parse_number(text):
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def number_range(start, stop, step=None):
+    '''Values from start to stop inclusive, each passed as text'''
+    start, stop = parse_number(start), parse_number(stop)
+    step = parse_number(step) if step is not None else 1
+    if step == 0:
+        raise ValueError('the step of a range can not be 0')
+    if (stop - start) * step < 0:
+        raise ValueError('a range from %s to %s needs a step of the other sign' % (start, stop))
+
+    count = int((stop - start) / float(step) + 1e-9) + 1
+    if count > MAX_RANGE_VALUES:
+        raise ValueError('a range may have at most %d values, not %d' % (MAX_RANGE_VALUES, count))
+    if all(isinstance(num, int) for num in (start, stop, step)):
+        return [str(start + num * step) for num in xrange(count)]
+    #computing each value from the start rather than adding up steps avoids drift
+    return ['%.10g' % (start + num * step) for num in xrange(count)]
+
+
+def expand_glob(pattern):
+    '''The paths matching pattern, in sorted order.  Raises ValueError if there are none.'''
+    paths = sorted(glob.glob(pattern))
+    if not paths:
+        raise ValueError('no paths match %s' % pattern)
+    return paths
+
+
+def expand_spec(text):
+    '''The list of values that text stands for in a sweep, or None if it's just a single
+    value.  Raises ValueError for a malformed range or a pattern matching no paths.
+    '''
+    if not isinstance(text, basestring):
+        return None
+    match = SPEC_PATTERN.match(text.strip())
+    if match is None:
+        return None
+    inner = match.group(1)
+
+    match = RANGE_PATTERN.match(inner)
+    if match:
+        return number_range(*match.groups())
+    if ',' in inner:
+        values = []
+        for value in inner.split(','):
+            value = value.strip()
+            if GLOB_CHARACTERS.search(value):
+                values.extend(expand_glob(value))
+            else:
+                values.append(value)
+        return values
+    if GLOB_CHARACTERS.search(inner):
+        return expand_glob(inner.strip())
+    return None
+
+
+def sweeps(model):
+    '''Whether the value of a model is free text that may hold a sweep'''
+    return model.kind in (STRING, CHOICE)
+
+
+def variant(model, value):
+    '''A copy of model holding value, with no view, form or dependencies'''
+    other = copy.copy(model)
+    other.view = None
+    other.form = None
+    other.graph = None
+    other.value = value
+    return other
+
+
+class SweepRun(object):
+    '''One combination of values of a sweep.  assignments is a list of (key, value).'''
+    def __init__(self, number, assignments, commandline_list):
+        self.number = number
+        self.assignments = assignments
+        self.commandline_list = commandline_list
+
+    def describe(self):
+        return ' '.join('%s=%s' % (key, value) for key, value in self.assignments)
+
+
+class SweepPlan(object):
+    '''The runs of a sweep over the options of an ArgparseOptionForm.  Raises ValueError
+    if the text of any option is a malformed sweep.
+
+    values - optional dict of key (as for ArgparseOptionForm.get_option) -> list of
+        values, for options to sweep over other than by their text, e.g. flags
+    '''
+    def __init__(self, form, values=None):
+        self.form = form
+        #(key, model, values) for each option swept, in command line order
+        self.axes = []
+        overrides = {}
+        for key, option_values in (values or {}).items():
+            overrides[form.get_option(key)] = list(option_values)
+
+        keys = dict((model, key) for key, model in form.option_list.items())
+        for model in form.models:
+            if model in overrides:
+                option_values = overrides[model]
+            elif sweeps(model):
+                try:
+                    option_values = expand_spec(model.value)
+                except ValueError as err:
+                    raise ValueError('%s: %s' % (keys[model], err))
+            else:
+                option_values = None
+            if option_values is not None:
+                self.axes.append((keys[model], model, option_values))
+
+    def size(self):
+        size = 1
+        for key, model, values in self.axes:
+            size *= len(values)
+        return size
+
+    def runs(self):
+        '''Generate a SweepRun for each combination of values, varying the last option
+        fastest'''
+        value_lists = [values for key, model, values in self.axes]
+        for number, combination in enumerate(itertools.product(*value_lists)):
+            assignments = []
+            overrides = {}
+            for (key, model, values), value in zip(self.axes, combination):
+                assignments.append((key, value))
+                overrides[model] = variant(model, value)
+            yield SweepRun(number + 1, assignments, self.form.make_commandline_list(overrides))
+
+
+def sweep_commandlines(parser, values=None):
+    '''Headless equivalent of a sweep from a gui, like optionmodel.make_commandline_list.
+    Values may be sweep text, or lists for options to sweep other than by their text.
+    Returns the list of command lines.
+    '''
+    form = ArgparseOptionForm(parser)
+    sweep_values = {}
+    for key, value in (values or {}).items():
+        if isinstance(value, (list, tuple)) and form.get_option(key).kind != FILE:
+            sweep_values[key] = value
+        else:
+            form.set_value(key, value)
+    return [run.commandline_list for run in SweepPlan(form, sweep_values).runs()]
@@ -0,0 +1,188 @@
+'''Appending large amounts of text to a Text widget without freezing the gui.
+
+A single insert of a multi-megabyte report holds up the event loop until Tk has laid
+it all out.  A TextStream instead appends the text in chunks, inserting as many as fit
+in a short time slice and then giving the event loop a turn with after(), so the gui
+stays responsive while the text arrives.
+
+The text may come from an iterator of strings or a file-like object, which is only read
+from as fast as the widget takes the text, or be pushed with feed() from another thread
+(or from a reader thread started with threaded=True).  Pushed text goes through a
+bounded queue, so a producer that gets ahead of the widget blocks until it catches up.
+A stream can be cancelled at any time.  If the widget is scrolled to the end when text
+is appended it stays at the end, following the text in, and otherwise stays where the
+user scrolled to.
+
+Nothing in this module imports Tkinter, a TextStream just needs a Text widget.
+'''
+import time
+import threading
+import Queue
+
+#put in the queue to mark the end of the text
+_END = object()
+
+
+def iterate_source(source, chunk_size):
+    '''Strings from an iterable of strings or a file-like object'''
+    if hasattr(source, 'read'):
+        return iter(lambda: source.read(chunk_size), '')
+    return iter(source)
+
+
+class TextStream(object):
+    '''Append the text from source to text_widget in time-sliced chunks.
+
+    source - an iterable of strings or a file-like object, or None to push text with feed()
+    chunk_size - characters inserted at once, with shorter strings joined up and longer 
+        ones split
+    time_slice - milliseconds to spend inserting before giving the event loop a turn
+    follow - keep the view at the end while text arrives, if it was already there
+    threaded - read source on a separate thread, for sources that are slow to produce
+        text, e.g. a generator doing computation or a pipe
+    max_queued - most strings waiting to be inserted before feed() blocks
+    tags - tags to give the inserted text
+    on_done - called with the stream once all of the text is in, or it is cancelled
+    '''
+    def __init__(self, text_widget, source=None, chunk_size=65536, time_slice=15, follow=True,
+            threaded=False, max_queued=64, tags=(), on_done=None):
+        self.widget = text_widget
+        self.chunk_size = chunk_size
+        self.time_slice = time_slice / 1000.0
+        self.follow = follow
+        self.tags = tags
+        self.on_done = on_done
+
+        self.cancelled = False
+        self.finished = False
+        self.scheduled = None
+        #text taken from the source but not yet inserted
+        self.pending = ''
+        self.ended = False
+        self.characters = 0
+        self.inserts = 0
+
+        self.queue = None
+        self.source = None
+        if source is None or threaded:
+            self.queue = Queue.Queue(max_queued)
+        if source is not None:
+            if threaded:
+                reader = threading.Thread(target=self.read_source, args=(source,))
+                reader.daemon = True
+                reader.start()
+            else:
+                self.source = iterate_source(source, chunk_size)
+        self.schedule(0)
+
+    def read_source(self, source):
+        try:
+            for text in iterate_source(source, self.chunk_size):
+                if self.cancelled:
+                    return
+                self.feed(text)
+        finally:
+            self.close()
+
+    def feed(self, text):
+        '''Thread safe.  Queue text to be appended, blocking while the queue is full.'''
+        while not self.cancelled:
+            try:
+                self.queue.put(text, timeout=0.1)
+                return
+            except Queue.Full:
+                pass
+
+    def close(self):
+        '''Mark the end of text pushed with feed()'''
+        self.feed(_END)
+
+    def next_text(self):
+        '''The next string to insert, '' if none is available yet, or None at the end'''
+        if self.source is not None:
+            try:
+                return next(self.source)
+            except StopIteration:
+                return None
+        try:
+            text = self.queue.get_nowait()
+        except Queue.Empty:
+            return ''
+        if text is _END:
+            return None
+        return text
+
+    def fill_pending(self):
+        '''Take text from the source until there is a whole chunk or no more is available'''
+        parts = [self.pending]
+        length = len(self.pending)
+        while length < self.chunk_size and not self.ended:
+            text = self.next_text()
+            if text is None:
+                self.ended = True
+            elif not text:
+                break
+            else:
+                parts.append(text)
+                length += len(text)
+        self.pending = ''.join(parts)
+
+    def schedule(self, delay):
+        self.scheduled = self.widget.after(delay, self.step)
+
+    def step(self):
+        self.scheduled = None
+        if self.cancelled:
+            return
+        deadline = time.time() + self.time_slice
+        inserted = False
+        while time.time() < deadline:
+            self.fill_pending()
+            if not self.pending:
+                break
+            chunk, self.pending = self.pending[:self.chunk_size], self.pending[self.chunk_size:]
+            self.insert(chunk)
+            inserted = True
+
+        if self.ended and not self.pending:
+            self.finish()
+        elif inserted or self.pending:
+            #straight on after the event loop has had a turn
+            self.schedule(1)
+        else:
+            #waiting for text to be fed
+            self.schedule(20)
+
+    def insert(self, text):
+        at_end = self.follow and self.widget.yview()[1] >= 1.0
+        self.widget.insert('end', text, self.tags)
+        self.characters += len(text)
+        self.inserts += 1
+        if at_end:
+            self.widget.see('end')
+
+    def finish(self):
+        self.finished = True
+        if self.on_done is not None:
+            self.on_done(self)
+
+    def cancel(self):
+        '''Stop appending text, and unblock any thread feeding it'''
+        if self.finished or self.cancelled:
+            return
+        self.cancelled = True
+        if self.scheduled is not None:
+            self.widget.after_cancel(self.scheduled)
+            self.scheduled = None
+        if self.queue is not None:
+            #so that a feed() blocked on a full queue notices the cancel
+            try:
+                while True:
+                    self.queue.get_nowait()
+            except Queue.Empty:
+                pass
+        if self.on_done is not None:
+            self.on_done(self)
+
+    def done(self):
+        return self.finished or self.cancelled
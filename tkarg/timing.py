@@ -0,0 +1,181 @@
+'''Timing of the phases of building and using an ArgparseGui, to find where the time
+goes when a large parser is slow to open.
+
+A PhaseTimer records how long each named phase took, nested phases within each other,
+along with counters such as the number of widgets created, and exports it all as JSON.
+When timing isn't wanted a NullTimer is used instead, whose methods do nothing and
+whose phase() hands back the same do-nothing context manager every time, so leaving
+the instrumentation in costs next to nothing.
+
+make_timer decides which to use.  Timing is on if asked for, or if the environment
+variable TKARG_TIMING is set.  TKARG_TIMING=1 writes a summary to stderr, and any other
+value is taken as the path of a JSON file to write the results to.
+'''
+import os
+import sys
+import time
+import json
+
+ENVIRONMENT_VARIABLE = 'TKARG_TIMING'
+
+
+class Phase(object):
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.timer.start(self.name)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.timer.stop()
+        return False
+
+
+class PhaseTimer(object):
+    '''
+    output - None to only collect the timings, '-' to write a summary to stderr when
+        report() is first called, or the path of a JSON file to write them to
+    '''
+    enabled = True
+
+    def __init__(self, output=None):
+        self.output = output
+        self.created = time.time()
+        #each phase is a dict with name, start (relative to created), seconds and phases,
+        #the phases nested within it
+        self.phases = []
+        self.stack = []
+        self.counters = {}
+        #seconds by name, for things done too often to record as separate phases
+        self.totals = {}
+        self.reported = False
+
+    def phase(self, name):
+        '''Context manager timing the code within it as a phase called name'''
+        return Phase(self, name)
+
+    def start(self, name):
+        record = {'name':name, 'start':time.time() - self.created, 'seconds':None, 'phases':[]}
+        if self.stack:
+            self.stack[-1]['phases'].append(record)
+        else:
+            self.phases.append(record)
+        self.stack.append(record)
+
+    def stop(self):
+        record = self.stack.pop()
+        record['seconds'] = time.time() - self.created - record['start']
+        return record['seconds']
+
+    def annotate(self, key, value):
+        '''Add key: value to the record of the phase in progress, e.g. a count of widgets'''
+        self.stack[-1][key] = value
+
+    def mark(self, name):
+        '''Record a moment, e.g. the first time the gui is idle, as a phase with no length'''
+        record = {'name':name, 'start':time.time() - self.created, 'seconds':0.0, 'phases':[]}
+        self.phases.append(record)
+
+    def count(self, name, number=1):
+        self.counters[name] = self.counters.get(name, 0) + number
+
+    def add_time(self, name, seconds):
+        self.totals[name] = self.totals.get(name, 0.0) + seconds
+
+    def to_dict(self):
+        return {'phases':self.phases, 'counters':self.counters, 'totals':self.totals}
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.to_dict(), **kwargs)
+
+    def summary(self):
+        lines = []
+        def add_phases(phases, depth):
+            for record in phases:
+                seconds = record['seconds']
+                shown = '%9.1f ms' % (seconds * 1000) if seconds is not None else '  running'
+                lines.append('%s %s%s' % (shown, '  ' * depth, record['name']))
+                add_phases(record['phases'], depth + 1)
+        add_phases(self.phases, 0)
+        for name, seconds in sorted(self.totals.items()):
+            lines.append('%9.1f ms total %s' % (seconds * 1000, name))
+        for name, number in sorted(self.counters.items()):
+            lines.append('%12d %s' % (number, name))
+        return '\n'.join(lines) + '\n'
+
+    def report(self):
+        '''Write the timings to wherever output says, once only'''
+        if self.reported:
+            return
+        self.reported = True
+        if self.output == '-':
+            sys.stderr.write(self.summary())
+        elif self.output:
+            with open(self.output, 'w') as out:
+                out.write(self.to_json(indent=1))
+
+
+class _NullPhase(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+_NULL_PHASE = _NullPhase()
+
+
+class NullTimer(object):
+    '''Stands in for a PhaseTimer when timing is off'''
+    enabled = False
+
+    def phase(self, name):
+        return _NULL_PHASE
+
+    def start(self, name):
+        pass
+
+    def stop(self):
+        return 0.0
+
+    def annotate(self, key, value):
+        pass
+
+    def mark(self, name):
+        pass
+
+    def count(self, name, number=1):
+        pass
+
+    def add_time(self, name, seconds):
+        pass
+
+    def to_dict(self):
+        return {}
+
+    def to_json(self, **kwargs):
+        return '{}'
+
+    def report(self):
+        pass
+
+NULL_TIMER = NullTimer()
+
+
+def make_timer(timing=None):
+    '''A PhaseTimer if timing is True or an output for one, a NullTimer if it's False,
+    and if it's None, whichever TKARG_TIMING asks for.
+    '''
+    if timing is None:
+        timing = os.environ.get(ENVIRONMENT_VARIABLE) or False
+        if timing in ('0', ''):
+            timing = False
+    if timing is False:
+        return NULL_TIMER
+    if timing is True:
+        return PhaseTimer()
+    if timing == '1':
+        return PhaseTimer('-')
+    return PhaseTimer(timing)
@@ -1,18 +1,35 @@
 import sys
 from os import devnull
 from Tkinter import *
-import tkFileDialog
-import tkFont
-#importing ttk here overrides some widget definitions from Tkinter, which is fine
-#except bizarre things like specifying background= in constructors doesn't work
-from ttk import Progressbar
 import argparse
-from textwrap import fill
+from textwrap import fill, TextWrapper
 import re
-import shlex
-import subprocess
-import Queue
-
+import bisect
+import threading
+import time
+import collections
+import contextlib
+from array import array
+#tkFileDialog, tkFont, ttk, subprocess, shlex and Queue are only imported where they 
+#are first used, since they are slow to import and many guis never need some of them
+
+from tkarg.argparseutils import ArgparseActionAppendToDefault, argparse_bounded_float, proportion_type
+from tkarg.layout import LayoutPlan, plan_group
+from tkarg.schemacache import layout_from_schema
+from tkarg.scrollback import SpillFile
+from tkarg.validation import LiveValidator
+from tkarg.filelist import describe_files
+from tkarg.timing import make_timer, NULL_TIMER
+from tkarg.optionmodel import classify_action, group_display_title, ordered_action_groups, BOOL, STRING, CHOICE, FILE, SUBCOMMAND
+from tkarg.optionmodel import ArgparseOptionForm, BoolOptionModel, StringOptionModel, ChoiceOptionModel, FileOptionModel
+from tkarg.optionmodel import SubcommandOptionModel
+
+
+#TextWrapper by width, and wrapped paths by (path, width), since the same paths are 
+#wrapped again each time a file option is redrawn
+_path_wrappers = {}
+_wrapped_paths = {}
+_MAX_WRAPPED_PATHS = 4096
 
 def wrap_filepath(path, width):
     '''Wrap a filepath across multiple lines, despite a lack of spaces.
@@ -20,14 +37,47 @@ def wrap_filepath(path, width):
     to allow breaking on slashes as well.  Will need to be adapted for 
     Windows.
     '''
-    ret = re.sub(' ', '*', path)
-    ret = re.sub('/', ' ', ret)
-    ret = fill(ret, width)
-    ret = re.sub(' ', '/', ret)
-    ret = re.sub('\n', '/\n', ret)
-    ret = re.sub('[*]', ' ', ret)
+    key = (path, width)
+    try:
+        return _wrapped_paths[key]
+    except KeyError:
+        pass
+    try:
+        wrapper = _path_wrappers[width]
+    except KeyError:
+        wrapper = _path_wrappers[width] = TextWrapper(width)
+
+    #spaces are swapped out of the way, so that only slashes are broken on
+    ret = path.replace(' ', '\0').replace('/', ' ')
+    ret = wrapper.fill(ret)
+    ret = ret.replace(' ', '/').replace('\n', '/\n').replace('\0', ' ')
+    if len(_wrapped_paths) >= _MAX_WRAPPED_PATHS:
+        _wrapped_paths.clear()
+    _wrapped_paths[key] = ret
     return ret
 
+def dialogs():
+    '''The tkFileDialog module, imported the first time a file dialog is opened'''
+    import tkFileDialog
+    return tkFileDialog
+
+
+def title_font(widget):
+    '''The bold font used for group titles.  It is created on first use and then shared 
+    by all groups with the same Tk root, rather than creating one per group.  It is kept
+    on the root, so that it goes when the root does.
+    '''
+    root = widget._root()
+    font = getattr(root, '_tkarg_title_font', None)
+    if font is None:
+        import tkFont
+        font = root._tkarg_title_font = tkFont.Font(root=root, size=14, weight='bold')
+    return font
+
+def count_widgets(widget):
+    '''The number of widgets within widget, including itself'''
+    return 1 + sum(count_widgets(child) for child in widget.winfo_children())
+
 def print_options_namespace(options):
     '''Output a table of the option values contained in the Namespace created by
     the argparse parse_args call.  Mainly for debugging.
@@ -39,60 +89,6 @@ def print_options_namespace(options):
         sys.stdout.write('%*s\t%r\n' % (wid, opt, val))
 
 
-class ArgparseActionAppendToDefault(argparse.Action):
-    '''Normally defaults can be set on argparse options, but will be overridden if the 
-    argument appears on the command line.  This will allow arguments passed on the
-    command line to simply be appended to the default list.  This would mainly be 
-    used for kwargs specified on the command line and a PlottingArgumentParser
-    instantiated with some kwargs set as defaults. Because the values that would
-    come from the commandline appear later, they should trump earlier ones in the
-    prepare_plot_kwargs function.
-    '''
-    def __call__(self, parser, namespace, values, option_string=None):
-        #print '%r %r %r' % (self.dest, self.default, values)
-        if not hasattr(self, 'default'):
-            raise ValueError('only makes sense to call AppendToDefaultArgparseAction \
-                    when default value to argument is defined')
-        if not isinstance(self.default, list):
-            raise ValueError('only makes sense to call AppendToDefaultArgparseAction \
-                    when defaults are in a list')
-        if isinstance(values, str):
-            values = values.split()
-
-        setattr(namespace, self.dest, self.default + values)
-
-
-def argparse_bounded_float(min_val=0.0, max_val=1.0):
-    '''Closure-based function for use in type and bound checking, specified as a type= argument in argparse.add_argument().
-    It defaults to checking for a proportion, but any bounds can be passed.
-    On failure raises an ArgumentTypeError, defined by argparse.
-    >>> f = argparse_bounded_float()
-    >>> f(1.0)
-    1.0
-    >>> f = argparse_bounded_float()
-    >>> f('1.1')
-    Traceback (most recent call last):
-    ...
-    ArgumentTypeError: value 1.100000 must be between 0.00 and 1.00
-    >>> f = argparse_bounded_float(max_val=2.0)
-    >>> f('1.9')
-    1.9
-    '''
-    def func(string):
-        value = float(string)
-        if value < min_val or value > max_val:
-            mess = 'value %f must be between %.2f and %.2f' % (value, min_val, max_val)
-            raise ArgumentTypeError(mess)
-        return value
-    
-    return func
-
-
-def proportion_type():
-    '''Limited version of argparse_bounded_float for compatibility with legacy code.'''
-    return argparse_bounded_float()
-
-
 '''
 ***For reference, here is the help on the attributes of the argparse.Action baseclass***
 
@@ -156,48 +152,48 @@ class ActivatableTkinterButton(Button):
         print args
         self.config(state=NORMAL)
 
+#background of entries holding a value that argparse would reject
+ERROR_BACKGROUND = '#ffd0d0'
+
 #class ArgparseOption(object):
 class ArgparseOption(Frame):
     '''Base class for graphical representation of argparse command line arguments.
     Derived classes handle specific argument types, e.g. strings, choices, etc.
+
+    The widgets are views over a model from tkarg.optionmodel, which holds the value 
+    of the option and turns it into command line strings.  Changes made through the 
+    widgets are written back to the model as they happen.
     '''
-    def __init__(self, tk_parent, option, **kwargs):
+    model_class = None
+
+    def __init__(self, tk_parent, option, model=None, **kwargs):
         '''
         Configure the basics of this gui item.
         
         option - instance of a class derived from argparse Action
-
-        The output_arg is an important thing to set up here.  It will be part of the
-        string that is passed to ArgumentParser.parse_args after the gui is closed.
-        #Use the last listed flag, which is likely to be the more descriptive long one.
-        #There will be no option_strings for a positional arg
+        model - the model holding the value of the option, which is created if not passed
         '''
         Frame.__init__(self, tk_parent)
 
         self.option = option
+        self.model = model or self.model_class(option)
+        self.model.view = self
 
-        if option.option_strings:
-            self.output_arg = option.option_strings[-1]
-        else:
-            self.output_arg = None
-       
-        self.return_string = []
-        
-        self.omit = 'HIDE' in option.help
-        
-        self.nargs = option.nargs
-
-        self.dependent_options = []
-        self.depends_on = 0
+        self.output_arg = self.model.output_arg
+        self.omit = self.model.omit
+        self.nargs = self.model.nargs
+        self.state_widgets = None
+        #only created once there is an error to show
+        self.error_box = None
 
     def extract_label_from_help(self):
         '''Extract a reasonable label.
         '''
-        help_string = re.sub('[(]default [)]', '', self.option.help).strip()
-        if help_string:
-            self.label_string = help_string
-        else:
-            self.label_string = re.sub('--', '', self.option.option_strings[-1])
+        self.label_string = self.model.label_string()
+
+    def write_back(self, *args):
+        '''Trace callback copying the value of the tk variable to the model'''
+        self.model.set_value(self.var.get())
 
     def position(self, row, col, padx=10, pady=2):
         '''Position the widget, and the return the correct row for the next widget
@@ -216,41 +212,69 @@ class ArgparseOption(Frame):
         self.grid()
         return next_row 
 
+    def show_state(self):
+        '''Called by the model when it is enabled or disabled.  Disabling both the label 
+        and widget assigned to a particular option by default means to grey it out.
+        '''
+        state = NORMAL if self.model.enabled else DISABLED
+        #the children are looked up once, rather than each time the state changes
+        if self.state_widgets is None:
+            self.state_widgets = self.winfo_children()
+        for child in self.state_widgets:
+            child.config(state=state)
+
+    def show_error(self):
+        '''Called by the model when the result of validating its value changes.  The 
+        error is shown in red below the option, and the entry is tinted.
+        '''
+        error = self.model.error
+        if error:
+            if self.error_box is None:
+                self.error_box = Label(self, anchor='w', justify=LEFT, foreground='red')
+            self.error_box.config(text=fill(error, 70))
+            self.error_box.grid(row=2, column=0, padx=10, sticky='W', columnspan=2)
+        elif self.error_box is not None:
+            self.error_box.grid_remove()
+        if isinstance(self.widget, Entry):
+            self.widget.config(background=ERROR_BACKGROUND if error else 'white')
+
     def grey_out(self):
         '''Disable both the label and widget assigned to a particular option, which 
         by default means to grey it out
         '''
         if not hasattr(self, 'widget'):
             sys.exit('ERROR: grey_out called before ArgparseOption configured\n')
-        for child in [ self.nametowidget(ch) for ch in self.winfo_children() ]:
-            child.config(state=DISABLED)
+        self.model.grey_out()
 
     def activate(self):
         '''Return the label and widget for an option back to the normal state from 
-        the disabled state. If this option is dependent on multiple others, there 
-        is a sort of reference counting that is does to ensure the proper number 
-        of dependencies are met.
+        the disabled state.  Normally this is left to the dependency graph, which enables
+        options once everything they depend on has been set.
         '''
-        self.depends_on -= 1
-        if not self.depends_on:
-            for child in [ self.nametowidget(ch) for ch in self.winfo_children() ]:
-                child.config(state=NORMAL)
+        self.model.set_enabled(True)
+
+    @property
+    def depends_on(self):
+        return self.model.depends_on
+
+    @property
+    def dependent_options(self):
+        return self.model.dependent_options
 
     def register_dependency(self, dep):
-        '''Add dep to a list of other options that depend on this option, and grey
-        it out.  Also increment the dependency reference count of the dependent 
-        option.
+        '''Make dep depend on this option, greying it out until this option has been set.
+        Raises tkarg.dependencies.DependencyCycleError if that would make a cycle.
         '''
-        self.dependent_options.append(dep)
-        dep.grey_out()
-        dep.depends_on += 1
+        self.model.register_dependency(getattr(dep, 'model', dep))
 
     def activate_dependencies(self):
-        '''Tell all depenent options that this dependency has been met, decrementing 
-        its dependency counter, and possibly fully activating it.
+        '''Tell all depenent options that this dependency has been met, possibly fully 
+        activating them and in turn any options that depend on them.
         '''
-        for dep in self.dependent_options:
-            dep.activate()
+        self.model.activate_dependencies()
+
+    def make_string(self):
+        return self.model.make_string()
 
 
 class ArgparseBoolOption(ArgparseOption):
@@ -271,184 +295,170 @@ class ArgparseBoolOption(ArgparseOption):
     defaults to checked, but that gets confusing and generally won't work with argument
     names or help strings.
     '''
+    model_class = BoolOptionModel
 
     def __init__(
             self, 
             option, 
             tk_parent, 
-            label_width=60):
+            label_width=60,
+            model=None):
         
-        ArgparseOption.__init__(self, tk_parent, option)
+        ArgparseOption.__init__(self, tk_parent, option, model=model)
 
         #using Variable rather than IntVar since it allows a default of None
         self.var = Variable()
-        self.var.set(option.default)
+        self.var.set(self.model.value)
+        self.var.trace('w', self.write_back)
 
         if not self.omit:
-            self.extract_label_from_help()
+            #the label is the text of the checkbutton itself, rather than a separate Label
+            #BoolOptionModel knows whether this is store_true or store_false
+            self.widget = Checkbutton(self, variable=self.var, onvalue=self.model.onvalue(), offvalue=self.model.offvalue(),
+                    text=self.model.label_text(label_width), anchor='w', justify=LEFT)
 
-            self.label = Label(self, text=fill(self.label_string, label_width))
-            
-            if isinstance(option, argparse._StoreTrueAction):
-                self.widget = Checkbutton(self, variable=self.var, onvalue=1, offvalue=0)
-            elif isinstance(option, argparse._StoreFalseAction):
-                self.widget = Checkbutton(self, variable=self.var, onvalue=0, offvalue=1)
-            else: 
-                #I think that I found some case where it is possible for the action to be
-                #neither store_true nor store_false
-                self.widget = Checkbutton(self, variable=self.var, onvalue=1, offvalue=0)
-         
-
-    def make_string(self):
-        if bool(self.var.get()):
-            return [ self.output_arg ]
-        else:
-            return []
+    def position(self, row, col, padx=10, pady=2):
+        self.widget.grid(row=0, column=0, columnspan=2, padx=padx, pady=pady, sticky='W')
+        self.columnconfigure(0, minsize=450)
+        self.columnconfigure(1, minsize=150)
+        self.grid()
+        return row + 1
 
 
 class ArgparseStringOption(ArgparseOption):
+    model_class = StringOptionModel
+
     def __init__(
             self, 
             option, 
             tk_parent, 
-            label_width=60):
+            label_width=60,
+            model=None):
 
-        ArgparseOption.__init__(self, tk_parent, option)
+        ArgparseOption.__init__(self, tk_parent, option, model=model)
         self.var = StringVar()
         self.widget = Entry(self, textvariable=self.var, width=10)
 
         if not self.omit:
-            self.extract_label_from_help()
-            
-            req_string = 'REQ: ' if option.required else ''
-            self.label_string = req_string + self.label_string
-            
-            if isinstance(self.nargs, int):
-                self.label_string += ' (%d values expected)' % self.nargs
-            elif self.nargs in [ '*', '+' ]:
-                self.label_string += ' (multiple values allowed)'
-
-            self.label = Label(self, text=fill(self.label_string, label_width))
+            self.label = Label(self, text=self.model.label_text(label_width))
         
-        if option.default:
-            if isinstance(option.default, list):
-                self.widget.insert(0, ' '.join([str(val) for val in option.default]))
-            else:
-                self.widget.insert(0, str(option.default))
-
-    def make_string(self):
-        if self.var.get():
-            #output_arg is None for positional arg
-            if self.output_arg is not None:
-                self.return_string.append(self.output_arg)
-            
-            if self.nargs and (self.nargs in [ '*', '+' ] or self.nargs > 1):
-                #shlex.split here properly leaves quoted strings unsplit
-                splt = shlex.split(self.var.get())
-                #this is an annoying special case, where a leading "-" in an argument has to 
-                #have double quotes explicitly embedded in the string
-                for num, s in enumerate(splt):
-                    if s[0] == '-':
-                        splt[num] = '"' + s + '"'
-
-                self.return_string.extend(splt)
-            else:
-                self.return_string.append(self.var.get())
-        return self.return_string
+        #in a sweep choices are typed too, and may have no default
+        self.var.set(self.model.value if self.model.value is not None else '')
+        self.var.trace('w', self.write_back)
 
 
 class ArgparseOptionMenuOption(ArgparseOption):
+    model_class = ChoiceOptionModel
+
     def __init__(
             self, 
             option, 
             tk_parent, 
-            label_width=60):
+            label_width=60,
+            model=None):
         
-        ArgparseOption.__init__(self, tk_parent, option)
+        ArgparseOption.__init__(self, tk_parent, option, model=model)
         
         self.var = StringVar()
-        self.var.set(option.default)
+        self.var.set(self.model.value if self.model.value is not None else '')
+        self.var.trace('w', self.write_back)
 
         #OptionMenu signature is this:
         #__init__(self, master, variable, value, *values, **kwargs)
         #where variable is "the resource textvariable", and value is the default value
-        self.widget = OptionMenu(self, self.var, option.choices[0], *option.choices[1:])
+        choices = self.model.choices()
+        self.widget = OptionMenu(self, self.var, choices[0], *choices[1:])
 
-        self.extract_label_from_help()
-        req_string = 'REQ: ' if option.required else ''
-        self.label_string = req_string + self.label_string
-
-        self.label = Label(self, text=fill(self.label_string, label_width))
-
-    def make_string(self):
-        if self.var.get():
-            self.return_string.append(self.output_arg)
-            self.return_string.append(self.var.get())
-        return self.return_string
+        self.label = Label(self, text=self.model.label_text(label_width))
 
 
 class ArgparseFileOption(ArgparseOption):
+    model_class = FileOptionModel
+
     def __init__(
             self, 
             option, 
             tk_parent, 
             display_filenames=True,
-            label_width=60):
+            label_width=60,
+            model=None):
         
-        ArgparseOption.__init__(self, tk_parent, option)
+        ArgparseOption.__init__(self, tk_parent, option, model=model)
         self.label_width = label_width
 
-        self.label = Label(self, text=fill(option.help, self.label_width))
-        if option.type and hasattr(option.type, "_mode"):
-            #a mode would be here if the option is specified a file to argparse, rather than the path to a file
-            if 'r' in option.type._mode:
-                if self.nargs and (self.nargs in [ '*', '+' ] or self.nargs > 1):
-                    self.widget = Button(self, text='OPEN', command=self.open_multiple_files_dialog)
-                else:
-                    self.widget = Button(self, text='OPEN', command=self.open_file_dialog)
-            elif 'w' in option.type._mode:
-                self.widget = Button(self, text='OPEN', command=self.output_file_dialog)
+        self.label = Label(self, text=self.model.label_text(self.label_width))
+        dialog = self.model.dialog_kind()
+        if dialog == 'open_multiple':
+            self.widget = Button(self, text='OPEN', command=self.open_multiple_files_dialog)
+        elif dialog == 'save':
+            self.widget = Button(self, text='SAVE AS', command=self.output_file_dialog)
         else:
-            #this is obviously a total hack, and depends on the "destination" variable name assigned in argparse
-            if 'out' in option.dest.lower():
-                self.widget = Button(self, text='SAVE AS', command=self.output_file_dialog)
-            else:
-                if self.nargs and (self.nargs in [ '*', '+' ] or self.nargs > 1):
-                    self.widget = Button(self, text='OPEN', command=self.open_multiple_files_dialog)
-                else:
-                    self.widget = Button(self, text='OPEN', command=self.open_file_dialog)
+            self.widget = Button(self, text='OPEN', command=self.open_file_dialog)
 
-        if self.nargs and (self.nargs in [ '*', '+' ] or self.nargs > 1):
+        if self.model.multiple():
             fstr = 'Files'
         else:
             fstr = 'File'
 
         self.update_box = Label(self, text=fill('  %s chosen: ' % fstr, self.label_width), anchor='w', foreground='red')
+        if self.model.multiple():
+            self.list_button = Button(self, text='LIST', command=self.show_file_list)
+        else:
+            self.list_button = None
+        self.list_window = None
+        #shows the results of tkarg.filecheck, only created once there are some
+        self.check_box = None
 
-        #this must be a mutable for some callbacks to work!
-        self.var = []
+        #this must be a mutable for some callbacks to work!  It is the FileList held by the model.
+        self.var = self.model.value
         self.file_count = IntVar()
         self.file_count.set(0)
 
-    def open_file_dialog(self):
-        #self.var.extend(tkFileDialog.askopenfilename())
-        self.var.extend([tkFileDialog.askopenfilename()])
+    def position(self, row, col, padx=10, pady=2):
+        next_row = ArgparseOption.position(self, row, col, padx=padx, pady=pady)
+        if self.list_button is not None:
+            self.update_box.grid(columnspan=1)
+            self.list_button.grid(row=1, column=1, padx=padx, sticky='N')
+        return next_row
+
+    def show_value(self):
+        '''Show which files are chosen, called after they change'''
+        fstr = 'Files' if self.model.multiple() else 'File'
         self.file_count.set(len(self.var))
-        #self.update_box.config(text=fill('  File chosen: %s ' % self.var, self.label_width+50), foreground='red')
-        self.update_box.config(text=wrap_filepath('  File chosen: %s ' % self.var, self.label_width+10), foreground='red')
-        self.activate_dependencies()
+        self.update_box.config(text=wrap_filepath('  %s chosen: %s ' % (fstr, describe_files(self.var)), self.label_width+10), foreground='red')
+        if self.list_window is not None and self.list_window.winfo_exists():
+            self.list_window.view.show()
+
+    def show_file_check(self):
+        text = self.model.file_check_text()
+        if text:
+            if self.check_box is None:
+                self.check_box = Label(self, anchor='w')
+            problems = self.model.file_check is not None and self.model.file_check.problems
+            self.check_box.config(text='  ' + text, foreground='red' if problems else 'dark green')
+            self.check_box.grid(row=3, column=0, padx=10, sticky='W', columnspan=2)
+        elif self.check_box is not None:
+            self.check_box.grid_remove()
+
+    def show_file_list(self):
+        if self.list_window is None or not self.list_window.winfo_exists():
+            self.list_window = FileListWindow(self, self.model)
+        self.list_window.lift()
+
+    def files_chosen(self, paths):
+        self.model.add_files(paths)
+        self.show_value()
+        if self.var:
+            self.activate_dependencies()
+
+    def open_file_dialog(self):
+        self.files_chosen([dialogs().askopenfilename(initialdir=self.model.base_directory())])
 
     def open_multiple_files_dialog(self):
-        self.var.extend(tkFileDialog.askopenfilenames())
-        self.file_count.set(len(self.var))
-        self.update_box.config(text=wrap_filepath('  Files chosen: %s ' % ' '.join(self.var), self.label_width+10), foreground='red')
-        self.activate_dependencies()
+        self.files_chosen(dialogs().askopenfilenames(initialdir=self.model.base_directory()))
 
     def output_file_dialog(self):
-        self.var.extend(tkFileDialog.asksaveasfilename())
-        self.file_count.set(len(self.var))
-        self.update_box.config(text=wrap_filepath('  File chosen: %s ' % self.var, self.label_width+10), foreground='red')
-        self.activate_dependencies()
+        self.files_chosen([dialogs().asksaveasfilename(initialdir=self.model.base_directory())])
 
     def add_save_and_callback_button(self, label, callback, activate_var, *args, **kwargs):
         '''A pretty complicated scheme for automatically activing a file save button and immediately following
@@ -475,7 +485,7 @@ class ArgparseFileOption(ArgparseOption):
         def make_save_and_callback(callback):
             #wrapper to embed the callback between the launch the save file dialog and capture the callback arg and kwargs in a closure
             def new_callback():
-                self.var.append(tkFileDialog.asksaveasfilename())
+                self.model.add_files([dialogs().asksaveasfilename(initialdir=self.model.base_directory())])
                 with open(self.var[0], 'w') as out_stream:
                     self.result = callback(out_stream, *args, **kwargs)
                 self.update_box.config(text=fill('  File computed: %s ' % self.var, self.label_width+10), foreground='red')
@@ -484,6 +494,7 @@ class ArgparseFileOption(ArgparseOption):
             return new_callback
 
         new_button = ActivatableTkinterButton(self, text=label, command=make_save_and_callback(callback))
+        self.state_widgets = None
         activate_var.trace('w', new_button.activate)
         new_button.grid(row=0, column=2)
         self.columnconfigure(0, minsize=450)
@@ -491,19 +502,186 @@ class ArgparseFileOption(ArgparseOption):
         self.columnconfigure(2, minsize=75)
         self.grid()
 
-    def make_string(self):
-        if self.var:
-            if self.output_arg:
-                self.return_string.append(self.output_arg)
-            #self.var is actually a tuple here in the case of multiple filenames,
-            #but may be just a string otherwise
-            if isinstance(self.var, tuple):
-                self.var = list(self.var)
-            if isinstance(self.var, list):
-                self.return_string.extend(self.var)
-            else:
-                self.return_string.append(self.var)
-        return self.return_string
+
+class FileListView(Frame):
+    '''Scrolling list of the paths chosen for a file option, for looking through and 
+    removing some of a large selection.  Only the paths in view are put in the Listbox,
+    with the scrollbar driven by the position in the whole FileList, so showing or 
+    scrolling through thousands of paths costs no more than a screenful.  The selection
+    is of the paths in view, and is lost on scrolling.
+    '''
+    def __init__(self, tk_parent, model, height=20, width=100):
+        Frame.__init__(self, tk_parent)
+        self.model = model
+        self.height = height
+        self.first = 0
+
+        self.listbox = Listbox(self, height=height, width=width, selectmode=EXTENDED, activestyle='none')
+        self.scrollbar = Scrollbar(self, orient='vertical', command=self.on_scrollbar)
+        self.listbox.grid(row=0, column=0, columnspan=3, sticky='NSEW')
+        self.scrollbar.grid(row=0, column=3, sticky='NS')
+        for event in ('<MouseWheel>', '<Button-4>', '<Button-5>'):
+            self.listbox.bind(event, self.on_wheel)
+
+        self.count_label = Label(self, anchor='w')
+        self.count_label.grid(row=1, column=0, sticky='W')
+        Button(self, text='REMOVE SELECTED', command=self.remove_selected).grid(row=1, column=1)
+        Button(self, text='REMOVE ALL', command=self.remove_all).grid(row=1, column=2)
+        self.rowconfigure(0, weight=1)
+        self.columnconfigure(0, weight=1)
+        self.show()
+
+    def on_scrollbar(self, action, amount, unit=None):
+        if action == 'moveto':
+            self.show(int(float(amount) * len(self.model.value)))
+        elif unit == 'pages':
+            self.show(self.first + int(amount) * self.height)
+        else:
+            self.show(self.first + int(amount))
+
+    def on_wheel(self, event):
+        if event.num == 4 or event.delta > 0:
+            self.show(self.first - 3)
+        else:
+            self.show(self.first + 3)
+        return 'break'
+
+    def show(self, first=None):
+        paths = self.model.value.as_list()
+        total = len(paths)
+        if first is None:
+            first = self.first
+        self.first = max(0, min(first, total - self.height))
+        self.listbox.delete(0, END)
+        in_view = paths[self.first:self.first + self.height]
+        if in_view:
+            self.listbox.insert(END, *in_view)
+        if total:
+            self.scrollbar.set(self.first / float(total), (self.first + len(in_view)) / float(total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+        self.count_label.config(text='%d files' % total)
+
+    def remove_selected(self):
+        paths = [self.listbox.get(index) for index in self.listbox.curselection()]
+        #the view of the option (and so this list) is refreshed by the model
+        self.model.remove_files(paths)
+        self.show()
+
+    def remove_all(self):
+        self.model.clear_files()
+        self.show()
+
+
+class FileListWindow(Toplevel):
+    def __init__(self, tk_parent, model):
+        Toplevel.__init__(self, tk_parent)
+        self.title(model.output_arg or model.option.dest)
+        self.view = FileListView(self, model)
+        self.view.pack(fill='both', expand=True)
+
+
+class ArgparseSubcommandOption(ArgparseOption):
+    '''The subcommands of a parser's subparsers, chosen with an OptionMenu, with the 
+    options of the chosen subcommand shown below it.  The widgets for the options of a
+    subcommand are made the first time it is chosen and kept for switching back to it,
+    until the model evicts the form of the subcommand (see SubcommandOptionModel).
+    '''
+    model_class = SubcommandOptionModel
+
+    def __init__(
+            self, 
+            option, 
+            tk_parent, 
+            label_width=60,
+            model=None):
+        
+        ArgparseOption.__init__(self, tk_parent, option, model=model)
+        self.label_width = label_width
+
+        self.var = StringVar()
+        self.var.set(self.model.value or '')
+        self.var.trace('w', self.write_back)
+
+        choices = self.model.choices()
+        self.widget = OptionMenu(self, self.var, choices[0], *choices[1:])
+        self.label = Label(self, text=self.model.label_text(label_width))
+        #the options of the subcommand aren't disabled along with the choice of it
+        self.state_widgets = [self.label, self.widget]
+
+        #name -> SubcommandForm, for the subcommands whose widgets have been made
+        self.subcommand_frames = {}
+        self.shown_frame = None
+
+    def position(self, row, col, padx=10, pady=2):
+        next_row = ArgparseOption.position(self, row, col, padx=padx, pady=pady)
+        self.show_subcommand()
+        return next_row
+
+    def write_back(self, *args):
+        ArgparseOption.write_back(self, *args)
+        self.show_subcommand()
+
+    def show_subcommand(self):
+        if self.shown_frame is not None:
+            self.shown_frame.grid_remove()
+            self.shown_frame = None
+        name = self.model.value
+        if not name:
+            return
+        #getting the form also marks it as the most recently used
+        form = self.model.get_form(name)
+        frame = self.subcommand_frames.get(name)
+        if frame is None:
+            frame = self.subcommand_frames[name] = SubcommandForm(self, form, label_width=self.label_width)
+        #row 2 is for the error box
+        frame.grid(row=3, column=0, columnspan=2, padx=20, sticky='W')
+        self.shown_frame = frame
+
+    def form_evicted(self, name):
+        '''Called by the model when it drops the form of a subcommand'''
+        frame = self.subcommand_frames.pop(name, None)
+        if frame is not None:
+            frame.destroy()
+
+
+class SubcommandForm(Frame):
+    '''The groups of options of a subcommand, as views over the models of its form'''
+    def __init__(self, tk_parent, form, label_width=60):
+        Frame.__init__(self, tk_parent)
+        self.form = form
+        self.groups = []
+        for group in ordered_action_groups(form.parser):
+            if len(group._group_actions) and not hasattr(group, 'GUI_IGNORE'):
+                gui_group = ArgparseOptionGroup(self, group, label_width=label_width, models=form.action_models)
+                gui_group.grid()
+                self.groups.append(gui_group)
+
+
+class SubcommandWindow(Toplevel):
+    '''The options of a subcommand in a window of their own, for the virtual layout, 
+    whose rows all have the same height
+    '''
+    def __init__(self, tk_parent, model, label_width=60):
+        Toplevel.__init__(self, tk_parent)
+        self.title(model.value)
+        self.model = model
+        self.name = model.value
+        self.view = SubcommandForm(self, model.get_form(model.value), label_width=label_width)
+        self.view.pack(fill='both', expand=True)
+
+
+OPTION_CLASSES = {
+        BOOL:ArgparseBoolOption,
+        STRING:ArgparseStringOption,
+        CHOICE:ArgparseOptionMenuOption,
+        FILE:ArgparseFileOption,
+        SUBCOMMAND:ArgparseSubcommandOption
+        }
+
+#in a sweep several choices may be given, which an OptionMenu can't do
+SWEEP_OPTION_CLASSES = dict(OPTION_CLASSES)
+SWEEP_OPTION_CLASSES[CHOICE] = ArgparseStringOption
 
 
 class ArgparseOptionGroup(Frame):
@@ -512,7 +690,18 @@ class ArgparseOptionGroup(Frame):
             group,
             widget_padx=10,
             widget_pady=4,
-            label_width=65):
+            label_width=65,
+            models=None,
+            option_classes=None,
+            timer=NULL_TIMER):
+        '''
+        models - optional dict of argparse action -> model from tkarg.optionmodel, e.g. 
+            ArgparseOptionForm.action_models, for the option widgets to be views over.  
+            Models are created for any actions not in it.
+        option_classes - dict of model kind -> ArgparseOption class, by default OPTION_CLASSES
+        timer - a tkarg.timing.PhaseTimer, to which the time spent creating and positioning
+            the option widgets is added
+        '''
       
         #ArgparseGui
             #column frame
@@ -527,23 +716,20 @@ class ArgparseOptionGroup(Frame):
                 #           (other, e.g. update box)
 
         column_offset = 0
+        option_classes = option_classes or OPTION_CLASSES
 
         #self.tk_parent = tk_parent
         Frame.__init__(self, tk_parent)
         self.options = {}
         self.num_rows = 0
 
-        if group.title != "optional arguments":
-            self.display_title = group.title.upper()
-        else:
-            #This is for the optional group, the default group for arguments
-            self.display_title = "Misc. options".upper()
+        self.display_title = group_display_title(group)
         #Put the group label and hide widget in a single frame here
         self.group_title_frame = Frame(self)
         Label(self.group_title_frame, 
                 width=int(label_width*0.7),
                 text=fill(self.display_title, label_width*0.7), 
-                font=tkFont.Font(size=14, weight='bold')).grid(row=self.num_rows, column=column_offset, columnspan=1)
+                font=title_font(self)).grid(row=self.num_rows, column=column_offset, columnspan=1)
         #hide button is created here for simplicity, but may be removed if specified in gui_config
         self.hide_button = Button(self.group_title_frame, text='HIDE', command=self.flip_hidden_state)
         self.hide_button.grid(row=self.num_rows, column=1, sticky=N)
@@ -560,42 +746,28 @@ class ArgparseOptionGroup(Frame):
             if option not in seen_options:
                 seen_options.append(option)
                 
-                #a flag, which appears as a checkbox
-                if isinstance(option, (argparse._StoreTrueAction, argparse._StoreFalseAction, argparse._StoreConstAction)):
-                    gui_option = ArgparseBoolOption(option, self.options_frame, label_width=label_width)
-               
-                #some variable(s) to store
-                elif isinstance(option, (argparse._StoreAction, argparse._AppendAction)):
-                    #with fixed choices, appears as a select box
-                    if option.choices:
-                        gui_option = ArgparseOptionMenuOption(option, self.options_frame, label_width=label_width)
-                    
-                    #hack to add a file chooser widget if 'file' appears in the option name, which would be considered a string otherwise
-                    elif option.type in [str, None] and 'file' in option.dest.lower():
-                        gui_option = ArgparseFileOption(option, self.options_frame, label_width=label_width)
-                    
-                    #if no type is specified to ArgumentParser.add_argument then the default is str
-                    #this will appear as a text entry box
-                    elif option.type in [None, str, float, int, type(proportion_type), type(argparse_bounded_float)]:
-                        gui_option = ArgparseStringOption(option, self.options_frame, label_width=label_width)
-                   
-                    #if the actual argparse.FileType is specified in the type, in which case it is usually automatically opened during parse_args
-                    elif option.type in [argparse.FileType,  file]:
-                        gui_option = ArgparseFileOption(option, self.options_frame, label_width=label_width)
-                   
-                    else:
-                        sys.exit("unknown Store action: %s (%s)\n" % (type(option), option.dest))
-                
-                #my derived action, same as append, but doesn't overwrite specified defaults (good for kwargs)
-                elif isinstance(option, ArgparseActionAppendToDefault):
-                    gui_option = ArgparseStringOption(option, self.options_frame, label_width=label_width)
+                model = models.get(option) if models else None
+                if model is not None:
+                    kind = model.kind
+                else:
+                    try:
+                        kind = classify_action(option)
+                    except ValueError as err:
+                        sys.exit(str(err))
+
                 #ignore help
-                elif isinstance(option, (argparse._HelpAction, argparse._VersionAction)):
+                if kind is None:
                     continue
-                else:
-                    sys.exit("unknown action: %s\n" % option)
+                if timer.enabled:
+                    start = time.time()
+                gui_option = option_classes[kind](option, self.options_frame, label_width=label_width, model=model)
+                if timer.enabled:
+                    positioned = time.time()
+                    timer.add_time('option widgets', positioned - start)
                
                 self.num_rows = gui_option.position(self.num_rows, column_offset)
+                if timer.enabled:
+                    timer.add_time('option position', time.time() - positioned)
 
                 if gui_option.option.option_strings:
                     self.options[gui_option.option.option_strings[-1]] = gui_option
@@ -647,6 +819,643 @@ class ArgparseOptionGroup(Frame):
             self.hide_button.grid_remove()
             
 
+class VirtualOptionRow(Frame):
+    '''A recyclable row of a VirtualOptionViewport.  A row is bound to one option model 
+    at a time, and shows and edits the value held by that model.  When the row scrolls 
+    out of view it is unbound and may be rebound to another model of the same kind.
+    '''
+    def __init__(self, tk_parent, label_width=60):
+        Frame.__init__(self, tk_parent)
+        self.label_width = label_width
+        self.model = None
+        #set while a model is being bound, so that var traces don't write the model back to itself
+        self.binding = False
+
+        self.label = Label(self, anchor='w', justify=LEFT)
+        self.label.grid(row=0, column=0, padx=10, pady=2, sticky='W')
+        self.columnconfigure(0, minsize=450)
+        self.columnconfigure(1, minsize=150)
+
+    def bind_model(self, model, label_text):
+        self.binding = True
+        self.model = model
+        model.view = self
+        self.label.config(text=label_text)
+        self.show_value()
+        self.show_state()
+        self.show_error()
+        self.binding = False
+
+    def unbind_model(self):
+        if self.model is not None:
+            self.model.view = None
+        self.model = None
+
+    def show_value(self):
+        pass
+
+    def show_state(self):
+        state = NORMAL if self.model.enabled else DISABLED
+        for child in self.winfo_children():
+            child.config(state=state)
+
+    def show_error(self):
+        '''Rows have a fixed height, so the error is only shown by colour, with the 
+        messages listed in the status frame if RUN is pressed.
+        '''
+        error = self.model.error
+        self.label.config(foreground='red' if error else 'black')
+        if isinstance(self.widget, Entry):
+            self.widget.config(background=ERROR_BACKGROUND if error else 'white')
+
+    def on_var_write(self, *args):
+        if self.model is not None and not self.binding:
+            self.model.set_value(self.var.get())
+
+
+class VirtualBoolRow(VirtualOptionRow):
+    def __init__(self, tk_parent, label_width=60):
+        VirtualOptionRow.__init__(self, tk_parent, label_width=label_width)
+        self.var = Variable()
+        self.widget = Checkbutton(self, variable=self.var, onvalue=1, offvalue=0)
+        self.widget.grid(row=0, column=1, padx=10, pady=2, sticky='N')
+        self.var.trace('w', self.on_var_write)
+
+    def show_value(self):
+        self.widget.config(onvalue=self.model.onvalue(), offvalue=self.model.offvalue())
+        self.var.set(self.model.value)
+
+
+class VirtualStringRow(VirtualOptionRow):
+    def __init__(self, tk_parent, label_width=60):
+        VirtualOptionRow.__init__(self, tk_parent, label_width=label_width)
+        self.var = StringVar()
+        self.widget = Entry(self, textvariable=self.var, width=10)
+        self.widget.grid(row=0, column=1, padx=10, pady=2, sticky='N')
+        self.var.trace('w', self.on_var_write)
+
+    def show_value(self):
+        self.var.set(self.model.value if self.model.value is not None else '')
+
+
+class VirtualChoiceRow(VirtualOptionRow):
+    def __init__(self, tk_parent, label_width=60):
+        VirtualOptionRow.__init__(self, tk_parent, label_width=label_width)
+        self.var = StringVar()
+        #the menu entries are replaced each time a model is bound
+        self.widget = OptionMenu(self, self.var, '')
+        self.widget.grid(row=0, column=1, padx=10, pady=2, sticky='N')
+        self.var.trace('w', self.on_var_write)
+
+    def show_value(self):
+        menu = self.widget['menu']
+        menu.delete(0, END)
+        for choice in self.model.choices():
+            menu.add_command(label=str(choice), command=lambda val=choice: self.var.set(val))
+        self.var.set(self.model.value if self.model.value is not None else '')
+
+
+class VirtualFileRow(VirtualOptionRow):
+    def __init__(self, tk_parent, label_width=60):
+        VirtualOptionRow.__init__(self, tk_parent, label_width=label_width)
+        self.widget = Button(self, text='OPEN', command=self.choose_files)
+        self.widget.grid(row=0, column=1, padx=10, pady=2, sticky='N')
+        self.update_box = Label(self, anchor='w', foreground='red')
+        self.update_box.grid(row=1, column=0, padx=10, sticky='W')
+        self.list_button = Button(self, text='LIST', command=self.show_file_list)
+        self.list_window = None
+
+    def show_value(self):
+        dialog = self.model.dialog_kind()
+        self.widget.config(text='SAVE AS' if dialog == 'save' else 'OPEN')
+        fstr = 'Files' if self.model.multiple() else 'File'
+        #rows have a fixed height, so the result of checking the files replaces the paths
+        check_text = self.model.file_check_text()
+        if check_text:
+            problems = self.model.file_check is not None and self.model.file_check.problems
+            self.update_box.config(text='  %s chosen: %s' % (fstr, check_text), foreground='red' if problems else 'dark green')
+        else:
+            self.update_box.config(text=wrap_filepath('  %s chosen: %s ' % (fstr, describe_files(self.model.value)), self.label_width+10),
+                    foreground='red')
+        if self.model.multiple():
+            self.list_button.grid(row=1, column=1, padx=10, sticky='N')
+        else:
+            self.list_button.grid_remove()
+        if self.list_window is not None and self.list_window.winfo_exists():
+            if self.list_window.view.model is self.model:
+                self.list_window.view.show()
+
+    def show_file_check(self):
+        self.show_value()
+
+    def show_file_list(self):
+        if self.list_window is not None and self.list_window.winfo_exists():
+            self.list_window.destroy()
+        self.list_window = FileListWindow(self, self.model)
+
+    def choose_files(self):
+        dialog = self.model.dialog_kind()
+        initialdir = self.model.base_directory()
+        if dialog == 'open_multiple':
+            paths = dialogs().askopenfilenames(initialdir=initialdir)
+        elif dialog == 'save':
+            paths = [dialogs().asksaveasfilename(initialdir=initialdir)]
+        else:
+            paths = [dialogs().askopenfilename(initialdir=initialdir)]
+        self.model.add_files(paths)
+        self.show_value()
+        if self.model.value:
+            self.model.activate_dependencies()
+
+
+class VirtualSubcommandRow(VirtualOptionRow):
+    '''The subcommand is chosen in the row, and its options are shown in a SubcommandWindow'''
+    def __init__(self, tk_parent, label_width=60):
+        VirtualOptionRow.__init__(self, tk_parent, label_width=label_width)
+        self.var = StringVar()
+        self.widget = OptionMenu(self, self.var, '')
+        self.widget.grid(row=0, column=1, padx=10, pady=2, sticky='N')
+        self.options_button = Button(self, text='OPTIONS', command=self.show_options)
+        self.options_button.grid(row=0, column=2, padx=10, pady=2, sticky='N')
+        self.window = None
+        self.var.trace('w', self.on_var_write)
+
+    def show_value(self):
+        menu = self.widget['menu']
+        menu.delete(0, END)
+        for choice in self.model.choices():
+            menu.add_command(label=str(choice), command=lambda val=choice: self.var.set(val))
+        self.var.set(self.model.value or '')
+
+    def on_var_write(self, *args):
+        VirtualOptionRow.on_var_write(self, *args)
+        #the window shows the options of the subcommand that was chosen when it was opened
+        if self.window is not None and self.window.winfo_exists() and self.window.name != self.var.get():
+            self.window.destroy()
+
+    def show_options(self):
+        if self.window is not None and self.window.winfo_exists():
+            self.window.destroy()
+        if self.model.value:
+            self.window = SubcommandWindow(self, self.model, label_width=self.label_width)
+
+    def form_evicted(self, name):
+        if self.window is not None and self.window.winfo_exists() and self.window.name == name:
+            self.window.destroy()
+
+
+class VirtualTitleRow(Frame):
+    '''Heading for a group of options in a VirtualOptionViewport'''
+    def __init__(self, tk_parent, label_width=60):
+        Frame.__init__(self, tk_parent)
+        self.label = Label(self, 
+                width=int(label_width*0.7),
+                font=title_font(self))
+        self.label.grid(row=0, column=0)
+        self.model = None
+
+    def bind_model(self, model, label_text):
+        self.label.config(text=label_text)
+
+    def unbind_model(self):
+        pass
+
+
+VIRTUAL_ROW_CLASSES = {
+        'title':VirtualTitleRow,
+        BOOL:VirtualBoolRow,
+        STRING:VirtualStringRow,
+        CHOICE:VirtualChoiceRow,
+        FILE:VirtualFileRow,
+        SUBCOMMAND:VirtualSubcommandRow
+        }
+
+
+class VirtualOptionViewport(object):
+    '''Display a long list of option models on a canvas, only creating widgets for the 
+    rows that are currently in view.  Rows that scroll out of view are put back in a 
+    pool and reused for whichever rows scroll into view, so the number of widgets stays
+    proportional to the height of the window rather than the number of options.
+
+    The height of each row is computed up front from the number of lines in its 
+    (wrapped) label, so that the scrollregion covers all rows without any widgets 
+    having been made for them.
+
+    rows - list of (kind, model, label_text) tuples, where kind is 'title' or one of the
+        option model kinds, and model is None for titles
+    '''
+    def __init__(self, canvas, scrollbar, rows, width, label_width=60, line_height=18, row_padding=10, overscan=3):
+        self.canvas = canvas
+        self.scrollbar = scrollbar
+        #all of the rows, of which those in self.rows are shown, see filter
+        self.all_rows = rows
+        self.width = width
+        self.label_width = label_width
+        self.line_height = line_height
+        self.row_padding = row_padding
+        self.overscan = overscan
+
+        self.canvas.configure(yscrollcommand=self.on_scroll)
+        self.canvas.bind('<Configure>', self.schedule_refresh)
+
+        #index -> (row widget, canvas window item) for rows in view
+        self.shown = {}
+        #kind -> list of (row widget, canvas window item) not currently in use
+        self.pool = {}
+        self.refresh_pending = False
+        self.widgets_created = 0
+
+        self.set_rows(rows)
+
+    def set_rows(self, rows):
+        self.rows = rows
+        #offsets[i] is the y coordinate of the top of row i, offsets[-1] is the total height.
+        #An array takes a machine word per row, rather than a Python int object.
+        self.offsets = array('l', [0])
+        for kind, model, label_text in rows:
+            num_lines = label_text.count('\n') + 1
+            if kind == FILE:
+                #room for the update box
+                num_lines += 1
+            elif kind == 'title':
+                num_lines += 1
+            self.offsets.append(self.offsets[-1] + num_lines * self.line_height + self.row_padding)
+        self.canvas.configure(scrollregion=(0, 0, self.width, self.offsets[-1]))
+
+    def filter(self, models):
+        '''Show only the rows of models, under the titles of their groups, or all rows if 
+        models is None.  No widgets are made or destroyed, the rows in view are just 
+        returned to the pool and the positions of the rows worked out again.
+        '''
+        if models is None:
+            rows = self.all_rows
+        else:
+            rows = []
+            title = None
+            for row in self.all_rows:
+                if row[0] == 'title':
+                    title = row
+                elif row[1] in models:
+                    #a title is only shown if some option under it is
+                    if title is not None:
+                        rows.append(title)
+                        title = None
+                    rows.append(row)
+
+        for index, (row, item) in self.shown.items():
+            row.unbind_model()
+            self.canvas.itemconfigure(item, state='hidden')
+            self.pool.setdefault(self.rows[index][0], []).append((row, item))
+        self.shown = {}
+        self.set_rows(rows)
+        self.canvas.yview_moveto(0)
+        self.schedule_refresh()
+
+    def on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        self.schedule_refresh()
+
+    def schedule_refresh(self, event=None):
+        #coalesce the many scroll events that come with a single drag into one refresh
+        if not self.refresh_pending:
+            self.refresh_pending = True
+            self.canvas.after_idle(self.refresh)
+
+    def visible_range(self):
+        top = self.canvas.canvasy(0)
+        bottom = top + self.canvas.winfo_height()
+        first = max(bisect.bisect_right(self.offsets, top) - 1 - self.overscan, 0)
+        last = min(bisect.bisect_left(self.offsets, bottom) + self.overscan, len(self.rows))
+        return first, last
+
+    def refresh(self):
+        self.refresh_pending = False
+        first, last = self.visible_range()
+
+        for index in self.shown.keys():
+            if index < first or index >= last:
+                row, item = self.shown.pop(index)
+                row.unbind_model()
+                self.canvas.itemconfigure(item, state='hidden')
+                self.pool.setdefault(self.rows[index][0], []).append((row, item))
+
+        for index in xrange(first, last):
+            if index not in self.shown:
+                kind, model, label_text = self.rows[index]
+                free = self.pool.get(kind)
+                if free:
+                    row, item = free.pop()
+                    self.canvas.coords(item, 0, self.offsets[index])
+                    self.canvas.itemconfigure(item, state='normal')
+                else:
+                    row = VIRTUAL_ROW_CLASSES[kind](self.canvas, label_width=self.label_width)
+                    item = self.canvas.create_window((0, self.offsets[index]), window=row, anchor='nw')
+                    self.widgets_created += 1
+                row.bind_model(model, label_text)
+                self.shown[index] = (row, item)
+
+
+class BoundedScrollback(object):
+    '''Keep only a window of at most about max_lines lines in a Text widget, with the 
+    full history in a SpillFile (see tkarg.scrollback).  The SpillFile is only made when
+    lines first have to be removed from the widget, or the history is searched, so a gui
+    that writes little never makes one.
+
+    While the view is at the end of the text, new text is added to the widget and lines 
+    scrolled off the top are removed from it.  Scrolling to the top of the widget loads
+    the previous chunk_lines lines from the spill file, and jumping to a line or search 
+    result loads the window around it.  While looking at older lines the widget is left 
+    alone, and scrolling back to the bottom loads the lines since.
+    '''
+    def __init__(self, text_widget, max_lines=5000, chunk_lines=500, spill_path=None):
+        self.text = text_widget
+        self.max_lines = max_lines
+        self.chunk_lines = chunk_lines
+        self.spill_path = spill_path
+        self.spill = None
+        #until there is a spill file all of the text is in the widget, and these count its lines
+        self.newlines = 0
+        self.partial_line = False
+        #the lines of the spill file shown in the widget are [first_line, last_line)
+        self.first_line = 0
+        self.last_line = 0
+        self.following = True
+
+        self.scrollbar_set = None
+        self.text.configure(yscrollcommand=self.on_scroll)
+
+    def attach_scrollbar(self, scrollbar):
+        self.scrollbar_set = scrollbar.set
+        scrollbar.configure(command=self.text.yview)
+
+    def widget_lines(self):
+        return self.last_line - self.first_line
+
+    def line_count(self):
+        '''Number of lines in the whole history, including an incomplete last line'''
+        if self.spill is not None:
+            return self.spill.line_count()
+        return self.newlines + (1 if self.partial_line else 0)
+
+    def get_spill(self):
+        '''The spill file, made from the text in the widget if there isn't one yet, which
+        is then the whole history since nothing has been removed from it
+        '''
+        if self.spill is None:
+            self.spill = SpillFile(self.spill_path)
+            self.spill.append(self.text.get('1.0', 'end - 1 chars'))
+        return self.spill
+
+    def append(self, text):
+        '''Called on the Tk thread with newly written text'''
+        if not text:
+            return
+        if self.spill is not None:
+            self.spill.append(text)
+        else:
+            self.newlines += text.count('\n')
+            self.partial_line = not text.endswith('\n')
+        if not self.following:
+            return
+        self.text.insert(END, text)
+        self.last_line = self.line_count()
+        self.text.see(END)
+        #trim in chunks, rather than a few lines per write
+        if self.widget_lines() > self.max_lines + self.chunk_lines:
+            self.get_spill()
+            self.drop_top(self.widget_lines() - self.max_lines)
+
+    def drop_top(self, num_lines):
+        self.text.delete('1.0', '%d.0' % (num_lines + 1))
+        self.first_line += num_lines
+
+    def drop_bottom(self, num_lines):
+        keep = self.widget_lines() - num_lines
+        self.text.delete('%d.0' % (keep + 1), END)
+        self.last_line -= num_lines
+        self.following = False
+
+    def show_window(self, first_line):
+        '''Replace the widget contents with the max_lines lines starting at first_line'''
+        spill = self.get_spill()
+        total = spill.line_count()
+        first_line = max(min(first_line, total - self.max_lines), 0)
+        self.text.delete('1.0', END)
+        self.first_line = first_line
+        self.last_line = min(first_line + self.max_lines, total)
+        self.text.insert(END, spill.get_lines(self.first_line, self.last_line))
+        self.following = self.last_line >= total
+
+    def on_scroll(self, first, last):
+        if self.scrollbar_set is not None:
+            self.scrollbar_set(first, last)
+        if float(first) <= 0.0 and self.first_line > 0:
+            self.text.after_idle(self.load_previous)
+        elif float(last) >= 1.0 and not self.following:
+            self.text.after_idle(self.load_next)
+
+    def load_previous(self):
+        load = min(self.chunk_lines, self.first_line)
+        if not load:
+            return
+        self.text.insert('1.0', self.spill.get_lines(self.first_line - load, self.first_line))
+        self.first_line -= load
+        #keep the line that was at the top of the view there
+        self.text.yview('%d.0' % (load + 1))
+        if self.widget_lines() > self.max_lines + self.chunk_lines:
+            self.drop_bottom(self.widget_lines() - self.max_lines)
+
+    def load_next(self):
+        total = self.spill.line_count()
+        load = min(self.chunk_lines, total - self.last_line)
+        if load > 0:
+            #the last line in the widget may have been incomplete when it was loaded
+            self.text.delete('%d.0' % self.widget_lines(), END)
+            self.last_line -= 1
+            self.text.insert(END, self.spill.get_lines(self.last_line, self.last_line + load + 1))
+            self.last_line = min(self.last_line + load + 1, total)
+        self.following = self.last_line >= total
+        if self.widget_lines() > self.max_lines + self.chunk_lines:
+            self.drop_top(self.widget_lines() - self.max_lines)
+
+    def goto_line(self, line):
+        '''Show line (numbered from 0 over the whole history)'''
+        if not self.first_line <= line < self.last_line:
+            self.show_window(line - self.max_lines // 2)
+        index = '%d.0' % (line - self.first_line + 1)
+        self.text.see(index)
+        self.text.tag_remove('found', '1.0', END)
+        self.text.tag_add('found', index, index + ' lineend')
+        self.text.tag_config('found', background='yellow')
+
+    def search(self, pattern, regex=False, ignore_case=False, start_line=0):
+        '''Line numbers of all lines in the history containing pattern'''
+        return self.get_spill().search(pattern, regex=regex, ignore_case=ignore_case, start_line=start_line)
+
+    def close(self):
+        if self.spill is not None:
+            self.spill.close()
+
+
+class StatusWriter(object):
+    '''File-like sink for messages to show in a Text widget, which may be written to from
+    any thread.  Writes are only buffered, and the buffered text is inserted into the 
+    widget as a single string at most once per frame interval, on the Tk thread.  This 
+    keeps a task that logs many lines a second from swamping the gui with inserts and 
+    redraws.  Flushing is only scheduled once something has been written, and stops
+    again when nothing more has been for a while.
+
+    Tk may only be used from the Tk thread, so a write from another thread that has to
+    start flushing again does so through wake, a thread safe callable that runs the 
+    callback it is passed on the Tk thread, e.g. a TkDispatcher's post while it is
+    dispatching.  Without one it calls after_idle on the widget, which needs a Tcl built
+    with threads.
+
+    If more than max_pending characters are waiting to be shown the oldest messages are 
+    dropped, and a note saying how many were dropped is shown in their place.
+
+    Counters:
+    messages - number of writes
+    flushes - number of inserts into the widget
+    coalesced - writes that were combined into an insert with earlier ones
+    dropped - writes that were discarded because the buffer was full
+    '''
+    def __init__(self, text_widget, frame_interval=33, idle_interval=250, max_pending=1000000, scrollback=None,
+            wake=None):
+        self.text = text_widget
+        self.wake = wake
+        #a BoundedScrollback managing the contents of text_widget, if any
+        self.scrollback = scrollback
+        self.frame_interval = frame_interval
+        self.idle_interval = idle_interval
+        self.max_pending = max_pending
+        self.tk_thread = threading.current_thread()
+
+        self.lock = threading.Lock()
+        self.pending = collections.deque()
+        self.pending_chars = 0
+        self.pending_dropped = 0
+
+        self.messages = 0
+        self.flushes = 0
+        self.coalesced = 0
+        self.dropped = 0
+
+        self.closed = False
+        self.interval = frame_interval
+        #whether flushing is scheduled or about to be, guarded by lock
+        self.flushing = False
+        self.scheduled = None
+
+    def write(self, message):
+        if not message:
+            return
+        with self.lock:
+            self.pending.append(message)
+            self.pending_chars += len(message)
+            self.messages += 1
+            while self.pending_chars > self.max_pending and len(self.pending) > 1:
+                self.pending_chars -= len(self.pending.popleft())
+                self.pending_dropped += 1
+                self.dropped += 1
+            start = not self.flushing and not self.closed
+            if start:
+                self.flushing = True
+
+        if threading.current_thread() is self.tk_thread:
+            if start or self.interval > self.frame_interval:
+                #don't wait out a backed off interval to show messages written on the Tk thread
+                self.schedule(self.frame_interval)
+        elif start:
+            if self.wake is not None:
+                self.wake(self.start_flushing)
+            else:
+                self.text.after_idle(self.start_flushing)
+
+    def start_flushing(self):
+        if self.scheduled is None and not self.closed:
+            self.schedule(self.frame_interval)
+
+    def schedule(self, interval):
+        if self.scheduled is not None:
+            self.text.after_cancel(self.scheduled)
+        self.interval = interval
+        self.scheduled = self.text.after(interval, self.flush_loop)
+
+    def writelines(self, lines):
+        for line in lines:
+            self.write(line)
+
+    def take_pending(self):
+        with self.lock:
+            if not self.pending:
+                return ''
+            num_messages = len(self.pending)
+            text = ''.join(self.pending)
+            if self.pending_dropped:
+                text = '[... %d messages dropped ...]\n' % self.pending_dropped + text
+            self.pending.clear()
+            self.pending_chars = 0
+            self.pending_dropped = 0
+            self.coalesced += num_messages - 1
+        return text
+
+    def flush(self):
+        '''Show everything written so far.  Only does anything on the Tk thread, elsewhere
+        the next scheduled flush will take care of it.
+        '''
+        if threading.current_thread() is not self.tk_thread:
+            return
+        text = self.take_pending()
+        if text and self.scrollback is not None:
+            self.flushes += 1
+            self.scrollback.append(text)
+        elif text:
+            self.flushes += 1
+            #only follow the output if the view was already at the end
+            at_end = self.text.yview()[1] >= 1.0
+            self.text.insert(END, text)
+            if at_end:
+                self.text.see(END)
+        return text
+
+    def flush_loop(self):
+        self.scheduled = None
+        if self.flush():
+            interval = self.frame_interval
+        elif self.interval >= self.idle_interval:
+            #nothing written for a while, so stop until something is
+            with self.lock:
+                if not self.pending:
+                    self.flushing = False
+                    return
+            interval = self.frame_interval
+        else:
+            #back off while nothing is being written
+            interval = min(self.interval * 2, self.idle_interval)
+        if not self.closed:
+            self.schedule(interval)
+
+    def close(self, flush=True):
+        '''Stop flushing and close the scrollback.  flush=False when the widget is being
+        destroyed, and pending text can no longer be shown.
+        '''
+        if flush:
+            self.flush()
+        self.closed = True
+        if self.scheduled is not None:
+            self.text.after_cancel(self.scheduled)
+            self.scheduled = None
+        if self.scrollback is not None:
+            self.scrollback.close()
+
+    def isatty(self):
+        return False
+
+    def counters(self):
+        return {'messages':self.messages, 'flushes':self.flushes, 'coalesced':self.coalesced, 'dropped':self.dropped}
+
+
 class ArgparseGui(object):
     def __init__(
             self, 
@@ -662,70 +1471,159 @@ class ArgparseGui(object):
             output_frame=False,
             status_frame=True,
             graphics_window=False,
-            progress_bar=False):
+            progress_bar=False,
+            virtual=False,
+            schema_cache=None,
+            max_tasks=4,
+            task_kind='thread',
+            on_run=None,
+            status_max_lines=5000,
+            validate=False,
+            sweep=False,
+            check_files=False,
+            readahead_files=False,
+            timing=None,
+            filter_bar=False,
+            preview=False,
+            cwd=None):
+        '''
+        virtual - only create widgets for the options currently scrolled into view, which 
+            keeps construction fast for parsers with very many options.  The options are 
+            shown in a single scrolling list rather than in columns, and widgets_per_column
+            is ignored.  Option values are held in models from tkarg.optionmodel, so 
+            make_commandline_list works for options that were never shown.
+        schema_cache - a tkarg.schemacache.SchemaCache, from which the results of examining 
+            the parser's actions are loaded if the parser hasn't changed since they were 
+            cached, rather than examining them again
+        max_tasks - the number of tasks passed to submit_task (or queue_thread) that may 
+            run at once
+        task_kind - whether tasks passed to submit_task run in worker 'thread's or in a 
+            'process' pool.  Threads queued with queue_thread, and the runs of a 
+            tkarg.runner, always run on threads, since they can't be sent to a process.
+        on_run - if given, RUN calls this with the result of make_commandline_list and 
+            leaves the gui open, rather than closing it (see tkarg.runner)
+        status_max_lines - roughly the most lines kept in the status frame, with older 
+            ones kept on disk and loaded again when scrolled back to (see BoundedScrollback). 
+            None to keep everything in the widget.
+        validate - check the values of options against their argparse type, choices and
+            nargs shortly after each edit, showing any errors next to the option, and refuse 
+            to finish while any remain (see tkarg.validation).  Off by default, since values
+            that were accepted before would then stop DONE from closing the gui.
+        sweep - let options hold lists, ranges or globs of values, as described in 
+            tkarg.sweep, with choices typed rather than picked from a menu.  The number of
+            runs the sweep would make is shown by the buttons.  Use with on_run, e.g. from
+            a tkarg.runner.SweepRunner.
+        check_files - check that chosen files exist and can be read (or written, for 
+            output files) on a background thread as soon as they are chosen, showing the 
+            number, total size and any problems under the option, and refusing to finish
+            while there are problems (see tkarg.filecheck)
+        readahead_files - also hint to the OS to start reading the chosen input files into
+            the page cache, so they are ready when the script reads them.  Implies 
+            check_files.
+        timing - time each phase of building the gui (see tkarg.timing).  True to collect 
+            the timings in self.timer, '1' to also write a summary to stderr, or a path to 
+            write them to as JSON.  By default, whatever the TKARG_TIMING environment 
+            variable says.
+        filter_bar - put an entry above the options, so that only options whose flags, 
+            dest, group title or help contain words starting with what is typed into it
+            are shown (see tkarg.optionindex).  Off by default, so existing guis keep their
+            layout.
+        preview - show the command line, shell quoted, below the buttons as the options are
+            changed, with a button to copy it (see tkarg.preview).  True to show it after
+            the parser's prog, or a list of strings to show it after, e.g. ['python', script].
+        cwd - the directory the script will be run in, if not the current one.  Relative 
+            paths of files are checked relative to it, and file dialogs start there.
+        '''
+        self.timer = make_timer(timing)
+        self.timer.start('ArgparseGui')
 
+        self.timer.start('Tk root')
         self.tk = tk or Tk()
         self.tk.title(parser.description or parser.prog)
+        self.timer.stop()
 
+        import Queue
         self.queue = Queue.Queue()
         self.analysis_threads = []
 
+        #tasks are run by an executor that is created when the first is submitted
+        self.max_tasks = max_tasks
+        self.task_kind = task_kind
+        self.executor = None
+        #for tasks that must run on threads when task_kind is 'process', see get_thread_executor
+        self.thread_executor = None
+        self.dispatcher = None
+        self.task_results = []
+        self.on_run = on_run
+
         auto_size = False
         if auto_size:
             width = self.tk.winfo_screenwidth() * 0.9
             height = self.tk.winfo_screenheight() * 0.85
 
-        #this call is currently required, so has side effects besides making the scrollbars
-        self.AddScrollbars(height, width)
+        #the models hold the values of all of the options, the widgets are views over them
+        self.timer.start('option models')
+        try:
+            if schema_cache is not None:
+                self.schema = schema_cache.get_schema(parser, widgets_per_column, label_width)
+            else:
+                self.schema = None
+            self.form = ArgparseOptionForm(parser, schema=self.schema, cwd=cwd)
+        except ValueError as err:
+            sys.exit(str(err))
+        self.timer.annotate('options', len(self.form.models))
+        self.timer.stop()
+
+        #enabling and disabling of dependent options is applied in one go when idle
+        self.pending_dependency_changes = {}
+        self.form.dependencies.on_change = self.queue_dependency_changes
+
+        self.sweep = sweep
+        if validate:
+            self.validator = LiveValidator(self.tk, sweep=sweep)
+            self.form.add_listener(self.validator.value_changed)
+        else:
+            self.validator = None
+
+        if check_files or readahead_files:
+            from tkarg.filecheck import FileChecker
+            self.file_checker = FileChecker(self.tk, readahead_files=readahead_files)
+            self.form.add_listener(self.file_checker.value_changed)
+        else:
+            self.file_checker = None
 
         #start collecting the options
         self.option_list = {}
-
-        group_row, option_row = 0, 0
-        max_row, max_col = 0, 0
-        
-        #first group is positional, second is optional, then any user defined groups
-        #optional group includes any flags not explictly placed in a group
-        #this reorders them such that the optional group will appear last below
-        group_list = [parser._action_groups[0]]
-        if len(parser._action_groups) > 2:
-            group_list.extend(parser._action_groups[2:])
-        group_list.append(parser._action_groups[1])
-       
-        positional_num = 1
-        #Loop over the argparse argument groups
-        self.column_frame = Frame(self.frame)
-        self.column_frames = [self.column_frame]
-        
-        for group in group_list:
-            if len(group._group_actions) and not hasattr(group, 'GUI_IGNORE'):
-                #This is inelegant, but first create the group, then look at its size.  
-                #If it is too big to fit into the current column, just make the gui 
-                #forget it and remake it to place into the next column. Making a 
-                #function that just determines the size is a little dangerous since
-                #its logic will need to be manually sync'ed with the group __init__
-                gui_group = ArgparseOptionGroup(self.column_frame, group)
-                group_row_size = gui_group.num_rows
-
-                if option_row + group_row_size >= widgets_per_column:
-                    gui_group.grid_forget()
-                    group_row = 0
-                    option_row = 0
-                    self.column_frame = Frame(self.frame)
-                    self.column_frames.append(self.column_frame)
-                    gui_group = ArgparseOptionGroup(self.column_frame, group)
-               
-                #by default this places widget in next unused row
-                gui_group.grid()
-                option_row += group_row_size
-                group_row += 1
-
-                self.option_list.update(gui_group.options)
-
-        for num, frame in enumerate(self.column_frames):
-            frame.grid(row=0, column=num, sticky=N)
+        self.option_groups = []
+        self.viewport = None
+
+        self.option_index = None
+        #options and groups hidden by the filter bar
+        self.filtered_options = set()
+        self.filtered_groups = set()
+        if filter_bar:
+            self.add_filter_bar()
+
+        group_list = ordered_action_groups(parser)
+
+        if virtual:
+            #the buttons and status can't live in the canvas with the virtual rows, so put them in 
+            #a frame below it.  It must be packed before the canvas to get its share of the window.
+            self.frame = Frame(self.tk)
+            self.frame.pack(side="bottom", fill="x")
+            with self.timer.phase('AddScrollbars'):
+                self.AddScrollbars(height, width, virtual=True)
+            with self.timer.phase('build_virtual_form'):
+                self.build_virtual_form(group_list, width, label_width)
+        else:
+            #this call is currently required, so has side effects besides making the scrollbars
+            with self.timer.phase('AddScrollbars'):
+                self.AddScrollbars(height, width)
+            with self.timer.phase('build_column_form'):
+                self.build_column_form(group_list, widgets_per_column)
 
         #buttons appear below the other widgets
+        self.timer.start('buttons and status')
         self.button_frame = Frame(self.frame)
         self.button_frame.grid(row=widgets_per_column+1, column=0)
         self.buttons = {}
@@ -746,29 +1644,233 @@ class ArgparseGui(object):
         but.grid(row=0, column=1)
         self.buttons['CANCEL'] = but
 
+        if sweep:
+            self.sweep_label = Label(self.button_frame)
+            self.sweep_label.grid(row=1, column=0, columnspan=2)
+            self.sweep_count_pending = False
+            self.form.add_listener(self.queue_sweep_count)
+            self.show_sweep_count()
+
         if status_frame:
             self.status_frame = Text(self.frame, width=150, height=10)
             self.status_frame.config(borderwidth=5, relief=GROOVE)
             self.status_frame.grid(row=widgets_per_column+2, column=0, columnspan=6)
+            if status_max_lines:
+                self.status_scrollback = BoundedScrollback(self.status_frame, max_lines=status_max_lines)
+            else:
+                self.status_scrollback = None
+            #file-like, so e.g. sys.stdout can be pointed at it
+            self.status_writer = StatusWriter(self.status_frame, scrollback=self.status_scrollback, wake=self.wake_tk_thread)
+            #e.g. closed by the window manager rather than DONE or CANCEL
+            self.status_frame.bind('<Destroy>', self.status_destroyed)
+        else:
+            self.status_frame = None
+            self.status_scrollback = None
+            self.status_writer = None
+
+        if preview:
+            self.add_preview(widgets_per_column+3, [parser.prog] if preview is True else preview)
+        else:
+            self.preview = None
 
         if progress_bar:
+            #importing ttk at the top would override some widget definitions from Tkinter, which is fine
+            #except bizarre things like specifying background= in constructors doesn't work
+            from ttk import Progressbar
             self.progress_bar = Progressbar(self.button_frame, mode='indeterminate', length=300)
             self.progress_bar.grid(columnspan=2)
         else:
             self.progress_bar = None
 
         self.cancelled = False
+        self.timer.stop()
 
         self.bring_to_front()
 
+        self.timer.stop()
+        if self.timer.enabled:
+            self.timer.count('widgets', count_widgets(self.tk))
+            self.tk.after_idle(self.first_idle)
+
+    def first_idle(self):
+        '''Record when the gui is first idle after being built.  The timings are reported
+        when it is closed, in close_status.'''
+        self.timer.mark('first idle')
+
+    def build_column_form(self, group_list, widgets_per_column):
+        '''Create an ArgparseOptionGroup for each argument group, arranging them in columns.
+        The columns are planned in advance from the argparse actions (see tkarg.layout), 
+        so that each group is only built once, directly into its final column.
+        '''
+        self.timer.start('layout plan')
+        if self.schema is not None:
+            self.layout_plan = layout_from_schema(self.form.parser, self.schema)
+        else:
+            self.layout_plan = LayoutPlan(widgets_per_column)
+            for group in group_list:
+                if len(group._group_actions) and not hasattr(group, 'GUI_IGNORE'):
+                    try:
+                        self.layout_plan.add_group(plan_group(group))
+                    except ValueError as err:
+                        sys.exit(str(err))
+        self.timer.stop()
+
+        self.column_frames = [Frame(self.frame) for column in self.layout_plan.columns]
+        with self.timer.phase('title font'):
+            title_font(self.frame)
+        #Loop over the argparse argument groups
+        for group_plan in self.layout_plan.groups:
+            self.timer.start('group %s' % group_display_title(group_plan.group))
+            gui_group = ArgparseOptionGroup(self.column_frames[group_plan.column], group_plan.group, models=self.form.action_models,
+                    option_classes=SWEEP_OPTION_CLASSES if self.sweep else None, timer=self.timer)
+            #by default this places widget in next unused row
+            gui_group.grid()
+            self.option_list.update(gui_group.options)
+            self.option_groups.append(gui_group)
+            if self.timer.enabled:
+                self.timer.annotate('widgets', count_widgets(gui_group))
+            self.timer.stop()
+
+        if not self.column_frames:
+            self.column_frames.append(Frame(self.frame))
+        self.column_frame = self.column_frames[-1]
+
+        for num, frame in enumerate(self.column_frames):
+            frame.grid(row=0, column=num, sticky=N)
+
+    def build_virtual_form(self, group_list, width, label_width):
+        '''Leave creating widgets for the models of the options to a VirtualOptionViewport, 
+        which does so as they are scrolled into view.
+        '''
+        rows = []
+        for group in group_list:
+            if len(group._group_actions) and not hasattr(group, 'GUI_IGNORE'):
+                rows.append(('title', None, fill(group_display_title(group), label_width*0.7)))
+                seen_options = set()
+                for option in group._group_actions:
+                    model = self.form.action_models.get(option)
+                    if model is None or option in seen_options:
+                        continue
+                    seen_options.add(option)
+                    #hidden options still contribute to the command line, they just aren't shown
+                    if not model.omit:
+                        kind = STRING if self.sweep and model.kind == CHOICE else model.kind
+                        rows.append((kind, model, model.label_text(label_width)))
+
+        self.option_list.update(self.form.option_list)
+        self.viewport = VirtualOptionViewport(self.canvas, self.vsb, rows, width, label_width=label_width)
+        self.viewport.schedule_refresh()
+
+    def add_preview(self, row, command):
+        '''A read-only view of the command line, kept up to date as options are changed'''
+        from tkarg.preview import CommandPreview
+        frame = Frame(self.frame)
+        frame.grid(row=row, column=0, columnspan=6, sticky=W)
+        text = Text(frame, width=140, height=3, wrap='word')
+        text.config(borderwidth=5, relief=GROOVE)
+        text.grid(row=0, column=0)
+        button = Button(frame, text='COPY', command=lambda: self.preview.copy())
+        button.grid(row=0, column=1, padx=10, sticky=N)
+        self.preview = CommandPreview(text, self.form, command)
+
+    def add_filter_bar(self):
+        '''An entry above the options, for typing words to show only the options matching them'''
+        bar = Frame(self.tk)
+        bar.pack(side='top', fill='x')
+        Label(bar, text='FILTER').pack(side='left', padx=10)
+        self.filter_var = StringVar()
+        entry = Entry(bar, textvariable=self.filter_var, width=40)
+        entry.pack(side='left', pady=4)
+        entry.bind('<Escape>', lambda event: self.filter_var.set(''))
+        self.filter_count = Label(bar)
+        self.filter_count.pack(side='left', padx=10)
+        self.filter_var.trace('w', lambda *args: self.apply_filter(self.filter_var.get()))
+        #built once the gui is up, rather than holding up either it or the first keystroke
+        self.tk.after_idle(self.get_option_index)
+
+    def get_option_index(self):
+        if self.option_index is None:
+            from tkarg.optionindex import OptionIndex
+            self.option_index = OptionIndex(self.form)
+        return self.option_index
+
+    def apply_filter(self, query):
+        '''Show only the options matching query, or all of them if it has no words'''
+        matches = self.get_option_index().search(query)
+        if self.viewport is not None:
+            self.viewport.filter(matches)
+        else:
+            self.filter_columns(matches)
+        if matches is None:
+            self.filter_count.config(text='')
+        else:
+            self.filter_count.config(text='%d of %d options' % (len(matches), len(self.option_index.models)))
+
+    def filter_columns(self, matches):
+        '''Hide the option widgets not among matches, and the groups left with none shown.  
+        Only the widgets whose visibility changes are touched, and they keep their place 
+        in the grid, so nothing is rebuilt.
+        '''
+        for gui_group in self.option_groups:
+            group_shown = matches is None
+            for gui_option in gui_group.options.values():
+                if gui_option.model.omit:
+                    continue
+                show = matches is None or gui_option.model in matches
+                if show and gui_option in self.filtered_options:
+                    self.filtered_options.discard(gui_option)
+                    gui_option.grid()
+                elif not show and gui_option not in self.filtered_options:
+                    self.filtered_options.add(gui_option)
+                    gui_option.grid_remove()
+                group_shown = group_shown or show
+            if group_shown and gui_group in self.filtered_groups:
+                self.filtered_groups.discard(gui_group)
+                gui_group.grid()
+            elif not group_shown and gui_group not in self.filtered_groups:
+                self.filtered_groups.add(gui_group)
+                gui_group.grid_remove()
+        self.canvas.yview_moveto(0)
+
+    def wake_tk_thread(self, callback):
+        '''Have callback called on the Tk thread, from any thread.  While tasks are running
+        the dispatcher is checking for callbacks anyway.
+        '''
+        if self.dispatcher is not None and self.dispatcher.outstanding:
+            self.dispatcher.post(callback)
+        else:
+            self.tk.after_idle(callback)
+
+    def status_destroyed(self, event):
+        if not self.status_writer.closed:
+            self.status_writer.close(flush=False)
+
     def write_to_status(self, message):
-        if not self.status_frame:
+        '''Show message in the status frame.  May be called from any thread, the message 
+        is shown with any others written in the same frame interval (see StatusWriter).
+        '''
+        if not self.status_writer:
             return
-        self.status_frame.insert(END, message)
-        #this effectively flushes output to the widget, which might be delayed otherwise
-        self.tk.update_idletasks()
+        self.status_writer.write(message)
 
-    def AddScrollbars(self, height, width):
+    def search_status(self, pattern, regex=False, ignore_case=False):
+        '''Search the whole status history, showing the first matching line.  Returns the 
+        numbers of all matching lines, which can be passed to goto_status_line.
+        '''
+        if not self.status_scrollback:
+            return []
+        self.status_writer.flush()
+        lines = self.status_scrollback.search(pattern, regex=regex, ignore_case=ignore_case)
+        if lines:
+            self.status_scrollback.goto_line(lines[0])
+        return lines
+
+    def goto_status_line(self, line):
+        if self.status_scrollback:
+            self.status_writer.flush()
+            self.status_scrollback.goto_line(line)
+
+    def AddScrollbars(self, height, width, virtual=False):
         '''adapted from http://stackoverflow.com/questions/3085696/adding-a-scrollbar-to-a-grid-of-widgets-in-tkinter
         
         This canvas object will be the entire toplevel window.  The scrollbars will be attached to it, a window
@@ -788,6 +1890,10 @@ class ArgparseGui(object):
         
         #after this call the toplevel window with scrollbars and of the correct size will exist
         self.canvas.pack(side="left", fill="both", expand=True)
+
+        if virtual:
+            #the rows are placed directly on the canvas by the VirtualOptionViewport
+            return
         
         self.frame = Frame(self.canvas)
         self.frame.config(background="#ffffff")
@@ -797,16 +1903,67 @@ class ArgparseGui(object):
         #this will allow the scrollbars to adjust if the window is manually resized
         self.frame.bind("<Configure>", self.OnFrameConfigure)
 
+    def get_dispatcher(self):
+        if self.dispatcher is None:
+            from tkarg.executor import TkDispatcher
+            self.dispatcher = TkDispatcher(self.tk)
+        return self.dispatcher
+
+    def get_executor(self):
+        if self.executor is None:
+            from tkarg.executor import TaskExecutor
+            self.executor = TaskExecutor(self.get_dispatcher(), max_workers=self.max_tasks, kind=self.task_kind)
+        return self.executor
+
+    def get_thread_executor(self):
+        '''An executor running tasks on threads whatever task_kind is, for tasks that 
+        can't be pickled for a process or that report progress'''
+        if self.task_kind == 'thread':
+            return self.get_executor()
+        if self.thread_executor is None:
+            from tkarg.executor import TaskExecutor
+            self.thread_executor = TaskExecutor(self.get_dispatcher(), max_workers=self.max_tasks)
+        return self.thread_executor
+
+    def submit_task(self, func, *args, **kwargs):
+        '''Run func(*args, **kwargs) on the executor, returning a TaskFuture.  The result of
+        every task is appended to task_results as it finishes (exceptions are written to 
+        the status frame).  See TaskExecutor.submit for reporting progress.
+        '''
+        future = self.get_executor().submit(func, *args, **kwargs)
+        future.add_done_callback(self.task_done)
+        return future
+
+    def task_done(self, future):
+        '''Called on the Tk thread as each task finishes'''
+        if future.cancelled():
+            return
+        if future.exception_value is not None:
+            self.write_to_status('Task failed: %s\n' % future.exception_value)
+        else:
+            self.task_results.append(future.result_value)
+        self.process_queue()
+
     def process_queue(self):
-        try:
-            res = self.queue.get(0)
+        '''Collect everything that tasks started with queue_thread have put in the queue.
+        For compatibility self.result is the first thing collected.
+        '''
+        import Queue
+        while True:
+            try:
+                res = self.queue.get_nowait()
+            except Queue.Empty:
+                break
             # Show result of the task if needed
             #self.progress_bar.stop()
-            self.result = res
-        except Queue.Empty:
-            self.tk.after(100, self.process_queue)
+            if not hasattr(self, 'result'):
+                self.result = res
+            self.task_results.append(res)
 
     def queue_thread(self, thread):
+        '''Queue a threading.Thread to be run when RUN is pressed.  Its target isn't run in
+        the thread itself but by the executor, and may put its result in self.queue.
+        '''
         self.analysis_threads.append(thread)
 
     def output_result(self, text):
@@ -818,26 +1975,84 @@ class ArgparseGui(object):
         the GUI into its command line equivalent strings, and pass to the underlying ArgumentParser, 
         which need not know that the input came from the GUI at all.
         '''
-        return_list = []
-        for option in self.option_list.values():
-            return_list.extend(option.make_string())
-        return return_list
+        if not self.timer.enabled:
+            return self.form.make_commandline_list()
+        start = time.time()
+        commandline_list = self.form.make_commandline_list()
+        self.timer.add_time('make_commandline_list', time.time() - start)
+        self.timer.count('make_commandline_list calls')
+        return commandline_list
+
+    def queue_sweep_count(self, model):
+        if not self.sweep_count_pending:
+            self.sweep_count_pending = True
+            self.tk.after_idle(self.show_sweep_count)
+
+    def show_sweep_count(self):
+        '''Show how many runs the sweep currently in the form would make'''
+        from tkarg.sweep import SweepPlan
+        self.sweep_count_pending = False
+        try:
+            text = 'Sweep of %d runs' % SweepPlan(self.form).size()
+        except ValueError as err:
+            text = 'Sweep error: %s' % err
+        self.sweep_label.config(text=text)
+
+    def check_values(self):
+        '''Validate all of the options now, and check that a command line can be made from 
+        them, writing any errors to the status frame.  Returns whether all were acceptable.
+        '''
+        errors = []
+        if self.validator is not None:
+            errors.extend(self.validator.flush(self.form.active_models()))
+        if self.file_checker is not None:
+            errors.extend(self.file_checker.errors(self.form.active_models()))
+        for model, error in errors:
+            self.write_to_status('%s: %s\n' % (model.output_arg or model.option.dest, error))
+        try:
+            self.make_commandline_list()
+        except ValueError as err:
+            #values that can't be put on a command line that would parse back to them
+            self.write_to_status('%s\n' % err)
+            return False
+        return not errors
 
     def submit(self, event=None):
+        if not self.check_values():
+            return
         for th in self.analysis_threads:
-            th.start()
-            self.process_queue()
-            self.analysis_threads = []
-        self.frame.quit()
+            #the run method of a thread can't be pickled for a process pool
+            self.get_thread_executor().submit(th.run).add_done_callback(self.task_done)
+        self.analysis_threads = []
+        if self.on_run is not None:
+            self.on_run(self.make_commandline_list())
+        else:
+            self.frame.quit()
 
     def done(self):
+        if not self.check_values():
+            return
+        self.close_status()
         self.frame.destroy()
 
     def cancel(self):
+        self.close_status()
         self.frame.quit()
         self.frame.destroy()
         self.cancelled = True
 
+    def close_status(self):
+        '''Stop the status writer and remove its spill file, and stop validating and
+        checking files'''
+        if self.status_writer and not self.status_writer.closed:
+            self.status_writer.close()
+        if self.validator is not None:
+            self.validator.shutdown()
+        if self.file_checker is not None:
+            self.file_checker.shutdown()
+        #at the end, to include e.g. the time spent making the command line
+        self.timer.report()
+
     def OnFrameConfigure(self, event):
         '''Reset the scroll region to encompass the inner frame'''
         self.canvas.configure(scrollregion=self.canvas.bbox("all"))
@@ -845,6 +2060,8 @@ class ArgparseGui(object):
     def bring_to_front(self):
         '''Need to do this on OS X to bring window to front, otherwise root.lift() should work.'''
         if 'darwin' in sys.platform.lower():
+            import shlex
+            import subprocess
             try:
                 #this can give odd non-critical error messages from the OS, so send stderr to devnull
                 retcode = subprocess.call(shlex.split('''/usr/bin/osascript -e 'tell app "Finder" to set frontmost of process "Python" to true' '''), stderr=open(devnull, 'wb'))
@@ -859,6 +2076,8 @@ class ArgparseGui(object):
         Dict keys are the options that are dependencies for each of the options listed in the 
         values.  Keys and values are passed as the argument flags, ie. 
         {'--some-dep':['--dependent1', '--dependent2']}
+        Dependencies may be chained, but a DependencyCycleError is raised for any that 
+        would make a cycle.
         '''
         for key, val in depend_dict.items():
             if not isinstance(val, str):
@@ -867,6 +2086,19 @@ class ArgparseGui(object):
             else:
                 self.option_list[key].register_dependency(self.option_list[val])
 
+    def queue_dependency_changes(self, changes):
+        '''Collect the changes in state of options caused by a user action (or by 
+        register_dependencies), to be applied together once Tk is idle'''
+        if not self.pending_dependency_changes:
+            self.tk.after_idle(self.apply_dependency_changes)
+        self.pending_dependency_changes.update(changes)
+
+    def apply_dependency_changes(self):
+        changes = self.pending_dependency_changes
+        self.pending_dependency_changes = {}
+        for model, enabled in changes.items():
+            model.set_enabled(enabled)
+
     def get_option(self, option_flag):
         try:
             return self.option_list[option_flag]
@@ -890,6 +2122,15 @@ class ResultsWindow(object):
     the border between them are set up on the class instance, and then individual panes are 
     requested by chosing a column, row, row_span and column_span, much like the grid geometry
     manager.
+
+    Each pane added normally resizes the main canvas and repositions the window straight
+    away, which means a full relayout per pane.  When adding many panes do so in a batch, 
+    after which the layout and repositioning are done once:
+
+        with results.batch():
+            for row in range(6):
+                for column in range(6):
+                    results.add_canvas_pane(row, column)
     '''
     def __init__(self, tk_root, x_position=None, y_position=None, border_width=5, pane_width=512, pane_height=384):
         self.border_width = border_width
@@ -910,6 +2151,60 @@ class ResultsWindow(object):
         self.y_position = y_position
 
         self.panes = {}
+        #SeriesPlot by the name of the canvas widget it draws on
+        self.plots = {}
+
+        #while batch_depth > 0, layout and repositioning wait for the end of the batch
+        self.batch_depth = 0
+        self.layout_pending = False
+        self.reposition_pending = None
+        #size last given to the main canvas, and (width, height, x, y) of the window 
+        #after the last reposition, which stays valid until the window is changed
+        self.canvas_size = None
+        self.geometry_cache = None
+        self.tk.bind('<Configure>', self.on_configure)
+
+    def begin_batch(self):
+        self.batch_depth += 1
+
+    def commit(self):
+        '''End a batch, doing any layout and repositioning that was put off during it'''
+        self.batch_depth = max(self.batch_depth - 1, 0)
+        if self.batch_depth:
+            return
+        if self.layout_pending:
+            self._layout()
+        if self.reposition_pending is not None:
+            x, y = self.reposition_pending
+            self.reposition_pending = None
+            self.reposition(x, y)
+
+    @contextlib.contextmanager
+    def batch(self):
+        '''Context manager in which panes can be added without any relayout until the end'''
+        self.begin_batch()
+        try:
+            yield self
+        finally:
+            self.commit()
+
+    def _layout(self):
+        '''Size the main canvas to hold all of the panes'''
+        if self.batch_depth:
+            self.layout_pending = True
+            return
+        self.layout_pending = False
+        size = (self.pane_width * self.max_column, self.pane_height * self.max_row)
+        if size != self.canvas_size:
+            self.canvas_size = size
+            self.geometry_cache = None
+            self.main_canvas.config(width=size[0], height=size[1])
+
+    def on_configure(self, event):
+        #only the toplevel itself matters, not the panes within it
+        if event.widget is self.tk and self.geometry_cache is not None:
+            if (event.width, event.height, event.x, event.y) != self.geometry_cache:
+                self.geometry_cache = None
 
     def _place_pane(self, pane, row, column, row_span=1, column_span=1):
         '''Place a pane (canvas or text) that has already been created
@@ -930,9 +2225,11 @@ class ResultsWindow(object):
         self.max_row = max(row + row_span, self.max_row)
         self.max_column = max(column + column_span, self.max_column)
 
-        self.main_canvas.config(width=self.pane_width * self.max_column, height=self.pane_height * self.max_row)
+        self._layout()
 
     def extract_geometry(self, widget):
+        if widget is self.tk and self.geometry_cache is not None:
+            return self.geometry_cache
 
         widget.geometry('')
         widget.update_idletasks()
@@ -959,6 +2256,10 @@ class ResultsWindow(object):
         edit 2 - this doesn't always place the window in quite the right place when a negative x 
             is specified
         '''
+        if self.batch_depth:
+            #the latest request wins, and is done at the end of the batch
+            self.reposition_pending = (x, y)
+            return
         
         width, height, cur_x, cur_y = self.extract_geometry(self.tk)
        
@@ -976,6 +2277,7 @@ class ResultsWindow(object):
         #print 'str', geom
         self.tk.geometry(geom)
         self.tk.grid()
+        self.geometry_cache = (width, height, x, y)
         
         #width, height, cur_x, cur_y = self.extract_geometry(self.tk)
        
@@ -1041,3 +2343,30 @@ class ResultsWindow(object):
 
         return pane
 
+    def plot(self, pane, x, y=None, color='blue', width=1, y_limits=None):
+        '''Plot y against x (or x against its index) on a canvas pane, given by name or as
+        returned by add_canvas_pane.  x and y may be NumPy arrays or sequences of any 
+        length, since the series is reduced to the resolution of the pane when drawn (see 
+        tkarg.plotting).  Further series are added to the same plot.  Returns the SeriesPlot,
+        whose zoom and set_view methods change the part of x shown.
+        '''
+        from tkarg.plotting import SeriesPlot
+        if isinstance(pane, basestring):
+            pane = self.panes[pane]
+        plot = self.plots.get(str(pane))
+        if plot is None:
+            plot = self.plots[str(pane)] = SeriesPlot(pane, y_limits=y_limits)
+        plot.add_series(x, y, color=color, width=width)
+        return plot
+
+    def stream_text(self, pane, source=None, **kwargs):
+        '''Append text from source to a text pane (given by name or as returned by 
+        add_text_pane) in chunks between which the gui stays responsive, rather than all 
+        in one insert.  source is an iterator of strings or a file-like object, or None to
+        push text from another thread with feed().  Keyword arguments are passed to 
+        tkarg.textstream.TextStream, which is returned and can be cancelled.
+        '''
+        from tkarg.textstream import TextStream
+        if isinstance(pane, basestring):
+            pane = self.panes[pane]
+        return TextStream(pane, source, **kwargs)
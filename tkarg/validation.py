@@ -0,0 +1,209 @@
+'''Checking the values entered for options against the constraints of their argparse
+actions, as they are typed rather than when parse_args is finally called.
+
+check_value applies the same checks as argparse to the text of an option: the number of
+values against nargs, each value converted with the action's type (e.g. one made by
+argparse_bounded_float), and the converted values against choices.  It returns the
+message argparse would give, or None.
+
+A LiveValidator runs those checks for an option a short while after it was last edited,
+so that a burst of typing is checked once.  Types marked with
+tkarg.argparseutils.expensive_type are run on worker threads, and the result of a check
+is dropped if the option has been edited again since it was started, so a slow type
+never holds up typing nor shows an error for text that has already changed.
+
+Nothing in this module imports Tkinter, the LiveValidator just needs a widget to call
+after() on.
+'''
+import shlex
+import argparse
+
+from tkarg.optionmodel import takes_multiple_values, STRING, CHOICE
+from tkarg.sweep import expand_spec
+
+
+def type_name(type_func):
+    return getattr(type_func, '__name__', repr(type_func))
+
+
+def split_values(option, text):
+    '''The list of values that text would be passed to the option as.  Raises ValueError
+    for text that can't be split, e.g. with an unbalanced quote.
+    '''
+    if takes_multiple_values(option.nargs):
+        return shlex.split(text)
+    return [text]
+
+
+def check_count(option, values):
+    nargs = option.nargs
+    if isinstance(nargs, int) and len(values) != nargs:
+        return 'expected %d values, got %d' % (nargs, len(values))
+    elif nargs == '+' and not values:
+        return 'expected at least one value'
+    return None
+
+
+def convert(option, text):
+    '''Convert a single value with the option's type, as argparse would.  Returns
+    (value, error message).
+    '''
+    type_func = option.type
+    if type_func is None or type_func is str:
+        return text, None
+    #FileType opens the file, which isn't something to do on every keystroke
+    if isinstance(type_func, argparse.FileType) or type_func is file:
+        return text, None
+    try:
+        return type_func(text), None
+    except argparse.ArgumentTypeError as err:
+        return None, str(err)
+    except (TypeError, ValueError):
+        return None, 'invalid %s value: %r' % (type_name(type_func), text)
+
+
+def check_value(option, text, final=False, sweep=False):
+    '''The message argparse would give for text entered for option, or None if it's
+    acceptable.  Empty text means the option isn't passed, which is only an error for a
+    required option, and then only when final is True, i.e. when the gui is about to
+    return the command line.  With sweep True, text may stand for several values as 
+    described in tkarg.sweep, each of which is checked.
+    '''
+    if sweep:
+        try:
+            values = expand_spec(text)
+        except ValueError as err:
+            return str(err)
+        if values is not None:
+            for value in values:
+                error = check_value(option, value, final=final)
+                if error:
+                    return '%s: %s' % (value, error)
+            return None
+
+    if not text or not text.strip():
+        if final and option.required:
+            return 'a value is required'
+        return None
+    try:
+        values = split_values(option, text)
+    except ValueError as err:
+        return str(err)
+
+    error = check_count(option, values)
+    if error:
+        return error
+    for text_value in values:
+        value, error = convert(option, text_value)
+        if error:
+            return error
+        if option.choices is not None and value not in option.choices:
+            return 'invalid choice: %r (choose from %s)' % (value, ', '.join(repr(choice) for choice in option.choices))
+    return None
+
+
+def is_expensive(option):
+    return bool(getattr(option.type, 'expensive', False))
+
+
+def validates(model, sweep=False):
+    '''Whether the values of this model are free text that needs checking.  In a sweep
+    choices are typed too, since several may be given.
+    '''
+    return model.kind == STRING or (sweep and model.kind == CHOICE)
+
+
+def check_model(model, final=False, sweep=False):
+    '''Check the value of a model, recording the result on it.  Returns the error message.'''
+    if not validates(model, sweep):
+        return None
+    error = check_value(model.option, model.value, final=final, sweep=sweep)
+    model.set_error(error)
+    return error
+
+
+class LiveValidator(object):
+    '''Check options a short while after they were last edited.
+
+    widget - any Tk widget, used to schedule checks with after()
+    delay - milliseconds without an edit before an option is checked
+    max_workers - the number of expensive checks that may run at once
+    sweep - whether values may be sweeps (see tkarg.sweep)
+    '''
+    def __init__(self, widget, delay=250, max_workers=2, sweep=False):
+        self.widget = widget
+        self.sweep = sweep
+        self.delay = delay
+        self.max_workers = max_workers
+        #model -> after id of its scheduled check
+        self.scheduled = {}
+        #model -> number of the latest check, so that results of stale ones are dropped
+        self.generations = {}
+        #model -> future of an expensive check in progress
+        self.futures = {}
+        self.executor = None
+
+    def get_executor(self):
+        if self.executor is None:
+            from tkarg.executor import TaskExecutor, TkDispatcher
+            self.executor = TaskExecutor(TkDispatcher(self.widget), max_workers=self.max_workers)
+        return self.executor
+
+    def value_changed(self, model):
+        '''Form listener, called whenever the value of a model is set'''
+        if not validates(model, self.sweep):
+            return
+        #anything already running for the model is now stale
+        self.generations[model] = self.generations.get(model, 0) + 1
+        after_id = self.scheduled.pop(model, None)
+        if after_id is not None:
+            self.widget.after_cancel(after_id)
+        self.scheduled[model] = self.widget.after(self.delay, lambda: self.check(model))
+
+    def check(self, model):
+        self.scheduled.pop(model, None)
+        generation = self.generations.get(model, 0)
+        if not is_expensive(model.option):
+            check_model(model, sweep=self.sweep)
+            return
+
+        future = self.futures.pop(model, None)
+        if future is not None:
+            #only stops it if it hasn't started yet, otherwise its result is dropped
+            future.cancel()
+        future = self.get_executor().submit(check_value, model.option, model.value, sweep=self.sweep)
+        future.add_done_callback(lambda done: self.check_done(model, generation, done))
+        self.futures[model] = future
+
+    def check_done(self, model, generation, future):
+        if self.futures.get(model) is future:
+            del self.futures[model]
+        if future.cancelled() or generation != self.generations.get(model, 0):
+            return
+        if future.exception_value is not None:
+            model.set_error(str(future.exception_value))
+        else:
+            model.set_error(future.result_value)
+
+    def flush(self, models):
+        '''Check models now, including for required values, waiting for any expensive
+        checks.  Returns a list of (model, error message) for those that failed.
+        '''
+        for after_id in self.scheduled.values():
+            self.widget.after_cancel(after_id)
+        self.scheduled = {}
+        for future in self.futures.values():
+            future.cancel()
+        self.futures = {}
+
+        errors = []
+        for model in models:
+            self.generations[model] = self.generations.get(model, 0) + 1
+            error = check_model(model, final=True, sweep=self.sweep)
+            if error:
+                errors.append((model, error))
+        return errors
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_pending=True)